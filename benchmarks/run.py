@@ -0,0 +1,120 @@
+"""Runs the benchmark workloads of workloads.py and compares them against stored baseline results.
+
+Usage::
+
+    python benchmarks/run.py                      # run and compare against benchmarks/baseline.json
+    python benchmarks/run.py --save               # run and store the results as new baseline
+    python benchmarks/run.py --threshold 0.5 -k sweep
+
+The timing of a workload is the best time per call out of several repeats. A workload counts as regression if it is
+slower than its baseline by more than the threshold (relative), in which case the exit code is 1. Workloads with a
+reference workload also count as regression if they are slower than the reference by more than the threshold.
+Baselines are machine dependent, so they should be regenerated with --save when the benchmarks are run on a different
+machine.
+
+"""
+
+from __future__ import print_function
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(1, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import workloads  # noqa: E402
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+def collect(pattern=None):
+    """Returns the benchmark workloads sorted by name, optionally only those containing pattern"""
+    return sorted((name[len('bench_'):], function) for name, function in vars(workloads).items()
+                  if name.startswith('bench_') and callable(function) and (pattern is None or pattern in name))
+
+
+def measure(function, repeat=5, min_time=0.2):
+    """Returns the best time per call of function in seconds, after calling its setup if it has one"""
+    setup = getattr(function, 'setup', None)
+    if setup is not None:
+        setup()
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def compare(results, baseline, threshold):
+    """Compares results with baseline and returns the names of the regressed workloads"""
+    regressions = []
+    for name, seconds in results.items():
+        if name not in baseline:
+            print('%-32s %12.3f ms   (no baseline)' % (name, seconds * 1e3))
+            continue
+        ratio = seconds / baseline[name]
+        flag = 'REGRESSION' if ratio > 1.0 + threshold else ''
+        print('%-32s %12.3f ms %8.2fx  %s' % (name, seconds * 1e3, ratio, flag))
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def compare_references(results, references, threshold):
+    """Compares results with the results of their reference workloads and returns the names of the slower ones"""
+    regressions = []
+    for name, reference in sorted(references.items()):
+        if name not in results or reference not in results:
+            continue
+        ratio = results[name] / results[reference]
+        flag = 'REGRESSION' if ratio > 1.0 + threshold else ''
+        print('%-32s %12.3f ms %8.2fx  of %s  %s' % (name, results[name] * 1e3, ratio, reference, flag))
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the pyjones benchmarks')
+    parser.add_argument('-k', dest='pattern', default=None, help='only run workloads containing this string')
+    parser.add_argument('--baseline', default=BASELINE, help='baseline file, default: %(default)s')
+    parser.add_argument('--save', action='store_true', help='store the results as new baseline')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='allowed relative slowdown before failing, default: %(default)s')
+    parser.add_argument('--repeat', type=int, default=5, help='number of repeats, default: %(default)s')
+    arguments = parser.parse_args(argv)
+
+    results = {}
+    references = {}
+    selected = collect(arguments.pattern)
+    # the reference workloads are needed for the comparison even if they are not selected
+    missing = set(getattr(function, 'reference', None) for _, function in selected) - set(dict(selected))
+    selected += [(name, function) for name, function in collect() if name in missing]
+    for name, function in selected:
+        results[name] = measure(function, repeat=arguments.repeat)
+        if getattr(function, 'reference', None) is not None:
+            references[name] = function.reference
+    if arguments.save:
+        baseline = {}
+        if os.path.exists(arguments.baseline):
+            with open(arguments.baseline) as baseline_file:
+                baseline = json.load(baseline_file)
+        baseline.update(results)
+        with open(arguments.baseline, 'w') as baseline_file:
+            json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+        for name, seconds in sorted(results.items()):
+            print('%-32s %12.3f ms' % (name, seconds * 1e3))
+        return 0
+    baseline = {}
+    if os.path.exists(arguments.baseline):
+        with open(arguments.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    regressions = compare(results, baseline, arguments.threshold)
+    regressions += compare_references(results, references, arguments.threshold)
+    if regressions:
+        print('%d workload(s) regressed by more than %d%%' % (len(regressions), arguments.threshold * 100))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""Benchmark workloads of pyjones. Every function whose name starts with ``bench_`` is one workload which is timed
+by run.py. Workloads should run for roughly a millisecond or longer, the runner repeats them as necessary. A workload
+may have a ``setup`` attribute, which is called once before it is timed, and a ``reference`` attribute naming another
+workload it must be as fast as.
+
+"""
+
+from __future__ import print_function
+from functools import reduce
+import numpy as np
+from pyjones.polarizations import *
+from pyjones.opticalelements import *
+from pyjones.opticaltrain import OpticalTrain
+from pyjones import instrumentation
+
+ANGLES = np.linspace(0, 360, 20)
+SWEEP_ANGLES = np.linspace(0, 360, 100000)
+CHAIN = [PhaseRetarder(angle, eta) for angle, eta in np.random.RandomState(0).uniform(0, 180, (200, 2))]
+STATES = QuarterWavePlate(SWEEP_ANGLES) * LinearHorizontal()
+TRAIN = OpticalTrain(CHAIN)
+
+
+def bench_construct_vectors():
+    for _ in range(100):
+        JonesVector([1.0, 1.0j])
+        LinearHorizontal()
+        LinearVertical()
+        LinearDiagonal()
+        LinearAntidiagonal()
+        Linear(30)
+        CircularRight()
+        CircularLeft()
+
+
+def bench_construct_elements():
+    for _ in range(100):
+        JonesMatrix([[1.0, 0.0], [0.0, 1.0]])
+        PolarizerHorizontal()
+        PolarizerVertical()
+        Polarizer(30)
+        QuarterWavePlate(30)
+        HalfWavePlate(30)
+        PhaseRetarder(30, 45)
+
+
+def bench_construct_arrays():
+    JonesVectorArray(np.ones((100000, 2)))
+    JonesMatrixArray(np.ones((100000, 2, 2)))
+
+
+def bench_chain_multiplication():
+    reduce(lambda total, element: element * total, CHAIN[1:], CHAIN[0]) * LinearHorizontal()
+
+
+def bench_chain_multiplication_profiled():
+    with instrumentation.profile():
+        bench_chain_multiplication()
+
+
+def _enable_and_disable_instrumentation():
+    instrumentation.enable()
+    instrumentation.disable()
+
+
+def bench_chain_multiplication_after_profiling():
+    bench_chain_multiplication()
+
+
+# a disabled instrumentation must leave no overhead behind, so this has to be as fast as chain_multiplication
+bench_chain_multiplication_after_profiling.setup = _enable_and_disable_instrumentation
+bench_chain_multiplication_after_profiling.reference = 'chain_multiplication'
+
+
+def bench_train_construction():
+    OpticalTrain(CHAIN).matrix
+
+
+def bench_train_replace_element():
+    for index in range(0, 200, 10):
+        TRAIN[index] = CHAIN[index]
+    TRAIN.matrix
+
+
+def bench_sweep_loop_qwp():
+    [(PolarizerVertical() * QuarterWavePlate(angle) * LinearHorizontal()).intensity for angle in ANGLES]
+
+
+def bench_sweep_loop_hwp():
+    [(PolarizerVertical() * HalfWavePlate(angle) * LinearHorizontal()).intensity for angle in ANGLES]
+
+
+def bench_sweep_vectorized_qwp():
+    (PolarizerVertical() * QuarterWavePlate(SWEEP_ANGLES) * LinearHorizontal()).intensity
+
+
+def bench_sweep_vectorized_retarder():
+    (PolarizerVertical() * PhaseRetarder(SWEEP_ANGLES, 45.0) * LinearHorizontal()).intensity
+
+
+def bench_stokes_single():
+    state = CircularRight()
+    for _ in range(1000):
+        state.Stokes
+
+
+def bench_stokes_array():
+    STATES.Stokes
+
+
+def bench_plot_preparation():
+    from pyjones import visualization
+    points, _ = visualization._poincare_points(STATES)
+    visualization._density_bins(points, 60)
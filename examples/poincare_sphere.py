@@ -1,24 +1,19 @@
-import pyjones
+from pyjones.visualization import get_Poincare_sphere, show_plots
 from pyjones.polarizations import LinearHorizontal
 from pyjones.opticalelements import HalfWavePlate, QuarterWavePlate
 import numpy as np
 
-fig1, ps = pyjones.polarizations.get_Poincare_sphere()
-fig2, ps2 = pyjones.polarizations.get_Poincare_sphere()
+fig1, ps = get_Poincare_sphere()
+fig2, ps2 = get_Poincare_sphere()
 
+angles = np.linspace(0, 360, 50)
 
 # plot QWP
-for angle in np.linspace(0, 360, 50):
-    pol = QuarterWavePlate(angle) * LinearHorizontal()
-    pol.plot(ps, color='r')
+pol = QuarterWavePlate(angles) * LinearHorizontal()
+pol.plot(ps, color='r')
 
 # plot HWP
-for angle in np.linspace(0, 360, 50):
-    pol = HalfWavePlate(angle) * LinearHorizontal()
-    pol.plot(ps2, color='b')
-
-pyjones.polarizations.show_plots()
-
-
-
+pol = HalfWavePlate(angles) * LinearHorizontal()
+pol.plot(ps2, color='b')
 
+show_plots()
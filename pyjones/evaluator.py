@@ -0,0 +1,104 @@
+"""This module provides an asyncio friendly evaluation of polarization queries. Concurrent queries are collected for
+a short time window (micro-batching) and then evaluated together with a single vectorized NumPy call, so a service
+answering many small queries neither blocks its event loop with one computation per query nor gives up batching.
+
+Example::
+
+    evaluator = AsyncEvaluator(max_batch_size=1024, max_latency=0.002)
+    train = OpticalTrain([QuarterWavePlate(20), PolarizerVertical()])
+
+    async def handle(state):
+        return await evaluator.evaluate(train, state, quantity='intensity')
+
+"""
+
+from __future__ import print_function
+import asyncio
+from pyjones.opticalelements import *
+from pyjones.opticaltrain import _intensity, _stokes, _system_matrices
+
+
+def _system_matrix(system):
+    matrix = _system_matrices(system, arrays=False)
+    if matrix.shape != (2, 2):
+        raise ValueError('The system must consist of single elements, not of element arrays')
+    return matrix
+
+
+class AsyncEvaluator(object):
+    def __init__(self, max_batch_size=1024, max_latency=0.001):
+        """This collects concurrent evaluation requests and evaluates them in batches. A batch is evaluated as soon
+        as it holds max_batch_size requests or when the oldest request waited for max_latency seconds.
+        The system matrices are taken from the cache of the OpticalTrain or from the JonesMatrix directly.
+
+        :param max_batch_size: Maximum number of requests evaluated together
+        :param max_latency: Maximum time in seconds a request waits for other requests
+        """
+        if max_batch_size < 1:
+            raise ValueError('max_batch_size must be positive')
+        if max_latency < 0:
+            raise ValueError('max_latency must not be negative')
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self._pending = []
+        self._timer = None
+        self._timer_loop = None
+
+    async def evaluate(self, system, state, quantity='vector'):
+        """Propagates a polarization through an optical system as part of the next batch
+
+        :param system: JonesMatrix or OpticalTrain
+        :param state: JonesVector entering the system
+        :param quantity: Either 'vector', 'intensity' or 'Stokes'
+        :return: The output JonesVector, its intensity or its Stokes parameters as array of shape (4,)
+        """
+        if quantity not in ('vector', 'intensity', 'Stokes'):
+            raise ValueError("Quantity must be either 'vector', 'intensity' or 'Stokes'")
+        if not isinstance(state, JonesVector):
+            raise TypeError('State must be JonesVector')
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if self._timer is not None and self._timer_loop is not loop:
+            # the timer belongs to a loop which is closed or not running here, so its flush would never come
+            self._timer.cancel()
+            self._timer = None
+        self._pending.append((_system_matrix(system), state.polarization_vector[0], quantity, future))
+        if len(self._pending) >= self.max_batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_latency, self.flush)
+            self._timer_loop = loop
+        return await future
+
+    def flush(self):
+        """Evaluates all pending requests immediately"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+            self._timer_loop = None
+        # requests of a closed loop can not be answered anymore
+        requests = [request for request in self._pending
+                    if not request[3].done() and not request[3].get_loop().is_closed()]
+        self._pending = []
+        if not requests:
+            return
+        try:
+            matrices = np.array([request[0] for request in requests])
+            vectors = np.array([request[1] for request in requests])
+            fields = np.matmul(matrices, vectors[..., np.newaxis])[..., 0]
+            intensities = _intensity(fields)
+            stokes = _stokes(fields)
+        except Exception as error:
+            for request in requests:
+                if not request[3].done():
+                    request[3].set_exception(error)
+            return
+        for index, (_, _, quantity, future) in enumerate(requests):
+            if future.done():
+                continue
+            if quantity == 'intensity':
+                future.set_result(float(intensities[index]))
+            elif quantity == 'Stokes':
+                future.set_result(stokes[index])
+            else:
+                future.set_result(JonesVector._from_array(fields[index:index + 1].copy(), normal_form=True))
@@ -0,0 +1,215 @@
+"""This module provides polarization resolved images, e.g. camera frames in which every pixel has its own Jones vector.
+A FieldMap stores the field of all pixels as one (H, W, 2) array and an ElementMap describes an optical element whose
+parameters vary over the image, e.g. a vortex retarder or stress birefringence in a window. No per pixel objects are
+created.
+
+An ElementMap keeps its parameter images, e.g. angle and eta, instead of an (H, W, 2, 2) stack of matrices. The
+matrices are computed tile by tile of tile_rows image rows while the field is propagated, so the peak memory is the
+field itself plus a few tiles, independent of the number of elements.
+
+Example::
+
+    y, x = np.mgrid[-1:1:2048j, -1:1:2048j]
+    vortex = ElementMap(HalfWavePlate, np.degrees(np.arctan2(y, x)) / 2)
+    field = FieldMap.uniform(LinearHorizontal(), (2048, 2048))
+    stokes = field.propagate([vortex, QuarterWavePlate(45)], quantity='Stokes')  # (2048, 2048, 4)
+
+"""
+
+from __future__ import print_function
+from pyjones.opticalelements import *
+from pyjones.opticalelements import _as_parameters
+from pyjones.opticaltrain import _intensity, _stokes, _system_matrices
+from pyjones.precision import complex_dtype
+
+
+class ElementMap(object):
+    __slots__ = ('element', 'parameters', 'matrices', 'shape')
+
+    def __init__(self, element, *parameters):
+        """This represents an optical element whose parameters vary over an image
+
+        :param element: A predefined element class, e.g. PhaseRetarder
+        :param parameters: The parameters of the element in degree, each either a scalar or an (H, W) image, e.g.
+                           ElementMap(PhaseRetarder, angle_image, eta_image). Images of shape (1, W) or (H, 1)
+                           broadcast over the rows or columns.
+        """
+        if not (isinstance(element, type) and issubclass(element, JonesMatrix)):
+            raise TypeError('Element must be an element class like PhaseRetarder')
+        if parameters and not issubclass(element, ParametrizedJonesMatrix):
+            raise TypeError('%s takes no parameters' % element.__name__)
+        self.element = element
+        self.parameters = [np.asarray(parameter, dtype=float) for parameter in parameters]
+        self.matrices = None
+        shapes = [parameter.shape for parameter in self.parameters if parameter.ndim > 0]
+        if any(len(shape) != 2 for shape in shapes):
+            raise ValueError('Parameter images must have the shape (H, W)')
+        self.shape = np.broadcast_shapes(*shapes) if shapes else None
+
+    @classmethod
+    def from_matrices(cls, matrices):
+        """Creates an element map from explicit matrices, e.g. measured Jones matrix images
+
+        :param matrices: Array of shape (H, W, 2, 2)
+        :return: ElementMap
+        """
+        matrices = np.asarray(matrices)
+        if matrices.ndim != 4 or matrices.shape[2:] != (2, 2):
+            raise ValueError('Shape of array must be (H, W, 2, 2)')
+        self = object.__new__(cls)
+        self.element = JonesMatrix
+        self.parameters = []
+        self.matrices = matrices
+        self.shape = matrices.shape[:2]
+        return self
+
+    def __repr__(self):
+        return 'ElementMap(%s, shape=%s)' % (self.element.__name__, self.shape)
+
+    def tile(self, start, stop):
+        """Computes the matrices of the image rows start to stop
+
+        :param start: First row
+        :param stop: Row behind the last row
+        :return: The matrices of the rows, of shape (stop - start, W, 2, 2), or (2, 2) if the element is uniform
+        :rtype: np.ndarray
+        """
+        if self.matrices is not None:
+            if self.matrices.shape[0] == 1:
+                # a single row of matrices broadcasts over the image like a single row of parameters
+                return np.broadcast_to(self.matrices, (stop - start,) + self.matrices.shape[1:])
+            return self.matrices[start:stop]
+        if not self.parameters:
+            return self.element().matrix
+        # images with a single row or column broadcast over the image
+        rows = [parameter[start:stop] if parameter.ndim > 0 and parameter.shape[0] > 1 else parameter
+                for parameter in self.parameters]
+        shape = np.broadcast_shapes(*[row.shape for row in rows])
+        matrices = self.element._matrix_function(*_as_parameters(*rows))
+        return matrices.reshape(shape + (2, 2)).astype(self.element._dtype(), copy=False)
+
+    @property
+    def matrix_images(self):
+        """Property which returns all matrices at once as an (H, W, 2, 2) array
+
+        :rtype: np.ndarray
+        """
+        if self.shape is None:
+            raise ValueError('A uniform element has no image shape')
+        return self.tile(0, self.shape[0])
+
+
+def _tile_matrices(element, start, stop):
+    if isinstance(element, ElementMap):
+        return element.tile(start, stop)
+    return _system_matrices(element, 'Elements other than ElementMap', arrays=False)
+
+
+class FieldMap(object):
+    __slots__ = ('fields',)
+
+    def __init__(self, fields):
+        """This represents a polarization resolved image with one Jones vector per pixel
+
+        :param fields: Complex array of shape (H, W, 2) holding Ex and Ey of every pixel
+        """
+        fields = np.array(fields, dtype=complex_dtype())
+        if fields.ndim != 3 or fields.shape[2] != 2:
+            raise ValueError('Shape of array must be (H, W, 2)')
+        self.fields = fields
+
+    @classmethod
+    def uniform(cls, state, shape):
+        """Creates an image in which every pixel has the same polarization
+
+        :param state: JonesVector
+        :param shape: Shape (H, W) of the image
+        :return: FieldMap
+        """
+        fields = np.empty(tuple(shape) + (2,), dtype=complex_dtype())
+        fields[...] = state.polarization_vector[0]
+        self = object.__new__(cls)
+        self.fields = fields
+        return self
+
+    def __repr__(self):
+        return 'FieldMap(shape=%s)' % (self.shape,)
+
+    @property
+    def shape(self):
+        """Property which returns the shape (H, W) of the image
+
+        :rtype: tuple
+        """
+        return self.fields.shape[:2]
+
+    @property
+    def intensity(self):
+        """Property which returns the intensity image
+
+        :rtype: np.ndarray of shape (H, W)
+        """
+        return _intensity(self.fields)
+
+    @property
+    def Stokes(self):
+        """Property which returns the Stokes parameters of every pixel
+
+        :rtype: np.ndarray of shape (H, W, 4)
+        """
+        return _stokes(self.fields)
+
+    def apply(self, elements, tile_rows=128):
+        """Propagates the field through elements in place, tile by tile
+
+        :param elements: An ElementMap, JonesMatrix or OpticalTrain, or a list of them in the order in which the light
+                         passes them
+        :param tile_rows: Number of image rows processed at once
+        :return: The field map itself
+        :rtype: FieldMap
+        """
+        self._propagate(elements, 'field', tile_rows, self.fields)
+        return self
+
+    def propagate(self, elements, quantity='field', tile_rows=128):
+        """Propagates the field through elements tile by tile and returns the output without changing this field
+
+        :param elements: An ElementMap, JonesMatrix or OpticalTrain, or a list of them in the order in which the light
+                         passes them
+        :param quantity: Either 'field' for a new FieldMap, 'intensity' for an (H, W) image or 'Stokes' for an
+                         (H, W, 4) image. Intensity and Stokes images are reduced tile by tile, so no output field is
+                         stored.
+        :param tile_rows: Number of image rows processed at once
+        :return: FieldMap or np.ndarray
+        """
+        if quantity not in ('field', 'intensity', 'Stokes'):
+            raise ValueError("Quantity must be either 'field', 'intensity' or 'Stokes'")
+        if quantity == 'field':
+            output = object.__new__(FieldMap)
+            output.fields = np.empty_like(self.fields)
+        else:
+            output = np.empty(self.shape + ((4,) if quantity == 'Stokes' else ()), dtype=self.fields.real.dtype)
+        self._propagate(elements, quantity, tile_rows, output.fields if quantity == 'field' else output)
+        return output
+
+    def _propagate(self, elements, quantity, tile_rows, out):
+        if not isinstance(elements, (list, tuple)):
+            elements = [elements]
+        for element in elements:
+            if isinstance(element, ElementMap) and element.shape is not None and \
+                    any(size not in (1, image_size) for size, image_size in zip(element.shape, self.shape)):
+                raise ValueError('Element map of shape %s does not match the image shape %s'
+                                 % (element.shape, self.shape))
+        if tile_rows < 1:
+            raise ValueError('tile_rows must be positive')
+        for start in range(0, self.shape[0], tile_rows):
+            stop = min(start + tile_rows, self.shape[0])
+            tile = self.fields[start:stop]
+            for element in elements:
+                tile = np.matmul(_tile_matrices(element, start, stop), tile[..., np.newaxis])[..., 0]
+            if quantity == 'intensity':
+                out[start:stop] = _intensity(tile)
+            elif quantity == 'Stokes':
+                out[start:stop] = _stokes(tile)
+            else:
+                out[start:stop] = tile
@@ -0,0 +1,256 @@
+"""This module provides opt-in instrumentation of the hot paths of pyjones: the construction of vectors, matrices and
+elements, the multiplications, the normalization and normal form of Jones vectors and the Stokes conversion. For
+every operation the number of calls, the inclusive time and the number of processed items (the batch size) are
+recorded, together with the hits and misses of the matrix cache.
+
+The instrumentation wraps the instrumented methods only while it is enabled and puts the original methods back
+afterwards, so a disabled instrumentation has no overhead at all.
+
+Example::
+
+    with profile() as stats:
+        train * states
+    print(stats.report())
+    stats.to_json('profile.json')
+
+"""
+
+from __future__ import print_function
+from functools import wraps
+import json
+import threading
+import time
+from pyjones.opticalelements import *
+from pyjones.opticaltrain import OpticalTrain
+
+# (class, attribute, operation, batch) of every instrumented method, where batch names the object whose size is
+# recorded: the result, the instance itself or the state passed to the method
+_HOT_PATHS = [
+    (JonesVector, '__init__', 'create JonesVector', 'self'),
+    (JonesVector, '_from_array', 'create JonesVector', 'result'),
+    (JonesVector, '_normalize', 'normalize', 'self'),
+    (JonesVector, '_make_normal_form', 'normal form', 'self'),
+    (JonesVector, 'Stokes', 'Stokes', 'result'),
+    (JonesVectorArray, '__init__', 'create JonesVectorArray', 'self'),
+    (JonesVectorArray, '_from_array', 'create JonesVectorArray', 'result'),
+    (JonesVectorArray, '_normalize', 'normalize', 'self'),
+    (JonesVectorArray, '_make_normal_form', 'normal form', 'self'),
+    (JonesVectorArray, 'Stokes', 'Stokes', 'result'),
+    (JonesMatrix, '__init__', 'create JonesMatrix', 'self'),
+    (JonesMatrix, '_from_array', 'create JonesMatrix', 'result'),
+    (JonesMatrix, '__mul__', 'JonesMatrix multiplication', 'result'),
+    (JonesMatrixArray, '__init__', 'create JonesMatrixArray', 'self'),
+    (JonesMatrixArray, '_from_array', 'create JonesMatrixArray', 'result'),
+    (JonesMatrixArray, '__mul__', 'JonesMatrixArray multiplication', 'result'),
+    (ParametrizedJonesMatrix, '__init__', 'create element', 'self'),
+    (ParametrizedJonesMatrix, '_evaluate', 'evaluate element matrix', 'result'),
+    (OpticalTrain, '__mul__', 'OpticalTrain multiplication', 'result'),
+    (OpticalTrain, 'evaluate', 'OpticalTrain evaluate', 'state'),
+    (OpticalTrain, 'gradient', 'OpticalTrain gradient', 'state'),
+]
+
+
+def _batch_size(obj):
+    if isinstance(obj, JonesVectorArray):
+        return len(obj.polarization_vectors)
+    elif isinstance(obj, JonesMatrixArray):
+        return len(obj.matrices)
+    elif isinstance(obj, np.ndarray) and obj.ndim > 1 and obj.shape != (2, 2):
+        # a single (2, 2) matrix is one item, stacks of matrices or vectors have the batch along the first axis
+        return obj.shape[0]
+    return 1
+
+
+class _Recorder(object):
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.depth = 0
+        self.originals = []
+        self.operations = {}
+        self.cache_start = (0, 0)
+        # the operations of the active profile blocks, which record in addition to the global statistics
+        self.sinks = []
+
+    def record(self, operation, seconds, items):
+        with self.lock:
+            for operations in [self.operations] + self.sinks:
+                entry = operations.get(operation)
+                if entry is None:
+                    entry = operations[operation] = {'calls': 0, 'time': 0.0, 'items': 0, 'max_batch': 0}
+                entry['calls'] += 1
+                entry['time'] += seconds
+                entry['items'] += items
+                entry['max_batch'] = max(entry['max_batch'], items)
+
+    def wrap(self, function, operation, batch):
+        recorder = self
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            result = function(*args, **kwargs)
+            seconds = time.perf_counter() - start
+            if batch == 'result':
+                counted = result
+            elif batch == 'state':
+                counted = args[1] if len(args) > 1 else kwargs.get('state')
+            else:
+                counted = args[0]
+            recorder.record(operation, seconds, _batch_size(counted))
+            return result
+        return wrapper
+
+    def install(self):
+        for cls, name, operation, batch in _HOT_PATHS:
+            original = cls.__dict__[name]
+            self.originals.append((cls, name, original))
+            if isinstance(original, classmethod):
+                replacement = classmethod(self.wrap(original.__func__, operation, batch))
+            elif isinstance(original, property):
+                replacement = property(self.wrap(original.fget, operation, batch), original.fset, original.fdel,
+                                       original.__doc__)
+            else:
+                replacement = self.wrap(original, operation, batch)
+            setattr(cls, name, replacement)
+
+    def uninstall(self):
+        while self.originals:
+            cls, name, original = self.originals.pop()
+            setattr(cls, name, original)
+
+
+_recorder = _Recorder()
+
+
+def _cache_counts():
+    info = matrix_cache_info()
+    return info.hits, info.misses
+
+
+def enable():
+    """Starts recording. Calls may be nested, recording stops with the last matching disable."""
+    with _recorder.lock:
+        _recorder.depth += 1
+        if _recorder.depth == 1:
+            _recorder.cache_start = _cache_counts()
+            _recorder.install()
+
+
+def disable():
+    """Stops recording and restores the original, uninstrumented methods"""
+    with _recorder.lock:
+        if _recorder.depth == 0:
+            return
+        _recorder.depth -= 1
+        if _recorder.depth == 0:
+            _recorder.uninstall()
+
+
+def is_enabled():
+    """Returns whether the instrumentation is recording
+
+    :rtype: bool
+    """
+    return _recorder.depth > 0
+
+
+def reset():
+    """Discards everything recorded so far"""
+    with _recorder.lock:
+        _recorder.operations = {}
+        _recorder.cache_start = _cache_counts()
+
+
+def snapshot():
+    """Returns a copy of the statistics recorded since the last reset
+
+    :rtype: Stats
+    """
+    with _recorder.lock:
+        operations = dict((name, dict(entry)) for name, entry in _recorder.operations.items())
+        hits, misses = _cache_counts()
+        cache = {'hits': hits - _recorder.cache_start[0], 'misses': misses - _recorder.cache_start[1]}
+    return Stats(operations, cache)
+
+
+class Stats(object):
+    def __init__(self, operations=None, cache=None):
+        """This holds the recorded statistics. For every operation the number of calls, the total inclusive time in
+        seconds, the total number of processed items and the largest batch are kept.
+
+        :param operations: Mapping of operation names to dicts with the keys 'calls', 'time', 'items', 'max_batch'
+        :param cache: Dict with the hits and misses of the matrix cache
+        """
+        self.operations = operations or {}
+        self.cache = cache or {'hits': 0, 'misses': 0}
+
+    def __repr__(self):
+        return 'Stats(%d operations, %d calls)' % (len(self.operations),
+                                                   sum(entry['calls'] for entry in self.operations.values()))
+
+    def __getitem__(self, operation):
+        return self.operations[operation]
+
+    def as_dict(self):
+        """Returns the statistics as a JSON serializable dict
+
+        :rtype: dict
+        """
+        return {'operations': dict((name, dict(entry)) for name, entry in self.operations.items()),
+                'cache': dict(self.cache)}
+
+    def to_json(self, path=None):
+        """Exports the statistics as JSON
+
+        :param path: If given the JSON is written to this file
+        :return: The JSON string
+        :rtype: str
+        """
+        text = json.dumps(self.as_dict(), indent=2, sort_keys=True)
+        if path is not None:
+            with open(path, 'w') as json_file:
+                json_file.write(text)
+        return text
+
+    def report(self):
+        """Returns a table of all operations sorted by their total time
+
+        :rtype: str
+        """
+        lines = ['%-32s %10s %12s %12s %10s' % ('operation', 'calls', 'time [ms]', 'items', 'max batch')]
+        for name, entry in sorted(self.operations.items(), key=lambda item: -item[1]['time']):
+            lines.append('%-32s %10d %12.3f %12d %10d' % (name, entry['calls'], entry['time'] * 1e3, entry['items'],
+                                                          entry['max_batch']))
+        lines.append('matrix cache: %d hits, %d misses' % (self.cache['hits'], self.cache['misses']))
+        return '\n'.join(lines)
+
+
+class profile(object):
+    def __init__(self):
+        """Context manager which records everything inside a with block. The returned Stats object is filled when
+        the block is left. Blocks may be nested, each one reports the operations inside it and the global statistics
+        are not reset.
+
+        Example::
+
+            with profile() as stats:
+                OpticalTrain(elements) * states
+            stats['create JonesVectorArray']['calls']
+        """
+        self.stats = Stats()
+
+    def __enter__(self):
+        self._operations = {}
+        with _recorder.lock:
+            _recorder.sinks.append(self._operations)
+        self._cache_start = _cache_counts()
+        enable()
+        return self.stats
+
+    def __exit__(self, *exc_info):
+        disable()
+        with _recorder.lock:
+            _recorder.sinks = [operations for operations in _recorder.sinks if operations is not self._operations]
+        hits, misses = _cache_counts()
+        self.stats.operations = self._operations
+        self.stats.cache = {'hits': hits - self._cache_start[0], 'misses': misses - self._cache_start[1]}
@@ -0,0 +1,237 @@
+"""This module provides the coherent propagation through interferometers, e.g. Mach-Zehnder or Sagnac polarimeters, in
+which the light is split into several arms and recombined. An Interferometer is a directed graph whose edges are
+arms. Every arm holds the optical elements the light passes, a phase in degree, e.g. from its path length, and an
+amplitude, e.g. the transmission or reflection coefficient of a beam splitter. A node with several outgoing arms
+splits the light and a node with several incoming arms adds the fields coherently.
+
+The system matrix is the sum over all paths from the source to the sink of the product of the arm matrices along the
+path, each weighted with its amplitudes and phases. The path products are cached and only recomputed when an element
+changes, so changing a phase costs a weighted sum of a few 2x2 matrices. Phases may be arrays, e.g. a phase sweep,
+which are evaluated in one vectorized pass.
+
+Example::
+
+    mach_zehnder = Interferometer()
+    mach_zehnder.add_arm('upper 1', 'in', 'upper', amplitude=np.sqrt(0.5))
+    mach_zehnder.add_arm('upper 2', 'upper', 'out', [HalfWavePlate(10)], amplitude=np.sqrt(0.5))
+    mach_zehnder.add_arm('lower 1', 'in', 'lower', amplitude=1j * np.sqrt(0.5))
+    mach_zehnder.add_arm('lower 2', 'lower', 'out', amplitude=1j * np.sqrt(0.5))
+    mach_zehnder['upper 2'].phase = np.linspace(0, 360, 100)
+    mach_zehnder.evaluate(LinearHorizontal())  # one intensity per phase
+
+"""
+
+from __future__ import print_function
+from collections import OrderedDict
+from pyjones.opticalelements import *
+from pyjones.opticaltrain import OpticalTrain, _as_vectors, _as_element, _intensity, _stokes, _identity
+from pyjones.precision import complex_dtype
+
+
+class Arm(object):
+    __slots__ = ('start', 'end', 'train', 'phase', 'amplitude')
+
+    def __init__(self, start, end, elements=(), phase=0.0, amplitude=1.0):
+        """This represents an arm of an interferometer leading from one node to another
+
+        :param start: Node at which the arm begins
+        :param end: Node at which the arm ends
+        :param elements: JonesMatrix or JonesMatrixArray instances in the order in which the light passes them, their
+                         product is cached in an OpticalTrain
+        :param phase: Phase of the arm in degree, a scalar or an array of phases for a sweep
+        :param amplitude: Complex amplitude coefficient of the arm, e.g. 1j * np.sqrt(0.5) for the reflection at a
+                          lossless 50:50 beam splitter
+        """
+        self.start = start
+        self.end = end
+        self.train = OpticalTrain(elements)
+        self.phase = phase
+        self.amplitude = amplitude
+
+    def __repr__(self):
+        return 'Arm(%r, %r, %r)' % (self.start, self.end, list(self.train))
+
+    def set_path_length(self, length, wavelength):
+        """Sets the phase of the arm from its optical path length
+
+        :param length: Optical path length, a scalar or an array
+        :param wavelength: Wavelength in the same unit as the length
+        """
+        self.phase = 360.0 * np.asarray(length, dtype=float) / wavelength
+
+    @property
+    def matrix(self):
+        """Property which returns the cached product of the elements of the arm without phase and amplitude
+
+        :return: The matrix as array of shape (2, 2) or (N, 2, 2)
+        :rtype: np.ndarray
+        """
+        return self.train.matrix
+
+
+class Interferometer(object):
+    def __init__(self, source='in', sink='out'):
+        """This represents a network of arms between a source and a sink node through which the light propagates
+        coherently. The network must not contain loops, a Sagnac interferometer is two arms between the same nodes
+        with the elements in opposite order.
+
+        :param source: Node at which the light enters
+        :param sink: Node at which the light leaves
+        """
+        self.source = source
+        self.sink = sink
+        self._arms = OrderedDict()
+        self._paths = None
+        self._matrices = None
+        self._products = None
+
+    def __repr__(self):
+        return 'Interferometer(%d arms, %r -> %r)' % (len(self._arms), self.source, self.sink)
+
+    def __len__(self):
+        return len(self._arms)
+
+    def __iter__(self):
+        return iter(self._arms)
+
+    def __getitem__(self, name):
+        return self._arms[name]
+
+    def add_arm(self, name, start, end, elements=(), phase=0.0, amplitude=1.0):
+        """Adds an arm to the network, see Arm
+
+        :param name: Unique name of the arm
+        :param start: Node at which the arm begins
+        :param end: Node at which the arm ends
+        :param elements: JonesMatrix or JonesMatrixArray instances in the order in which the light passes them
+        :param phase: Phase of the arm in degree, a scalar or an array of phases for a sweep
+        :param amplitude: Complex amplitude coefficient of the arm
+        :return: The new arm
+        :rtype: Arm
+        """
+        if name in self._arms:
+            raise ValueError('An arm named %r exists already' % (name,))
+        arm = Arm(start, end, elements, phase, amplitude)
+        self._arms[name] = arm
+        self._paths = None
+        self._matrices = None
+        return arm
+
+    def remove_arm(self, name):
+        """Removes an arm from the network
+
+        :param name: Name of the arm
+        """
+        del self._arms[name]
+        self._paths = None
+        self._matrices = None
+
+    @property
+    def paths(self):
+        """Property which returns all paths from the source to the sink. Arms which are not on such a path are
+        ignored.
+
+        :return: One tuple of arm names per path in the order in which the light passes them
+        :rtype: list
+        """
+        if self._paths is None:
+            self._paths = self._find_paths()
+        return list(self._paths)
+
+    def _find_paths(self):
+        outgoing = {}
+        for name, arm in self._arms.items():
+            outgoing.setdefault(arm.start, []).append(name)
+        paths = []
+        # depth first search with the nodes of the current path to detect loops
+        stack = [(self.source, (), (self.source,))]
+        while stack:
+            node, path, nodes = stack.pop()
+            if node == self.sink:
+                paths.append(path)
+                continue
+            for name in reversed(outgoing.get(node, [])):
+                end = self._arms[name].end
+                if end in nodes:
+                    raise ValueError('The network contains a loop through node %r' % (end,))
+                stack.append((end, path + (name,), nodes + (end,)))
+        if not paths:
+            raise ValueError('No path leads from %r to %r' % (self.source, self.sink))
+        return paths
+
+    def _path_products(self):
+        """Returns the products of the arm matrices of all paths as one array, recomputed only if an arm changed"""
+        paths = self.paths
+        matrices = [arm.matrix for arm in self._arms.values()]
+        # the trains return the same array object as long as none of their elements changed
+        if self._matrices is None or any(new is not old for new, old in zip(matrices, self._matrices)):
+            products = []
+            for path in paths:
+                product = _identity()
+                for name in path:
+                    product = np.matmul(self._arms[name].matrix, product)
+                products.append(product)
+            self._products = np.array(np.broadcast_arrays(*products))
+            self._matrices = matrices
+        return self._products
+
+    def _path_factors(self):
+        factors = []
+        for path in self.paths:
+            arms = [self._arms[name] for name in path]
+            phase = sum(np.asarray(arm.phase, dtype=float) for arm in arms)
+            amplitude = np.prod([arm.amplitude for arm in arms])
+            factors.append(amplitude * np.exp(1j * np.radians(phase)))
+        return np.array(np.broadcast_arrays(*factors)).astype(complex_dtype(), copy=False)
+
+    @property
+    def matrix(self):
+        """Property which returns the system matrix, the coherent sum over all paths. Array phases and arms holding
+        JonesMatrixArray elements broadcast against each other.
+
+        :return: The system matrix as array of shape (2, 2) or (..., 2, 2) for arrays of phases
+        :rtype: np.ndarray
+        """
+        # the paths are moved behind the batch axes, so phases and matrices broadcast like in NumPy
+        products = np.moveaxis(self._path_products(), 0, -3)
+        factors = np.moveaxis(self._path_factors(), 0, -1)
+        return np.sum(factors[..., np.newaxis, np.newaxis] * products, axis=-3)
+
+    @property
+    def system(self):
+        """Property which returns the whole interferometer as a single optical element
+
+        :return: The system matrix
+        :rtype: JonesMatrix or JonesMatrixArray
+        """
+        return _as_element(self.matrix)
+
+    def __mul__(self, other):
+        """Applies the interferometer to a polarization or optical element using its system matrix
+
+        :param other: JonesMatrix, JonesMatrixArray, JonesVector or JonesVectorArray
+        :return: The same kind of objects as the multiplication of a JonesMatrix would return
+        """
+        return self.system * other
+
+    def evaluate(self, state, quantity='intensity'):
+        """Propagates one or many polarizations through the interferometer for all phases at once
+
+        :param state: JonesVector or JonesVectorArray of N states entering at the source
+        :param quantity: Either 'intensity', 'Stokes' or 'field' for the Jones vectors at the sink
+        :return: The output with the axes of the phases followed by the N states, e.g. an intensity of shape (P, N)
+                 for P phases, followed by an axis of length 4 for Stokes or 2 for fields
+        :rtype: np.ndarray
+        """
+        if quantity not in ('intensity', 'Stokes', 'field'):
+            raise ValueError("Quantity must be either 'intensity', 'Stokes' or 'field'")
+        vectors = _as_vectors(state)
+        matrix = self.matrix
+        if vectors.ndim == 2:
+            matrix = matrix[..., np.newaxis, :, :]
+        fields = np.matmul(matrix, vectors[..., np.newaxis])[..., 0]
+        if quantity == 'intensity':
+            return _intensity(fields)
+        elif quantity == 'Stokes':
+            return _stokes(fields)
+        return fields
@@ -0,0 +1,212 @@
+"""This module provides the inversion of polarimetric measurements for many independent datasets at once, e.g. the
+calibration of hundreds of setups. Two stages are available:
+
+* stokes_from_intensities: the Stokes vector entering a set of known analyzers (e.g. a rotating quarter wave plate in
+  front of a polarizer) is a linear function of the measured intensities and is recovered by linear least squares
+* fit_parameters: unknown element parameters, e.g. waveplate angles and retardances, and optionally the input
+  polarization are refined by a batched Levenberg-Marquardt fit with analytic derivatives
+
+Both evaluate the forward model vectorized over all datasets and measurements and return their results as arrays.
+
+Example::
+
+    analyzers = PolarizerVertical() * QuarterWavePlate(np.linspace(0, 180, 36, endpoint=False))
+    result = fit_parameters([(PhaseRetarder, 'angle', 'eta')], analyzers, intensities, {'angle': 10.0, 'eta': 90.0},
+                            state=CircularRight())
+    result.parameters['angle']  # one fitted angle per dataset
+
+"""
+
+from __future__ import print_function
+from pyjones.opticalelements import *
+from pyjones.opticalelements import _as_parameters
+from pyjones.opticaltrain import _system_matrices
+from pyjones.mueller import MuellerMatrix, StokesVector
+from pyjones.sweep import Template
+
+
+def _analyzer_matrices(analyzers):
+    matrices = _system_matrices(analyzers, 'Analyzers')
+    return matrices if matrices.ndim == 3 else matrices[np.newaxis]
+
+
+def stokes_from_intensities(analyzers, intensities):
+    """Recovers the Stokes vectors entering a set of analyzers from the intensities measured behind them. The
+    intensity behind analyzer k is the first row of its Mueller matrix times the Stokes vector, so all datasets are
+    solved at once with the pseudo inverse of the K x 4 measurement matrix. If the analyzers do not determine all
+    Stokes parameters, e.g. a rotating polarizer without retarder gives no S3, the solution with the smallest norm is
+    returned.
+
+    :param analyzers: The K analyzer settings as JonesMatrixArray, e.g. QuarterWavePlate(angles) followed by a
+                      polarizer as PolarizerVertical() * QuarterWavePlate(angles), or an OpticalTrain of them
+    :param intensities: Measured intensities of shape (K,) or (B, K) for B datasets
+    :return: The recovered Stokes vectors with shape (4,) or (B, 4)
+    :rtype: StokesVector
+    """
+    rows = MuellerMatrix.from_jones(JonesMatrixArray._from_array(_analyzer_matrices(analyzers))).matrix[:, 0, :]
+    intensities = np.asarray(intensities, dtype=float)
+    if intensities.shape[-1] != rows.shape[0]:
+        raise ValueError('Expected %d intensities per dataset' % rows.shape[0])
+    return StokesVector(np.dot(intensities, np.linalg.pinv(rows).T))
+
+
+class FitResult(object):
+    def __init__(self, parameters, state, cost, iterations, converged):
+        """This holds the results of fit_parameters for all datasets
+
+        :param parameters: Mapping of parameter names to arrays of shape (B,) in degree
+        :param state: The fitted input polarizations as JonesVectorArray of length B, or None
+        :param cost: Sum of squared residuals of every dataset, shape (B,)
+        :param iterations: Number of iterations performed
+        :param converged: Whether the fit of every dataset converged, shape (B,)
+        """
+        self.parameters = parameters
+        self.state = state
+        self.cost = cost
+        self.iterations = iterations
+        self.converged = converged
+
+    def __repr__(self):
+        return 'FitResult(%d datasets, %d converged, %d iterations)' % (len(self.cost), np.sum(self.converged),
+                                                                        self.iterations)
+
+
+def _element_matrices(cls, values):
+    """Returns the matrices and the derivatives per degree of an element for parameter arrays of shape (B,)"""
+    if not values:
+        element = cls()
+        return element.matrix, []
+    radians = _as_parameters(*values)
+    matrices = cls._matrix_function(*radians)
+    derivatives = [derivative * np.pi / 180.0 for derivative in cls._derivative_function(*radians)]
+    return matrices, derivatives
+
+
+def _state_vectors(state_values):
+    amplitude_x, amplitude_y, delta = state_values
+    phase = np.exp(1j * np.radians(delta))
+    vectors = np.stack([amplitude_x + 0j, amplitude_y * phase], axis=-1)
+    zero = np.zeros_like(vectors[:, 0])
+    derivatives = [np.stack([np.ones_like(zero), zero], axis=-1),
+                   np.stack([zero, phase], axis=-1),
+                   np.stack([zero, 1j * np.pi / 180.0 * amplitude_y * phase], axis=-1)]
+    return vectors, derivatives
+
+
+def _apply(matrices, vectors):
+    return np.matmul(matrices, vectors[..., np.newaxis])[..., 0]
+
+
+def _model(template, names, values, vectors, state_derivatives, analyzers):
+    """Returns the intensities (B, K) and their Jacobian (B, K, P) of the forward model"""
+    count = len(vectors)
+    matrices = []
+    derivatives = []
+    for element in template.elements:
+        arguments = [values[names.index(argument)] if isinstance(argument, str) else np.full(count, argument)
+                     for argument in element[1:]]
+        element_matrices, element_derivatives = _element_matrices(element[0], arguments)
+        matrices.append(element_matrices)
+        derivatives.append([(names.index(argument), derivative) for argument, derivative
+                            in zip(element[1:], element_derivatives) if isinstance(argument, str)])
+    fields = [vectors]
+    for element_matrices in matrices:
+        fields.append(_apply(element_matrices, fields[-1]))
+    behind = [np.eye(2)] * len(matrices)
+    for index in range(len(matrices) - 1, 0, -1):
+        behind[index - 1] = np.matmul(behind[index], matrices[index])
+    total = np.matmul(behind[0], matrices[0]) if matrices else np.eye(2)
+    output = np.einsum('kij,bj->bki', analyzers, fields[-1])
+    intensities = np.sum(output.real ** 2 + output.imag ** 2, axis=-1)
+    jacobian = np.zeros(intensities.shape + (len(names) + len(state_derivatives),))
+    d_fields = [(position, _apply(behind[index], _apply(derivative, fields[index])))
+                for index, element_derivatives in enumerate(derivatives)
+                for position, derivative in element_derivatives]
+    d_fields += [(len(names) + position, _apply(total, derivative))
+                 for position, derivative in enumerate(state_derivatives)]
+    for position, d_field in d_fields:
+        d_output = np.einsum('kij,bj->bki', analyzers, d_field)
+        jacobian[..., position] += 2 * np.sum(np.real(np.conjugate(output) * d_output), axis=-1)
+    return intensities, jacobian
+
+
+def fit_parameters(template, analyzers, intensities, initial, state=None, fit_state=False, max_iterations=100,
+                   tolerance=1e-12):
+    """Fits element parameters and optionally the input polarization of B independent datasets at once with a
+    batched Levenberg-Marquardt algorithm. The model of measurement k of dataset b is the intensity
+    |analyzer_k * template(parameters_b) * state_b|^2. The analyzers must determine the parameters, e.g. a rotating
+    polarizer alone does not measure S3 and can not tell a retardance eta from 180 - eta.
+
+    :param template: A Template or a list of tuples (element class, parameter, ...) of the elements in front of the
+                     analyzers. A string parameter is a free parameter of that name, any other value is kept fixed.
+                     The element classes must be parametrized elements or elements without parameters.
+    :param analyzers: The K analyzer settings as JonesMatrixArray, e.g. Polarizer(angles)
+    :param intensities: Measured intensities of shape (B, K)
+    :param initial: Mapping of parameter names to start values in degree, scalars or arrays of shape (B,)
+    :param state: JonesVector or JonesVectorArray of length B entering the template. It is the start value if
+                  fit_state is True and defaults to LinearHorizontal.
+    :param fit_state: If True the input polarization including its intensity is fitted as well
+    :param max_iterations: Maximum number of iterations
+    :param tolerance: The fit of a dataset has converged when its cost changes by less than this relative amount
+    :return: The fitted parameters
+    :rtype: FitResult
+    """
+    if not isinstance(template, Template):
+        template = Template(template)
+    analyzers = _analyzer_matrices(analyzers)
+    intensities = np.asarray(intensities, dtype=float)
+    if intensities.ndim != 2 or intensities.shape[1] != len(analyzers):
+        raise ValueError('Intensities must have the shape (B, %d)' % len(analyzers))
+    count = len(intensities)
+    names = template.parameters
+    if set(names) != set(initial):
+        raise ValueError('Start values are required for exactly the parameters %s' % names)
+    state = LinearHorizontal() if state is None else state
+    vectors = np.broadcast_to(state.polarization_vectors if isinstance(state, JonesVectorArray)
+                              else state.polarization_vector, (count, 2))
+    values = np.array([np.broadcast_to(np.asarray(initial[name], dtype=float), (count,)) for name in names] +
+                      ([np.abs(vectors[:, 0]), np.abs(vectors[:, 1]),
+                        np.degrees(np.angle(vectors[:, 1]) - np.angle(vectors[:, 0]))] if fit_state else []))
+    values = values.reshape(-1, count)
+
+    def evaluate(values):
+        if fit_state:
+            fields, state_derivatives = _state_vectors(values[len(names):])
+        else:
+            fields, state_derivatives = vectors, []
+        model, jacobian = _model(template, names, values[:len(names)], fields, state_derivatives, analyzers)
+        residuals = model - intensities
+        return residuals, jacobian, np.sum(residuals ** 2, axis=-1)
+
+    residuals, jacobian, cost = evaluate(values)
+    damping = np.full(count, 1e-3)
+    # a cost at the level of the rounding errors of the intensities can not be improved any further
+    floor = tolerance ** 2 * np.sum(intensities ** 2, axis=-1)
+    converged = np.zeros(count, dtype=bool)
+    iteration = 0
+    for iteration in range(1, max_iterations + 1):
+        normal = np.einsum('bkp,bkq->bpq', jacobian, jacobian)
+        gradient = np.einsum('bkp,bk->bp', jacobian, residuals)
+        diagonal = np.einsum('bpp->bp', normal)
+        scaled = normal + damping[:, np.newaxis, np.newaxis] * (
+            np.eye(len(values))[np.newaxis] * (diagonal[:, :, np.newaxis] + 1e-12))
+        step = -np.linalg.solve(scaled, gradient[..., np.newaxis])[..., 0]
+        step[converged] = 0.0
+        trial = values + step.T
+        trial_residuals, trial_jacobian, trial_cost = evaluate(trial)
+        improved = (trial_cost < cost) & ~converged
+        converged |= improved & (cost - trial_cost <= tolerance * np.maximum(cost, 1e-300))
+        converged |= cost <= floor
+        values = np.where(improved, trial, values)
+        residuals = np.where(improved[:, np.newaxis], trial_residuals, residuals)
+        jacobian = np.where(improved[:, np.newaxis, np.newaxis], trial_jacobian, jacobian)
+        cost = np.where(improved, trial_cost, cost)
+        damping = np.where(improved, damping / 10.0, damping * 10.0)
+        converged |= damping > 1e12
+        if np.all(converged):
+            break
+    parameters = dict((name, values[index]) for index, name in enumerate(names))
+    fitted_state = None
+    if fit_state:
+        fitted_state = JonesVectorArray(_state_vectors(values[len(names):])[0], normalize=False)
+    return FitResult(parameters, fitted_state, cost, iteration, converged)
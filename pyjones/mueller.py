@@ -0,0 +1,189 @@
+"""This module provides the Mueller calculus for partially polarized and depolarized light. The basic classes are
+StokesVector, which describes the polarization by the four Stokes parameters, and MuellerMatrix, which describes an
+optical element by a real 4x4 matrix. Both can hold a single object or a batch of N objects, in which case the
+arrays have the shapes (N, 4) and (N, 4, 4) and all operations broadcast over the first axis.
+
+Every JonesVector and JonesMatrix has an exact Mueller counterpart obtained with StokesVector.from_jones and
+MuellerMatrix.from_jones. Predefined Mueller elements and polarizations are:
+
+* Depolarizer(degree)
+* PartialDepolarizer(d1, d2, d3)
+* Unpolarized(intensity)
+
+"""
+
+from __future__ import print_function
+from pyjones.opticalelements import *
+from pyjones.opticaltrain import OpticalTrain, _system_matrices
+from pyjones.precision import real_dtype
+
+# maps the coherency vector (Ex Ex*, Ex Ey*, Ey Ex*, Ey Ey*) onto the Stokes parameters as defined by JonesVector.Stokes
+_COHERENCY_TO_STOKES = np.array([[1, 0, 0, 1],
+                                 [1, 0, 0, -1],
+                                 [0, 1, 1, 0],
+                                 [0, 1j, -1j, 0]])
+_STOKES_TO_COHERENCY = np.linalg.inv(_COHERENCY_TO_STOKES)
+
+
+class StokesVector(object):
+    __slots__ = ('stokes',)
+
+    def __init__(self, stokes):
+        """This represents the polarization of light by its Stokes parameters (S0, S1, S2, S3). In contrast to a
+        JonesVector it can describe partially polarized and unpolarized light.
+
+        :param stokes: Four Stokes parameters or an (N, 4) array of Stokes parameters, stored with the real dtype of
+                       the precision policy of pyjones.precision
+        """
+        if not hasattr(stokes, '__iter__'):
+            raise ValueError('Parameter must be an array of shape (4,) or (N, 4)')
+        stokes = np.array(stokes, dtype=real_dtype())
+        if stokes.ndim not in (1, 2) or stokes.shape[-1] != 4:
+            raise ValueError('Shape of array must be (4,) or (N, 4)')
+        self.stokes = stokes
+
+    @classmethod
+    def from_jones(cls, state, degree_of_polarization=1.0):
+        """Converts a Jones vector into Stokes parameters, optionally mixing in an unpolarized part
+
+        :param state: JonesVector or JonesVectorArray
+        :param degree_of_polarization: Fraction of the intensity which is polarized, either a scalar or one value
+                                       per state
+        :return: StokesVector
+        """
+        if isinstance(state, JonesVector):
+            stokes = np.array(state.Stokes, dtype=real_dtype())
+        elif isinstance(state, JonesVectorArray):
+            stokes = state.Stokes
+        else:
+            raise TypeError('State must be JonesVector or JonesVectorArray')
+        stokes[..., 1:] *= np.asarray(degree_of_polarization, dtype=float)[..., np.newaxis]
+        return cls(stokes)
+
+    def __repr__(self):
+        return 'StokesVector(%s)' % np.array2string(self.stokes, separator=', ')
+
+    def __len__(self):
+        if self.stokes.ndim == 1:
+            raise TypeError('A single StokesVector has no length')
+        return self.stokes.shape[0]
+
+    def __getitem__(self, item):
+        if self.stokes.ndim == 1:
+            return self.stokes[item]
+        return StokesVector(self.stokes[item])
+
+    @property
+    def intensity(self):
+        """Property which returns the intensity S0
+
+        :rtype: float or np.ndarray of shape (N,)
+        """
+        return self.stokes[..., 0]
+
+    @property
+    def degree_of_polarization(self):
+        """Property which returns the degree of polarization sqrt(S1^2 + S2^2 + S3^2) / S0, zero without intensity
+
+        :rtype: float or np.ndarray of shape (N,)
+        """
+        polarized = np.sqrt(np.sum(self.stokes[..., 1:] ** 2, axis=-1))
+        intensity = self.stokes[..., 0]
+        return np.where(intensity > 0, polarized / np.where(intensity > 0, intensity, 1.0), 0.0)
+
+
+class MuellerMatrix(object):
+    __slots__ = ('matrix',)
+
+    def __init__(self, matrix):
+        """This represents a polarization influencing optical element in the Mueller calculus, which in contrast to
+        the Jones calculus includes depolarizing elements.
+
+        :param matrix: A real 4x4 matrix or an (N, 4, 4) stack of matrices
+        """
+        if not hasattr(matrix, '__iter__'):
+            raise ValueError('Parameter must be an array of shape (4, 4) or (N, 4, 4)')
+        matrix = np.array(matrix, dtype=real_dtype())
+        if matrix.ndim not in (2, 3) or matrix.shape[-2:] != (4, 4):
+            raise ValueError('Shape of array must be (4, 4) or (N, 4, 4)')
+        self.matrix = matrix
+
+    @classmethod
+    def from_jones(cls, element):
+        """Converts a Jones matrix into the equivalent Mueller matrix M = A (J x J*) A^-1
+
+        :param element: JonesMatrix, JonesMatrixArray or OpticalTrain
+        :return: MuellerMatrix with shape (4, 4) or (N, 4, 4)
+        """
+        jones = _system_matrices(element, 'Element')
+        product = np.einsum('...ij,...kl->...ikjl', jones, np.conjugate(jones))
+        product = product.reshape(jones.shape[:-2] + (4, 4))
+        return cls(np.real(np.matmul(np.matmul(_COHERENCY_TO_STOKES, product), _STOKES_TO_COHERENCY)))
+
+    def __repr__(self):
+        return 'MuellerMatrix(%s)' % np.array2string(self.matrix, separator=', ')
+
+    def __len__(self):
+        if self.matrix.ndim == 2:
+            raise TypeError('A single MuellerMatrix has no length')
+        return self.matrix.shape[0]
+
+    def __getitem__(self, item):
+        if self.matrix.ndim == 2:
+            raise TypeError('A single MuellerMatrix can not be indexed')
+        return MuellerMatrix(self.matrix[item])
+
+    def __mul__(self, other):
+        """The multiplication operator is overloaded to allow for multiplication with another Mueller matrix or a
+        Stokes vector. Jones matrices, optical trains and Jones vectors are converted to their Mueller counterparts
+        first. Batches broadcast against each other.
+
+        :param other: MuellerMatrix, StokesVector, JonesMatrix(Array), OpticalTrain or JonesVector(Array)
+        :return: MuellerMatrix or StokesVector
+        """
+        if isinstance(other, (JonesVector, JonesVectorArray)):
+            other = StokesVector.from_jones(other)
+        elif isinstance(other, (JonesMatrix, JonesMatrixArray, OpticalTrain)):
+            other = MuellerMatrix.from_jones(other)
+        if isinstance(other, StokesVector):
+            return StokesVector(np.matmul(self.matrix, other.stokes[..., np.newaxis])[..., 0])
+        elif isinstance(other, MuellerMatrix):
+            return MuellerMatrix(np.matmul(self.matrix, other.matrix))
+        else:
+            raise TypeError('Multiplication does only work for MuellerMatrix, StokesVector or Jones objects')
+
+
+class Depolarizer(MuellerMatrix):
+    __slots__ = ()
+
+    def __init__(self, degree):
+        """This is a subclass of MuellerMatrix corresponding to an isotropic depolarizer
+
+        :param degree: Fraction of the polarization which is preserved, 0 gives unpolarized light
+        """
+        super(Depolarizer, self).__init__(np.diag([1.0, degree, degree, degree]))
+
+
+class PartialDepolarizer(MuellerMatrix):
+    __slots__ = ()
+
+    def __init__(self, d1, d2, d3):
+        """This is a subclass of MuellerMatrix corresponding to a diagonal depolarizer which preserves the Stokes
+        parameters S1, S2 and S3 by different fractions
+
+        :param d1: Fraction of S1 which is preserved
+        :param d2: Fraction of S2 which is preserved
+        :param d3: Fraction of S3 which is preserved
+        """
+        super(PartialDepolarizer, self).__init__(np.diag([1.0, d1, d2, d3]))
+
+
+class Unpolarized(StokesVector):
+    __slots__ = ()
+
+    def __init__(self, intensity=1.0):
+        """This is a subclass of StokesVector corresponding to unpolarized light
+
+        :param intensity: Intensity of the light
+        """
+        super(Unpolarized, self).__init__([intensity, 0.0, 0.0, 0.0])
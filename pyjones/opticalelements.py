@@ -6,19 +6,225 @@ JonesMatrix from which all predefined optical elements inherit from. Predefined
 * Polarizer(angle)
 * QuarterWavePlate(angle)
 * HalfWavePlate(angle)
+* PhaseRetarder(angle, eta, phase)
+* Rotator(angle)
+
+The parametrized elements also accept arrays of parameters, e.g. Polarizer(angles). In that case a JonesMatrixArray
+holding one (2, 2) matrix per parameter set is returned, so that whole parameter sweeps are a single NumPy call.
+
+If the same elements are constructed over and over again, an LRU cache for their matrices can be switched on with
+enable_matrix_cache(). Cached matrices are shared between elements and therefore read-only.
+
+Products of structurally simple elements are reduced to closed forms instead of being multiplied numerically, e.g.
+two half wave plates give a Rotator and coaxial retarders add their retardances. simplify() applies these rules to a
+whole sequence of elements.
+
+PolarizerHorizontal and PolarizerVertical are immutable singletons, every call returns the same frozen instance. Any
+element can be frozen with freeze(); frozen elements compare by their matrices rounded to a grid and are hashable.
 
 """
 
 from __future__ import print_function
+from collections import OrderedDict, namedtuple
+import threading
+import weakref
 from pyjones.polarizations import *
+from pyjones.polarizations import _intern, _value_key
+from pyjones.precision import complex_dtype, real_dtype
+
+
+def _as_parameters(*parameters):
+    """Broadcasts the given element parameters against each other and returns them in radians as flat arrays"""
+    return [np.radians(parameter).ravel() for parameter in np.broadcast_arrays(*[np.asarray(parameter, dtype=float)
+                                                                               for parameter in parameters])]
+
+
+def _is_array_parameter(*parameters):
+    return any(np.ndim(parameter) > 0 for parameter in parameters)
+
+
+def _polarizer_matrix(angle):
+    cos = np.cos(angle)
+    sin = np.sin(angle)
+    return np.moveaxis(np.array([[cos ** 2, sin * cos],
+                                 [sin * cos, sin ** 2]]), (0, 1), (-2, -1))
+
+
+def _quarter_wave_plate_matrix(angle):
+    cos = np.cos(angle)
+    sin = np.sin(angle)
+    matrix = np.array([[cos ** 2 + 1.0j * sin ** 2, (1.0 - 1.0j) * sin * cos],
+                       [(1.0 - 1.0j) * sin * cos, sin ** 2 + 1.0j * cos ** 2]], dtype=complex)
+    return np.exp(1.0j * np.pi / 4.0) * np.moveaxis(matrix, (0, 1), (-2, -1))
+
+
+def _half_wave_plate_matrix(angle):
+    cos = np.cos(2 * angle)
+    sin = np.sin(2 * angle)
+    return np.moveaxis(np.array([[cos, sin], [sin, -cos]]), (0, 1), (-2, -1))
+
+
+def _phase_retarder_matrix(angle, eta, phase=0.0):
+    cos = np.cos(angle)
+    sin = np.sin(angle)
+    retardance = np.exp(1j * eta)
+    matrix = np.array([[cos ** 2 + retardance * sin ** 2, (1.0 - retardance) * sin * cos],
+                       [(1.0 - retardance) * sin * cos, sin ** 2 + retardance * cos ** 2]], dtype=complex)
+    return (np.exp(1.0j * (phase - eta / 2.0))[..., np.newaxis, np.newaxis] *
+            np.moveaxis(matrix, (0, 1), (-2, -1)))
+
+
+def _rotator_matrix(angle):
+    cos = np.cos(angle)
+    sin = np.sin(angle)
+    return np.moveaxis(np.array([[cos, -sin], [sin, cos]]), (0, 1), (-2, -1))
+
+
+def _stack(entries):
+    """Turns a nested 2x2 list of (broadcastable) arrays into an array of shape (..., 2, 2)"""
+    entries = np.broadcast_arrays(*[np.asarray(entry, dtype=complex) for row in entries for entry in row])
+    return np.moveaxis(np.array(entries).reshape((2, 2) + entries[0].shape), (0, 1), (-2, -1))
+
+
+def _rotation_derivative(angle):
+    """Derivative of the angle dependent part [[c^2, sc], [sc, s^2]] with respect to the angle"""
+    cos = np.cos(2 * angle)
+    sin = np.sin(2 * angle)
+    return _stack([[-sin, cos], [cos, sin]])
+
+
+def _polarizer_derivatives(angle):
+    return _rotation_derivative(angle),
+
+
+def _quarter_wave_plate_derivatives(angle):
+    return np.exp(1.0j * np.pi / 4.0) * (1.0 - 1.0j) * _rotation_derivative(angle),
+
+
+def _half_wave_plate_derivatives(angle):
+    return 2 * _rotation_derivative(angle),
+
+
+def _phase_retarder_derivatives(angle, eta, phase=0.0):
+    cos = np.cos(angle)
+    sin = np.sin(angle)
+    prefactor = np.exp(1.0j * (phase - eta / 2.0))[..., np.newaxis, np.newaxis]
+    retardance = np.exp(1j * eta)[..., np.newaxis, np.newaxis]
+    matrix = _phase_retarder_matrix(angle, eta, phase)
+    d_angle = prefactor * (1.0 - retardance) * _rotation_derivative(angle)
+    d_eta = (- 0.5j * matrix +
+             1j * prefactor * retardance * _stack([[sin ** 2, - sin * cos], [- sin * cos, cos ** 2]]))
+    return d_angle, d_eta, 1j * matrix
+
+
+def _rotator_derivatives(angle):
+    cos = np.cos(angle)
+    sin = np.sin(angle)
+    return _stack([[-sin, -cos], [cos, -sin]]),
+
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class _MatrixCache(object):
+    def __init__(self):
+        self.enabled = False
+        self.maxsize = 0
+        self.hits = 0
+        self.misses = 0
+        self._matrices = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, function, *values):
+        with self._lock:
+            matrix = self._matrices.get(key)
+            if matrix is not None:
+                self._matrices.move_to_end(key)
+                self.hits += 1
+                return matrix
+            self.misses += 1
+        matrix = function(*values)
+        matrix.setflags(write=False)
+        with self._lock:
+            self._matrices[key] = matrix
+            self._shrink()
+        return matrix
+
+    def _shrink(self):
+        while len(self._matrices) > self.maxsize:
+            self._matrices.popitem(last=False)
+
+    def resize(self, maxsize):
+        with self._lock:
+            self.maxsize = maxsize
+            self._shrink()
+
+    def clear(self):
+        with self._lock:
+            self._matrices.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_matrix_cache = _MatrixCache()
+
+
+def enable_matrix_cache(maxsize=1024):
+    """Switches on the LRU cache for the matrices of parametrized elements. Elements constructed with the same type
+    and parameters afterwards share one read-only matrix instead of recomputing it.
+
+    :param maxsize: Maximum number of cached matrices
+    """
+    if maxsize < 0:
+        raise ValueError('maxsize must not be negative')
+    _matrix_cache.resize(maxsize)
+    _matrix_cache.enabled = True
+
+
+def disable_matrix_cache():
+    """Switches off the matrix cache and drops all cached matrices"""
+    _matrix_cache.enabled = False
+    _matrix_cache.clear()
+
+
+def resize_matrix_cache(maxsize):
+    """Changes the maximum size of the matrix cache, evicting the least recently used matrices if necessary
+
+    :param maxsize: Maximum number of cached matrices
+    """
+    if maxsize < 0:
+        raise ValueError('maxsize must not be negative')
+    _matrix_cache.resize(maxsize)
+
+
+def clear_matrix_cache():
+    """Drops all cached matrices and resets the hit and miss statistics"""
+    _matrix_cache.clear()
+
+
+def matrix_cache_info():
+    """Returns the statistics of the matrix cache
+
+    :return: Number of hits and misses, the maximum and the current size of the cache
+    :rtype: CacheInfo
+    """
+    return CacheInfo(_matrix_cache.hits, _matrix_cache.misses, _matrix_cache.maxsize, len(_matrix_cache._matrices))
+
+
+def _apply_to_vectors(matrices, vectors):
+    """Multiplies a (N, 2, 2) or (2, 2) matrix stack with a (N, 2) or (2,) vector stack with broadcasting"""
+    return np.matmul(matrices, vectors[..., np.newaxis])[..., 0]
 
 
 class JonesMatrix(object):
+    __slots__ = ('matrix', '_version', '_key')
+    parameters = ()
+
     def __init__(self, matrix):
         """This is the baseclass which describes a polarization influencing optical element.
 
-        :param matrix: A 2x2 matrix either of type np.matrix or a list of two two-element lists describing
-                       the effect of that optical element to the polarization state of passing light.
+        :param matrix: A 2x2 matrix either of type np.ndarray, np.matrix or a list of two two-element lists
+                       describing the effect of that optical element to the polarization state of passing light.
         """
         if hasattr(matrix, '__iter__'):
             np_not_right_shape = True
@@ -27,97 +233,544 @@ class JonesMatrix(object):
             if (len(matrix) != 2 or len(matrix[0]) != 2 or len(matrix[1]) != 2) and np_not_right_shape:
                 raise ValueError('Shape of array/matrix must be 2x2')
             else:
-                self.matrix = np.matrix(matrix).astype(complex)
+                self.matrix = np.array(matrix, dtype=complex_dtype())
+                if self.matrix.shape != (2, 2):
+                    raise ValueError('Shape of array/matrix must be 2x2')
         else:
             raise ValueError('Parameter must be either 2x2 array or numpy.matrix')
+        self._version = 0
+
+    def _structure(self):
+        """Returns a description (kind, parameters...) of the element used for closed form products or None"""
+        return None
+
+    @classmethod
+    def _from_array(cls, matrix):
+        """Trusted constructor for internal results which skips the input validation
+
+        :param matrix: A complex np.ndarray of shape (2, 2) which is taken over without copying
+        """
+        self = object.__new__(cls)
+        self.matrix = matrix
+        self._version = 0
+        return self
 
     def __repr__(self):
         return 'JonesMatrix([[%s, %s], [%s, %s]])' % (self.matrix[0, 0], self.matrix[0, 1], self.matrix[1, 0],
                                                       self.matrix[1, 1])
 
+    def __eq__(self, other):
+        if isinstance(other, JonesMatrix) and self.frozen and other.frozen:
+            return self._key == other._key
+        return NotImplemented
+
+    def __hash__(self):
+        # mutable elements keep the identity semantics of object
+        return hash(self._key) if self.frozen else object.__hash__(self)
+
+    def __setstate__(self, state):
+        # copies and unpickled objects of frozen values get read-only arrays again, subclasses without __slots__
+        # keep their instance attributes
+        if state[0] is not None:
+            self.__dict__.update(state[0])
+        for name, value in (state[1] or {}).items():
+            setattr(self, name, value)
+        if self.frozen:
+            self._freeze()
+
+    @property
+    def frozen(self):
+        """Property which returns whether the element is immutable, see freeze
+
+        :rtype: bool
+        """
+        return getattr(self, '_key', None) is not None
+
+    def _freeze(self):
+        self.matrix.setflags(write=False)
+        self._key = ('matrix',) + _value_key(self.matrix)
+        return self
+
+    def _copy(self):
+        copy = object.__new__(type(self))
+        copy.matrix = self.matrix.copy()
+        copy._version = self._version
+        return copy
+
+    def freeze(self):
+        """Returns an immutable copy of the element whose matrix is read-only and whose parameters can not be set.
+        Frozen elements are equal if the real and imaginary parts of their matrix entries round to the same multiples
+        of _HASH_TOLERANCE, independent of their type, and they are hashable, so e.g. a tuple of frozen elements can be
+        the key of a cache. As for JonesVector.freeze, entries on different sides of a rounding boundary compare
+        unequal however close they are.
+
+        :return: The frozen element, or the element itself if it is frozen already
+        :rtype: JonesMatrix
+        """
+        if self.frozen:
+            return self
+        return self._copy()._freeze()
+
     def __mul__(self, other):
         """The multiplication operator is overloaded to allow for multiplication of two Jones matrices as well as
-        multiplication with a Jones Vector
+        multiplication with a Jones Vector. If both matrices are structurally simple elements whose product has a
+        closed form, e.g. two coaxial retarders, the closed form element is returned.
 
         :param other: JonesMatrix or JonesVector with which the current instance is multiplied
         :return: JonesMatrix or JonesVector
         """
         if isinstance(other, JonesVector):
-            resulting_polarisation = self.matrix * other.polarization_vector.T
-            return JonesVector([resulting_polarisation[0, 0], resulting_polarisation[1, 0]], normalize=False)
+            resulting_polarisation = np.dot(other.polarization_vector, self.matrix.T)
+            return JonesVector._from_array(resulting_polarisation, normal_form=True)
         elif isinstance(other, JonesMatrix):
-            return JonesMatrix(self.matrix * other.matrix)
+            reduced = _closed_form_product(self, other)
+            if reduced is not None:
+                return reduced
+            return JonesMatrix._from_array(np.dot(self.matrix, other.matrix))
+        elif isinstance(other, JonesVectorArray):
+            return JonesVectorArray._from_array(_apply_to_vectors(self.matrix, other.polarization_vectors),
+                                                normal_form=True)
+        elif isinstance(other, JonesMatrixArray):
+            return JonesMatrixArray._from_array(np.matmul(self.matrix, other.matrices))
         else:
-            raise TypeError('Multiplication does only work for JonesMatrix or JonesVector')
+            raise TypeError('Multiplication does only work for JonesMatrix, JonesVector or their array variants')
+
+
+class JonesMatrixArray(object):
+    __slots__ = ('matrices',)
+
+    def __init__(self, matrices, dtype=None):
+        """This represents a stack of Jones matrices stored as a single contiguous (N, 2, 2) complex array. It is
+        the result of parametrized optical elements constructed with arrays of parameters, e.g. Polarizer(angles).
 
+        :param matrices: An (N, 2, 2) array-like of complex numbers or an iterable of JonesMatrix instances
+        :param dtype: Dtype of the storage, defaults to the complex dtype of the precision policy of
+                      pyjones.precision
+        """
+        if not hasattr(matrices, '__iter__'):
+            raise ValueError('Parameter must be an (N, 2, 2) array or an iterable of JonesMatrix')
+        if not isinstance(matrices, np.ndarray):
+            matrices = [m.matrix if isinstance(m, JonesMatrix) else m for m in matrices]
+        matrices = np.array(matrices, dtype=dtype or complex_dtype())
+        if matrices.ndim != 3 or matrices.shape[1:] != (2, 2):
+            raise ValueError('Shape of array must be (N, 2, 2)')
+        self.matrices = np.ascontiguousarray(matrices)
+
+    @classmethod
+    def _from_array(cls, matrices):
+        """Trusted constructor for internal results which skips the input validation and keeps the dtype
+
+        :param matrices: An np.ndarray of shape (N, 2, 2) which is taken over without copying
+        """
+        self = object.__new__(cls)
+        self.matrices = matrices
+        return self
+
+    def __repr__(self):
+        return 'JonesMatrixArray(%s)' % np.array2string(self.matrices, separator=', ')
+
+    def __len__(self):
+        return self.matrices.shape[0]
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, np.integer)):
+            return JonesMatrix._from_array(self.matrices[item].copy())
+        elif isinstance(item, (slice, list, np.ndarray)):
+            return JonesMatrixArray._from_array(self.matrices[item])
+        else:
+            raise TypeError('Index needs to be an integer, slice or index array')
+
+    def __mul__(self, other):
+        """The multiplication operator broadcasts over the stack. A stack of length N can be multiplied with a
+        single JonesMatrix or JonesVector, or with a JonesMatrixArray or JonesVectorArray of length N or 1.
+
+        :param other: JonesMatrix, JonesMatrixArray, JonesVector or JonesVectorArray
+        :return: JonesMatrixArray or JonesVectorArray
+        """
+        if isinstance(other, JonesVector):
+            return JonesVectorArray._from_array(_apply_to_vectors(self.matrices, other.polarization_vector[0]),
+                                                normal_form=True)
+        elif isinstance(other, JonesVectorArray):
+            return JonesVectorArray._from_array(_apply_to_vectors(self.matrices, other.polarization_vectors),
+                                                normal_form=True)
+        elif isinstance(other, JonesMatrix):
+            return JonesMatrixArray._from_array(np.matmul(self.matrices, other.matrix))
+        elif isinstance(other, JonesMatrixArray):
+            return JonesMatrixArray._from_array(np.matmul(self.matrices, other.matrices))
+        else:
+            raise TypeError('Multiplication does only work for JonesMatrix, JonesVector or their array variants')
+
+
+def _parameter(name):
+    """Creates a property for a parameter of a ParametrizedJonesMatrix which re-evaluates the matrix when set"""
+    def getter(self):
+        return self._values[self._arguments().index(name)]
+
+    def setter(self, value):
+        self.set_parameters(**{name: value})
+
+    return property(getter, setter, doc='Parameter %s in degree, setting it re-evaluates the matrix' % name)
+
+
+class ParametrizedJonesMatrix(JonesMatrix):
+    __slots__ = ('_values', '_trains')
+    real_valued = False
+    # constructor arguments behind the parameters which are attributes but no free parameters, e.g. the global phase
+    # of a retarder on which no intensity depends
+    _fixed_arguments = ()
+
+    def __new__(cls, *values, **named):
+        # arguments given by keyword follow the positional ones in the order of _arguments
+        values += tuple(named[name] for name in cls._arguments()[len(values):] if name in named)
+        if _is_array_parameter(*values):
+            matrices = cls._matrix_function(*_as_parameters(*values)).astype(cls._dtype(), copy=False)
+            return JonesMatrixArray._from_array(matrices)
+        return super(ParametrizedJonesMatrix, cls).__new__(cls)
+
+    def __init__(self, *values):
+        """This is the baseclass of optical elements whose matrix is computed from parameters given in degree, e.g.
+        an angle or a retardance. The parameters are kept as attributes and assigning a new value re-evaluates the
+        matrix in place, so an element can be reused e.g. inside the objective function of a fit. Subclasses define
+        the names of their parameters in ``parameters`` and the functions computing the matrix and its derivatives.
+        Elements with a real matrix set ``real_valued`` and are stored as real arrays.
+
+        :param values: The values of the parameters in the order given by ``parameters``
+        """
+        if len(values) != len(self._arguments()):
+            raise TypeError('%s takes %d parameters' % (type(self).__name__, len(self._arguments())))
+        self._values = [float(value) for value in values]
+        self.matrix = self._evaluate()
+        self._version = 0
+
+    def __repr__(self):
+        return '%s(%s)' % (type(self).__name__, ', '.join(repr(value) for value in self._values))
+
+    def __getnewargs__(self):
+        # copy and pickle pass these to __new__, which requires the parameters of e.g. PhaseRetarder
+        return tuple(self._values)
+
+    def __getstate__(self):
+        # the trains watching the element are no part of its state
+        return None, dict((name, getattr(self, name)) for cls in type(self).__mro__
+                          for name in getattr(cls, '__slots__', ()) if name != '_trains' and hasattr(self, name))
+
+    def _watch(self, train):
+        """Registers an OpticalTrain which is notified when the parameters change"""
+        trains = getattr(self, '_trains', None)
+        if trains is None:
+            trains = self._trains = weakref.WeakSet()
+        trains.add(train)
+
+    def _copy(self):
+        copy = super(ParametrizedJonesMatrix, self)._copy()
+        copy._values = list(self._values)
+        return copy
+
+    @classmethod
+    def _arguments(cls):
+        return cls.parameters + cls._fixed_arguments
+
+    @classmethod
+    def _dtype(cls):
+        return real_dtype() if cls.real_valued else complex_dtype()
+
+    def _evaluate(self):
+        if _matrix_cache.enabled:
+            return _matrix_cache.get((type(self), self._dtype()) + tuple(self._values), self._compute)
+        return self._compute()
+
+    def _compute(self):
+        return self._matrix_function(*np.radians(self._values)).astype(self._dtype(), copy=False)
+
+    def set_parameters(self, **values):
+        """Sets one or several parameters at once and re-evaluates the matrix a single time
+
+        :param values: New parameter values in degree given as keyword arguments
+        """
+        if self.frozen:
+            raise TypeError('The parameters of a frozen %s can not be set' % type(self).__name__)
+        for name, value in values.items():
+            if name not in self._arguments():
+                raise AttributeError('%s has no parameter %s' % (type(self).__name__, name))
+            self._values[self._arguments().index(name)] = float(value)
+        self.matrix = self._evaluate()
+        self._version += 1
+        for train in getattr(self, '_trains', ()):
+            train._element_changed(self)
+
+    @property
+    def parameter_values(self):
+        """Property which returns the current parameter values
+
+        :return: The parameter values in the order given by ``parameters``
+        :rtype: tuple
+        """
+        return tuple(self._values[:len(self.parameters)])
+
+    def derivative(self, name):
+        """Returns the analytic derivative of the Jones matrix with respect to a parameter
+
+        :param name: Name of the parameter
+        :return: The derivative of the matrix per degree of the parameter
+        :rtype: np.ndarray of shape (2, 2)
+        """
+        if name not in self.parameters:
+            raise AttributeError('%s has no parameter %s' % (type(self).__name__, name))
+        derivatives = self._derivative_function(*np.radians(self._values))
+        return derivatives[self.parameters.index(name)] * np.pi / 180.0
+
+
+class _FixedJonesMatrix(JonesMatrix):
+    __slots__ = ()
+    _matrix = None
+
+    def __new__(cls):
+        return _intern(cls, real_dtype())
+
+    def __init__(self):
+        # the shared instance is built once by _build
+        pass
+
+    def __reduce__(self):
+        return type(self), ()
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def _build(self):
+        JonesMatrix.__init__(self, self._matrix)
+        self.matrix = self.matrix.real.astype(real_dtype())
+
+
+class PolarizerHorizontal(_FixedJonesMatrix):
+    __slots__ = ()
+    _matrix = [[1.0, 0.0], [0.0, 0.0]]
 
-class PolarizerHorizontal(JonesMatrix):
     def __init__(self):
-        """This is a subclass of JonesMatrix corresponding to a horizontal polarizer"""
+        """This is a subclass of JonesMatrix corresponding to a horizontal polarizer. Every call returns the same
+        frozen instance."""
+
+    def _structure(self):
+        return 'polarizer', 0.0
 
-        matrix = [[1.0, 0.0], [0.0, 0.0]]
-        super(PolarizerHorizontal, self).__init__(matrix)
 
+class PolarizerVertical(_FixedJonesMatrix):
+    __slots__ = ()
+    _matrix = [[0.0, 0.0], [0.0, 1.0]]
 
-class PolarizerVertical(JonesMatrix):
     def __init__(self):
-        """This is a subclass of JonesMatrix corresponding to a vertical polarizer"""
+        """This is a subclass of JonesMatrix corresponding to a vertical polarizer. Every call returns the same
+        frozen instance."""
+
+    def _structure(self):
+        return 'polarizer', 90.0
 
-        matrix = [[0.0, 0.0], [0.0, 1.0]]
-        super(PolarizerVertical, self).__init__(matrix)
 
+class Polarizer(ParametrizedJonesMatrix):
+    __slots__ = ()
+    parameters = ('angle',)
+    real_valued = True
+    angle = _parameter('angle')
+    _matrix_function = staticmethod(_polarizer_matrix)
+    _derivative_function = staticmethod(_polarizer_derivatives)
 
-class Polarizer(JonesMatrix):
     def __init__(self, angle):
         """This is a subclass of JonesMatrix corresponding to a polarizer with angle
 
-        :param angle: Angle of the polarizer with respect to horizontal plane
+        :param angle: Angle of the polarizer with respect to horizontal plane. An array of angles returns a
+                      JonesMatrixArray.
         """
-        angle = np.radians(angle)
-        matrix = [[np.cos(angle) ** 2, np.sin(angle) * np.cos(angle)],
-                  [np.sin(angle) * np.cos(angle), np.sin(angle) ** 2]]
-        super(Polarizer, self).__init__(matrix)
+        super(Polarizer, self).__init__(angle)
+
+    def _structure(self):
+        return 'polarizer', self.angle
+
 
+class QuarterWavePlate(ParametrizedJonesMatrix):
+    __slots__ = ()
+    parameters = ('angle',)
+    angle = _parameter('angle')
+    _matrix_function = staticmethod(_quarter_wave_plate_matrix)
+    _derivative_function = staticmethod(_quarter_wave_plate_derivatives)
 
-class QuarterWavePlate(JonesMatrix):
     def __init__(self, angle):
         """This is a subclass of JonesMatrix corresponding to a quarter wave plate with angle
 
-        :param angle: Angle of the fast axis of the quarter wave plate with respect to horizontal plane
+        :param angle: Angle of the fast axis of the quarter wave plate with respect to horizontal plane. An array
+                      of angles returns a JonesMatrixArray.
         """
+        super(QuarterWavePlate, self).__init__(angle)
 
-        angle = np.radians(angle)
-        matrix = np.exp(1.0j * np.pi / 4.0) * np.matrix([[np.cos(angle) ** 2 + 1.0j * np.sin(angle) ** 2,
-                                                          (1.0 - 1.0j) * np.sin(angle) * np.cos(angle)],
-                                                         [(1.0 - 1.0j) * np.sin(angle) * np.cos(angle),
-                                                          np.sin(angle) ** 2 + 1.0j * np.cos(angle) ** 2]])
-        super(QuarterWavePlate, self).__init__(matrix)
+    def _structure(self):
+        return 'retarder', self.angle, 90.0, 90.0
 
 
-class HalfWavePlate(JonesMatrix):
+class HalfWavePlate(ParametrizedJonesMatrix):
+    __slots__ = ()
+    parameters = ('angle',)
+    real_valued = True
+    angle = _parameter('angle')
+    _matrix_function = staticmethod(_half_wave_plate_matrix)
+    _derivative_function = staticmethod(_half_wave_plate_derivatives)
+
     def __init__(self, angle):
         """This is a subclass of JonesMatrix corresponding to a half wave plate with angle
 
-        :param angle: Angle of the fast axis of the half wave plate with respect to horizontal plane
+        :param angle: Angle of the fast axis of the half wave plate with respect to horizontal plane. An array
+                      of angles returns a JonesMatrixArray.
         """
+        super(HalfWavePlate, self).__init__(angle)
+
+    def _structure(self):
+        return 'retarder', self.angle, 180.0, 90.0
+
 
-        angle = 2 * np.radians(angle)
-        matrix = [[np.cos(angle), np.sin(angle)], [np.sin(angle), -np.cos(angle)]]
-        super(HalfWavePlate, self).__init__(matrix)
+class PhaseRetarder(ParametrizedJonesMatrix):
+    __slots__ = ()
+    parameters = ('angle', 'eta')
+    _fixed_arguments = ('phase',)
+    angle = _parameter('angle')
+    eta = _parameter('eta')
+    phase = _parameter('phase')
+    _matrix_function = staticmethod(_phase_retarder_matrix)
+    _derivative_function = staticmethod(_phase_retarder_derivatives)
 
+    def __new__(cls, angle, eta, phase=0.0):
+        return super(PhaseRetarder, cls).__new__(cls, angle, eta, phase)
 
-class PhaseRetarder(JonesMatrix):
-    def __init__(self, angle, eta):
+    def __init__(self, angle, eta, phase=0.0):
         """This is a subclass of JonesMatrix corresponding to an arbitrary phase retarder with angle
 
         :param angle: Angle of the fast axis of the phase retarder with respect to horizontal plane
-        :param eta: Phase retardance in degree
+        :param eta: Phase retardance in degree. If angle, eta or phase are arrays they are broadcast against each
+                    other and a JonesMatrixArray is returned.
+        :param phase: Additional global phase in degree, which only matters for the coherent superposition of beams.
+                      A quarter wave plate is PhaseRetarder(angle, 90, 90) and a half wave plate is
+                      PhaseRetarder(angle, 180, 90). The phase is an attribute but no free parameter, since
+                      intensities and Stokes vectors do not depend on it.
+        """
+        super(PhaseRetarder, self).__init__(angle, eta, phase)
+
+    def _structure(self):
+        return 'retarder', self.angle, self.eta, self.phase
+
+
+class Rotator(ParametrizedJonesMatrix):
+    __slots__ = ()
+    parameters = ('angle',)
+    real_valued = True
+    angle = _parameter('angle')
+    _matrix_function = staticmethod(_rotator_matrix)
+    _derivative_function = staticmethod(_rotator_derivatives)
+
+    def __init__(self, angle):
+        """This is a subclass of JonesMatrix corresponding to an optical rotator which rotates any polarization by
+        angle, e.g. a Faraday rotator or an optically active medium
+
+        :param angle: Rotation angle in degree, counterclockwise when looking into the beam. An array of angles
+                      returns a JonesMatrixArray.
         """
+        super(Rotator, self).__init__(angle)
+
+    def _structure(self):
+        return 'rotator', self.angle
+
+
+_ANGLE_TOLERANCE = 1e-9
+
+
+def _congruent(first, second, period):
+    return abs((first - second + period / 2.0) % period - period / 2.0) < _ANGLE_TOLERANCE
+
+
+def _normalized_retardance(eta, phase):
+    """Brings eta to [0, 360) and phase to [0, 360) without changing the retarder"""
+    # PhaseRetarder(angle, eta + 360) = -PhaseRetarder(angle, eta), so a full turn of eta is half a turn of phase
+    turns = np.floor((eta + _ANGLE_TOLERANCE) / 360.0)
+    return eta - 360.0 * turns, (phase + 180.0 * turns) % 360.0
+
+
+def _retarder(angle, eta, phase):
+    """Returns the simplest predefined element for a retarder given by its axis, retardance and global phase"""
+    eta, phase = _normalized_retardance(eta, phase)
+    if _congruent(phase, 90.0, 360.0) and _congruent(eta, 90.0, 360.0):
+        return QuarterWavePlate(angle)
+    elif _congruent(phase, 90.0, 360.0) and _congruent(eta, 180.0, 360.0):
+        return HalfWavePlate(angle)
+    elif _congruent(phase, 0.0, 360.0):
+        return PhaseRetarder(angle, eta)
+    return PhaseRetarder(angle, eta, phase)
+
+
+def _closed_form_product(later, earlier):
+    """Returns the product later * earlier as a single predefined element if a closed form is known, else None"""
+    first = earlier._structure()
+    if first is None:
+        return None
+    second = later._structure()
+    if second is None or first[0] != second[0]:
+        return None
+    kind = first[0]
+    if kind == 'polarizer':
+        if _congruent(first[1], second[1], 180.0):
+            return Polarizer(second[1])
+        elif _congruent(first[1], second[1] + 90.0, 180.0):
+            return JonesMatrix._from_array(np.zeros((2, 2), dtype=real_dtype()))
+    elif kind == 'rotator':
+        return Rotator(first[1] + second[1])
+    elif kind == 'retarder':
+        _, angle, eta, phase = second
+        if _congruent(first[1], angle, 180.0):
+            return _retarder(angle, first[2] + eta, first[3] + phase)
+        elif _congruent(first[1], angle + 90.0, 180.0):
+            # a retarder with perpendicular axis is the retarder with negative retardance
+            return _retarder(angle, eta - first[2], first[3] + phase)
+        first_eta, first_phase = _normalized_retardance(first[2], first[3])
+        eta, phase = _normalized_retardance(eta, phase)
+        if _congruent(first_eta, 180.0, 360.0) and _congruent(eta, 180.0, 360.0) and \
+                _congruent(first_phase + phase, 0.0, 180.0):
+            # two half wave plates are mirror operations whose product is a rotation, a global phase of -1 is
+            # another half turn of the rotator
+            return Rotator(2 * (angle - first[1]) + (first_phase + phase - 180.0))
+    return None
+
+
+def _is_identity(element):
+    structure = element._structure()
+    if structure is None:
+        return False
+    elif structure[0] == 'rotator':
+        return _congruent(structure[1], 0.0, 360.0)
+    elif structure[0] == 'retarder':
+        eta, phase = _normalized_retardance(structure[2], structure[3])
+        return _congruent(eta, 0.0, 360.0) and _congruent(phase, 0.0, 360.0)
+    return False
+
+
+def simplify(elements):
+    """Simplifies a sequence of elements symbolically by replacing neighbouring elements with their closed form
+    product wherever possible and by dropping elements which are the identity. No matrices are multiplied, which
+    saves work and avoids the accumulation of rounding errors in long trains.
 
-        angle = np.radians(angle)
-        eta = np.radians(eta)
-        matrix = np.exp(- 1.0j * eta / 2.0) * np.matrix([[np.cos(angle) ** 2 + np.exp(1j * eta) * np.sin(angle) ** 2,
-                                                          (1.0 - np.exp(1j * eta)) * np.sin(angle) * np.cos(angle)],
-                                                         [(1.0 - np.exp(1j * eta)) * np.sin(angle) * np.cos(angle),
-                                                          np.sin(angle) ** 2 + np.exp(1j * eta) * np.cos(angle) ** 2]])
-        super(PhaseRetarder, self).__init__(matrix)
+    :param elements: An iterable of optical elements in the order in which the light passes them
+    :return: The simplified elements in the same order
+    :rtype: list
+    """
+    simplified = []
+    for element in elements:
+        while simplified and isinstance(element, JonesMatrix) and isinstance(simplified[-1], JonesMatrix):
+            product = _closed_form_product(element, simplified[-1])
+            if product is None:
+                break
+            simplified.pop()
+            element = product
+        if not (isinstance(element, JonesMatrix) and _is_identity(element)):
+            simplified.append(element)
+    return simplified
@@ -0,0 +1,361 @@
+"""This module provides the OpticalTrain, an ordered list of optical elements which caches the total system matrix.
+The elements are given in the order in which the light passes them, so the system matrix of the train
+[A, B, C] is C*B*A.
+
+The partial products are kept in a segment tree, so replacing a single element only recomputes the O(log n) products
+on the path from that element to the root instead of re-multiplying the whole train. Parameters of the contained
+elements may also be changed in place (e.g. ``train[3].angle = 10``). The element notifies the trains holding it, which
+update only the changed leaves on the next access.
+
+The parameters of all elements are exposed as one flat vector together with analytic derivatives of the output
+intensity or Stokes vector, which makes a train directly usable as forward model for gradient based fitters.
+
+"""
+
+from __future__ import print_function
+from pyjones.opticalelements import *
+from pyjones.precision import real_dtype
+
+
+def _element_matrix(element):
+    if isinstance(element, JonesMatrix):
+        return element.matrix
+    elif isinstance(element, JonesMatrixArray):
+        return element.matrices
+    else:
+        raise TypeError('Elements of an OpticalTrain must be JonesMatrix or JonesMatrixArray')
+
+
+def _system_matrices(system, name='System', arrays=True):
+    """Returns the (2, 2) or (N, 2, 2) matrices of a JonesMatrix, JonesMatrixArray or OpticalTrain
+
+    :param name: What the system is called in the error message if it has none of these types
+    :param arrays: If False a JonesMatrixArray is rejected as well
+    """
+    if isinstance(system, (JonesMatrix, OpticalTrain)):
+        return system.matrix
+    elif arrays and isinstance(system, JonesMatrixArray):
+        return system.matrices
+    types = 'JonesMatrix, JonesMatrixArray or OpticalTrain' if arrays else 'JonesMatrix or OpticalTrain'
+    raise TypeError('%s must be %s' % (name, types))
+
+
+def _as_vectors(state):
+    if isinstance(state, JonesVector):
+        return state.polarization_vector[0]
+    elif isinstance(state, JonesVectorArray):
+        return state.polarization_vectors
+    else:
+        raise TypeError('State must be JonesVector or JonesVectorArray')
+
+
+def _intensity(fields):
+    return np.sum(fields.real ** 2 + fields.imag ** 2, axis=-1)
+
+
+def _stokes(fields):
+    Ex = fields[..., 0]
+    Ey = fields[..., 1]
+    cross = Ex * np.conjugate(Ey)
+    abs_x = Ex.real ** 2 + Ex.imag ** 2
+    abs_y = Ey.real ** 2 + Ey.imag ** 2
+    return np.stack([abs_x + abs_y, abs_x - abs_y, 2 * cross.real, -2 * cross.imag], axis=-1)
+
+
+def _stokes_derivative(fields, derivatives):
+    Ex = fields[..., 0]
+    Ey = fields[..., 1]
+    dEx = derivatives[..., 0]
+    dEy = derivatives[..., 1]
+    d_abs_x = 2 * np.real(np.conjugate(Ex) * dEx)
+    d_abs_y = 2 * np.real(np.conjugate(Ey) * dEy)
+    d_cross = dEx * np.conjugate(Ey) + Ex * np.conjugate(dEy)
+    return np.stack([d_abs_x + d_abs_y, d_abs_x - d_abs_y, 2 * d_cross.real, -2 * d_cross.imag], axis=-1)
+
+
+def _as_element(matrix):
+    if matrix.ndim == 2:
+        return JonesMatrix._from_array(matrix.copy())
+    return JonesMatrixArray._from_array(matrix.copy())
+
+
+def _identity():
+    # a real identity does not promote the precision of the elements it is multiplied with
+    return np.eye(2, dtype=real_dtype())
+
+
+class OpticalTrain(object):
+    def __init__(self, elements=()):
+        """This represents a sequence of optical elements and caches the product of their Jones matrices.
+
+        :param elements: An iterable of JonesMatrix or JonesMatrixArray instances in the order in which the light
+                         passes them
+        """
+        self._elements = list(elements)
+        self._build()
+
+    def _build(self):
+        self._leaves = [_element_matrix(element) for element in self._elements]
+        # positions of every element by its id and the ids of the elements changed in place since the last access
+        self._indices = {}
+        self._changed = set()
+        for index, element in enumerate(self._elements):
+            self._track(index, element)
+        # the root is always a product and never the matrix of an element itself, so it can be read-only
+        self._capacity = 2
+        while self._capacity < len(self._leaves):
+            self._capacity *= 2
+        padding = _identity()
+        padding.flags.writeable = False
+        self._tree = [padding] * (2 * self._capacity)
+        self._tree[self._capacity:self._capacity + len(self._leaves)] = self._leaves
+        for node in range(self._capacity - 1, 0, -1):
+            self._update_node(node)
+
+    def _update_node(self, node):
+        # the right child covers the later elements, so it is applied after the left one
+        self._tree[node] = np.matmul(self._tree[2 * node + 1], self._tree[2 * node])
+        # callers get the cached products directly, writing to them would corrupt the cache
+        self._tree[node].flags.writeable = False
+
+    def __getstate__(self):
+        return self._elements
+
+    def __setstate__(self, elements):
+        # the cached products are keyed by the ids of the elements, so a copy rebuilds them
+        self._elements = elements
+        self._build()
+
+    def _track(self, index, element):
+        self._indices.setdefault(id(element), []).append(index)
+        if isinstance(element, ParametrizedJonesMatrix):
+            element._watch(self)
+
+    def _element_changed(self, element):
+        """Called by a parametrized element of the train whose parameters were changed in place"""
+        self._changed.add(id(element))
+
+    def _refresh(self):
+        """Updates the partial products of all elements whose parameters were changed in place"""
+        if not self._changed:
+            return
+        changed, self._changed = self._changed, set()
+        for key in changed:
+            # elements which were removed from the train in the meantime have no indices
+            for index in self._indices.get(key, ()):
+                self._leaves[index] = _element_matrix(self._elements[index])
+                self._update_leaf(index)
+
+    def _update_leaf(self, index):
+        node = self._capacity + index
+        self._tree[node] = self._leaves[index]
+        node //= 2
+        while node >= 1:
+            self._update_node(node)
+            node //= 2
+
+    def __repr__(self):
+        return 'OpticalTrain(%r)' % self._elements
+
+    def __len__(self):
+        return len(self._elements)
+
+    def __iter__(self):
+        return iter(self._elements)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return OpticalTrain(self._elements[item])
+        return self._elements[item]
+
+    def __setitem__(self, key, element):
+        """Replaces a single element and updates the cached partial products in O(log n)"""
+        if not isinstance(key, (int, np.integer)):
+            raise TypeError('Needs to be integer')
+        matrix = _element_matrix(element)
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError('OpticalTrain index out of range')
+        indices = self._indices[id(self._elements[key])]
+        indices.remove(key)
+        if not indices:
+            del self._indices[id(self._elements[key])]
+        self._elements[key] = element
+        self._leaves[key] = matrix
+        self._track(key, element)
+        self._update_leaf(key)
+
+    def __delitem__(self, key):
+        del self._elements[key]
+        self._build()
+
+    def append(self, element):
+        """Appends an element at the end of the train. The partial products are only rebuilt when the capacity of
+        the tree is exceeded.
+
+        :param element: JonesMatrix or JonesMatrixArray
+        """
+        matrix = _element_matrix(element)
+        self._elements.append(element)
+        if len(self._elements) > self._capacity:
+            self._build()
+        else:
+            self._leaves.append(matrix)
+            self._track(len(self._leaves) - 1, element)
+            self._update_leaf(len(self._leaves) - 1)
+
+    def insert(self, index, element):
+        """Inserts an element in front of the element at index. This rebuilds the partial products.
+
+        :param index: Position of the new element
+        :param element: JonesMatrix or JonesMatrixArray
+        """
+        _element_matrix(element)
+        self._elements.insert(index, element)
+        self._build()
+
+    def product(self, start=0, stop=None):
+        """Returns the product of the Jones matrices of the elements start to stop (exclusive) in O(log n)
+
+        :param start: Index of the first element of the range
+        :param stop: Index after the last element of the range, defaults to the length of the train
+        :return: The matrix of the partial train as array of shape (2, 2) or (N, 2, 2)
+        :rtype: np.ndarray
+        """
+        self._refresh()
+        start, stop, _ = slice(start, stop).indices(len(self))
+        earlier = later = _identity()
+        low = start + self._capacity
+        high = stop + self._capacity
+        while low < high:
+            if low & 1:
+                earlier = np.matmul(self._tree[low], earlier)
+                low += 1
+            if high & 1:
+                high -= 1
+                later = np.matmul(later, self._tree[high])
+            low //= 2
+            high //= 2
+        return np.matmul(later, earlier)
+
+    def simplified(self):
+        """Returns a new train in which neighbouring elements with a closed form product are merged and identity
+        elements are dropped, see pyjones.opticalelements.simplify. Elements which are not merged are shared with
+        this train.
+
+        :rtype: OpticalTrain
+        """
+        return OpticalTrain(simplify(self._elements))
+
+    @property
+    def matrix(self):
+        """Property which returns the cached system matrix of the whole train. The array is read-only since it is
+        the cache itself.
+
+        :return: The system matrix as array of shape (2, 2) or (N, 2, 2)
+        :rtype: np.ndarray
+        """
+        self._refresh()
+        return self._tree[1]
+
+    @property
+    def system(self):
+        """Property which returns the whole train as a single optical element
+
+        :return: The system matrix
+        :rtype: JonesMatrix or JonesMatrixArray
+        """
+        return _as_element(self.matrix)
+
+    def __mul__(self, other):
+        """Applies the whole train to a polarization or optical element using the cached system matrix
+
+        :param other: JonesMatrix, JonesMatrixArray, JonesVector or JonesVectorArray
+        :return: The same kind of objects as the multiplication of a JonesMatrix would return
+        """
+        return self.system * other
+
+    @property
+    def parameters(self):
+        """Property which returns the free parameters of all elements in the train
+
+        :return: One (element index, parameter name) pair per parameter in the order of ``parameter_values``
+        :rtype: list
+        """
+        return [(index, name) for index, element in enumerate(self._elements)
+                for name in getattr(element, 'parameters', ())]
+
+    @property
+    def parameter_values(self):
+        """Property which returns or sets the values of all parameters of the train as one flat array in degree.
+        Setting the values re-evaluates the changed elements in place.
+
+        :rtype: np.ndarray
+        """
+        return np.array([getattr(self._elements[index], name) for index, name in self.parameters], dtype=float)
+
+    @parameter_values.setter
+    def parameter_values(self, values):
+        keys = self.parameters
+        if len(values) != len(keys):
+            raise ValueError('Expected %d parameter values' % len(keys))
+        changes = {}
+        for (index, name), value in zip(keys, values):
+            # unchanged elements are neither re-evaluated nor refreshed in the partial products
+            if getattr(self._elements[index], name) != float(value):
+                changes.setdefault(index, {})[name] = value
+        for index, parameters in changes.items():
+            self._elements[index].set_parameters(**parameters)
+
+    def evaluate(self, state, quantity='intensity'):
+        """Propagates a polarization through the train and returns the requested output quantity
+
+        :param state: JonesVector or JonesVectorArray entering the train
+        :param quantity: Either 'intensity' or 'Stokes'
+        :return: The intensity with shape () or (N,) or the Stokes vector with shape (4,) or (N, 4)
+        :rtype: np.ndarray
+        """
+        fields = np.matmul(self.matrix, _as_vectors(state)[..., np.newaxis])[..., 0]
+        if quantity == 'intensity':
+            return _intensity(fields)
+        elif quantity == 'Stokes':
+            return _stokes(fields)
+        else:
+            raise ValueError("Quantity must be either 'intensity' or 'Stokes'")
+
+    def gradient(self, state, quantity='intensity'):
+        """Returns the analytic derivatives of the output intensity or Stokes vector with respect to all parameters.
+        The fields in front of and the products behind every element are computed in a single forward and backward
+        pass, after which every parameter costs one vectorized product over all states, so the total cost grows as
+        O(P * N) for P parameters and N states instead of re-propagating the states through the train per parameter.
+
+        :param state: JonesVector or JonesVectorArray entering the train
+        :param quantity: Either 'intensity' or 'Stokes'
+        :return: Derivatives per degree with the parameters along the first axis in the order of ``parameters``
+        :rtype: np.ndarray
+        """
+        if quantity not in ('intensity', 'Stokes'):
+            raise ValueError("Quantity must be either 'intensity' or 'Stokes'")
+        self._refresh()
+        # field in front of every element
+        fields = [_as_vectors(state)]
+        for matrix in self._leaves:
+            fields.append(np.matmul(matrix, fields[-1][..., np.newaxis])[..., 0])
+        output = fields[-1]
+        # product of all elements behind every element
+        behind = [_identity()] * len(self._leaves)
+        for index in range(len(self._leaves) - 1, 0, -1):
+            behind[index - 1] = np.matmul(behind[index], self._leaves[index])
+        derivatives = []
+        for index, name in self.parameters:
+            d_matrix = np.matmul(behind[index], self._elements[index].derivative(name))
+            d_output = np.matmul(d_matrix, fields[index][..., np.newaxis])[..., 0]
+            if quantity == 'intensity':
+                derivatives.append(2 * np.real(np.sum(np.conjugate(output) * d_output, axis=-1)))
+            else:
+                derivatives.append(_stokes_derivative(output, d_output))
+        if not derivatives:
+            shape = output.shape[:-1] + ((4,) if quantity == 'Stokes' else ())
+            return np.zeros((0,) + shape)
+        return np.array(derivatives)
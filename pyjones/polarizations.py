@@ -9,57 +9,76 @@ The basic class is JonesVector from which all predefined polarizations inherit f
 * CircularRight
 * CircularLeft
 
+Many polarization states can be handled at once with JonesVectorArray which stores them in a single (N, 2) array.
+
+The predefined polarizations without parameters are immutable singletons: every call returns the same frozen
+instance, so constructing them costs a dictionary lookup. Any vector can be frozen with freeze(). Frozen vectors
+compare by their components rounded to a grid and are hashable, so they can be used as dictionary keys, e.g. to
+deduplicate states.
+
+Importing this module only requires NumPy, the plotting functions are implemented in pyjones.visualization which
+imports matplotlib when it is used for the first time.
+
 """
 
 from __future__ import print_function
 
-from mpl_toolkits.mplot3d import Axes3D
-import matplotlib.pyplot as plt
 import numpy as np
+from pyjones.precision import complex_dtype
+
+
+# frozen vectors and matrices are equal if their entries agree on a grid with this spacing
+_HASH_TOLERANCE = 1e-9
+_interned = {}
+
+
+def _value_key(array):
+    """Returns a hashable key of an array which is the same for arrays whose entries round to the same grid points"""
+    values = np.asarray(array, dtype=complex)
+    grid = np.round(np.stack([values.real, values.imag]) / _HASH_TOLERANCE).astype(np.int64)
+    return values.shape, grid.tobytes()
+
+
+def _intern(cls, dtype):
+    """Returns the shared frozen instance of a class without parameters for a dtype, building it on first use"""
+    key = (cls, dtype)
+    instance = _interned.get(key)
+    if instance is None:
+        instance = object.__new__(cls)
+        instance._build()
+        instance = _interned.setdefault(key, instance._freeze())
+    return instance
 
 
 def get_Poincare_sphere():
-    """Sets up a figure and a matplotlib axes instance with a Poincare sphere on which a polarization can be plotted
+    """Sets up a figure and a matplotlib axes instance with a Poincare sphere on which a polarization can be plotted.
+    This is a shortcut for pyjones.visualization.get_Poincare_sphere which imports matplotlib on first use.
 
     :return: matplotlib.ax
     """
-    fig = plt.figure()
-    ax = fig.add_subplot(111, projection='3d')
-    u = np.linspace(-np.pi, np.pi, 50)
-    v = np.linspace(0, np.pi, 50)
-    x = np.outer(np.cos(u), np.sin(v))
-    y = np.outer(np.sin(u), np.sin(v))
-    z = np.outer(np.ones(np.size(u)), np.cos(v))
-    ax.plot_surface(x, y, z, rstride=5, cstride=5,
-                    color='#c0c0c0', alpha=0.1)
-    ax.plot_wireframe(x, y, z, rstride=5, cstride=5,
-                      color='grey',
-                      alpha=0.2)
-    ax.plot(np.cos(u), np.sin(u), zdir='z', lw=1, color='grey')
-    ax.plot(np.cos(u), np.sin(u), zdir='x', lw=1, color='grey')
-    ax.plot(np.cos(u), np.sin(u), zdir='y', lw=1, color='grey')
-    style = {'fontsize': 16,
-             'horizontalalignment': 'center',
-             'verticalalignment': 'center'}
-    ax.text(0, 1.1, 0, 'D', **style)
-    ax.text(0, -1.1, 0, 'A', **style)
-    ax.text(1.1, 0, 0, 'H', **style)
-    ax.text(-1.1, 0, 0, 'V', **style)
-    ax.text(0, 0, 1.1, 'L', **style)
-    ax.text(0, 0, -1.1, 'R', **style)
-    ax.set_axis_off()
-    ax.set_aspect(0.95)
-    return fig, ax
+    from pyjones import visualization
+    return visualization.get_Poincare_sphere()
+
+
+def plot_polarizations(poincare_sphere_axis, states, **kwargs):
+    """Visualizes many polarizations on the Poincare sphere with a single scatter call.
+    This is a shortcut for pyjones.visualization.plot_polarizations which imports matplotlib on first use.
+
+    """
+    from pyjones import visualization
+    return visualization.plot_polarizations(poincare_sphere_axis, states, **kwargs)
 
 
 def show_plots():
     """Invokes the interactive plotting window
 
     """
-    plt.show()
+    from pyjones import visualization
+    visualization.show_plots()
 
 
 class JonesVector(object):
+    __slots__ = ('polarization_vector', '_key')
     eps = 1e-15
 
     def __init__(self, polarization, normalize=True, normal_form=True):
@@ -72,26 +91,83 @@ class JonesVector(object):
             if len(polarization) != 2:
                 raise ValueError('Length of vector/list must be excactly 2')
             else:
-                self.polarization_vector = np.matrix(np.array(polarization).astype(complex))
+                self.polarization_vector = np.array(polarization, dtype=complex_dtype()).reshape(1, 2)
         else:
             raise ValueError('Parameter must be either a list or a numpy.array')
+        self._finalize(normalize, normal_form)
+
+    @classmethod
+    def _from_array(cls, vector, normalize=False, normal_form=False):
+        """Trusted constructor for internal results which skips the input validation
+
+        :param vector: A complex np.ndarray of shape (1, 2) which is taken over without copying
+        """
+        self = object.__new__(cls)
+        self.polarization_vector = vector
+        self._finalize(normalize, normal_form)
+        return self
+
+    def _finalize(self, normalize, normal_form):
         if normalize:
             self._normalize()
         if normal_form:
             self._make_normal_form()
         #  truncation for small values
-        for idx, num in enumerate([self.Ex, self.Ey]):
-            new_real = num.real
-            new_imag = num.imag
-            if abs(new_real) < JonesVector.eps:
-                new_real = 0.0
-            if abs(new_imag) < JonesVector.eps:
-                new_imag = 0.0
-            self[idx] = new_real+1j*new_imag
+        real = self.polarization_vector.real
+        imag = self.polarization_vector.imag
+        real[np.abs(real) < JonesVector.eps] = 0.0
+        imag[np.abs(imag) < JonesVector.eps] = 0.0
 
     def __repr__(self):
         return 'JonesVector([%s, %s])' % (self.polarization_vector[0, 0], self.polarization_vector[0, 1])
 
+    def __eq__(self, other):
+        if isinstance(other, JonesVector) and self.frozen and other.frozen:
+            return self._key == other._key
+        return NotImplemented
+
+    def __hash__(self):
+        # mutable vectors keep the identity semantics of object
+        return hash(self._key) if self.frozen else object.__hash__(self)
+
+    def __setstate__(self, state):
+        # copies and unpickled objects of frozen values get read-only arrays again, subclasses without __slots__
+        # keep their instance attributes
+        if state[0] is not None:
+            self.__dict__.update(state[0])
+        for name, value in (state[1] or {}).items():
+            setattr(self, name, value)
+        if self.frozen:
+            self._freeze()
+
+    @property
+    def frozen(self):
+        """Property which returns whether the vector is immutable, see freeze
+
+        :rtype: bool
+        """
+        return getattr(self, '_key', None) is not None
+
+    def _freeze(self):
+        self.polarization_vector.setflags(write=False)
+        self._key = ('vector',) + _value_key(self.polarization_vector)
+        return self
+
+    def freeze(self):
+        """Returns an immutable copy of the vector. Frozen vectors are equal if the real and imaginary parts of their
+        components round to the same multiples of _HASH_TOLERANCE and they are hashable, so they can be used in sets
+        and as dictionary keys. Components which differ by much less than _HASH_TOLERANCE still compare unequal if
+        they lie on different sides of a rounding boundary, so only exactly computed values are reliably deduplicated.
+
+        :return: The frozen vector, or the vector itself if it is frozen already
+        :rtype: JonesVector
+        """
+        if self.frozen:
+            return self
+        frozen = object.__new__(type(self))
+        frozen.polarization_vector = self.polarization_vector.copy()
+        return frozen._freeze()
+
     def __getitem__(self, item):
         if not isinstance(item, int):
             raise TypeError('Needs to be integer')
@@ -101,7 +177,9 @@ class JonesVector(object):
             return self.polarization_vector[0, item]
 
     def __setitem__(self, key, value):
-        if not isinstance(key, int):
+        if self.frozen:
+            raise TypeError('A frozen JonesVector can not be changed')
+        elif not isinstance(key, int):
             raise TypeError('Needs to be integer')
         elif key not in [0, 1]:
             raise IndexError('Index can be either 0 or 1')
@@ -114,15 +192,11 @@ class JonesVector(object):
         self.polarization_vector /= np.sqrt(self.intensity)
 
     def _make_normal_form(self):
-        E_x_abs = np.abs(self.Ex)
-        E_y_abs = np.abs(self.Ey)
-        phi_x = np.angle(self.Ex)
-        phi_y = np.angle(self.Ey)
-        phi_y_rotated = phi_y - phi_x
-        E_x_new = E_x_abs * np.exp(1j*0)
-        E_y_new = E_y_abs * np.exp(1j*phi_y_rotated)
-        self[0] = E_x_new
-        self[1] = E_y_new
+        vector = self.polarization_vector
+        E_abs = np.abs(vector[0])
+        phi = np.angle(vector[0])
+        vector[0, 0] = E_abs[0]
+        vector[0, 1] = E_abs[1] * np.exp(1j * (phi[1] - phi[0]))
 
     def plot(self, poincare_sphere_axis, color='r', size=10):
         """Visualizes the polarization on the Poincare sphere
@@ -171,21 +245,51 @@ class JonesVector(object):
         return S0, S1, S2, S3
 
 
-class LinearHorizontal(JonesVector):
+class _FixedJonesVector(JonesVector):
+    __slots__ = ()
+    _polarization = None
+
+    def __new__(cls):
+        return _intern(cls, complex_dtype())
+
     def __init__(self):
-        """This is a subclass of JonesVector corresponding to linear horizontal polarisation"""
+        # the shared instance is built once by _build
+        pass
+
+    def __reduce__(self):
+        return type(self), ()
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
 
-        super(LinearHorizontal, self).__init__([1.0, 0.0])
+    def _build(self):
+        JonesVector.__init__(self, self._polarization)
 
 
-class LinearVertical(JonesVector):
+class LinearHorizontal(_FixedJonesVector):
+    __slots__ = ()
+    _polarization = [1.0, 0.0]
+
     def __init__(self):
-        """This is a subclass of JonesVector corresponding to linear vertical polarisation"""
+        """This is a subclass of JonesVector corresponding to linear horizontal polarisation.
+        Every call returns the same frozen instance."""
+
 
-        super(LinearVertical, self).__init__([0.0, 1.0])
+class LinearVertical(_FixedJonesVector):
+    __slots__ = ()
+    _polarization = [0.0, 1.0]
+
+    def __init__(self):
+        """This is a subclass of JonesVector corresponding to linear vertical polarisation.
+        Every call returns the same frozen instance."""
 
 
 class Linear(JonesVector):
+    __slots__ = ()
+
     def __init__(self, angle):
         """This is a subclass of JonesVector corresponding to a linear polarization with angle
 
@@ -196,29 +300,175 @@ class Linear(JonesVector):
         super(Linear, self).__init__([np.cos(angle), np.sin(angle)])
 
 
-class LinearDiagonal(JonesVector):
+class LinearDiagonal(_FixedJonesVector):
+    __slots__ = ()
+    _polarization = [1.0, 1.0]
+
     def __init__(self):
-        """This is a subclass of JonesVector corresponding to linear diagonal polarisation"""
+        """This is a subclass of JonesVector corresponding to linear diagonal polarisation.
+        Every call returns the same frozen instance."""
 
-        super(LinearDiagonal, self).__init__([1.0, 1.0])
 
+class LinearAntidiagonal(_FixedJonesVector):
+    __slots__ = ()
+    _polarization = [1.0, -1.0]
 
-class LinearAntidiagonal(JonesVector):
     def __init__(self):
-        """This is a subclass of JonesVector corresponding to linear antidiagonal polarisation"""
+        """This is a subclass of JonesVector corresponding to linear antidiagonal polarisation.
+        Every call returns the same frozen instance."""
 
-        super(LinearAntidiagonal, self).__init__([1.0, -1.0])
 
+class CircularRight(_FixedJonesVector):
+    __slots__ = ()
+    _polarization = [1.0, -1.0j]
 
-class CircularRight(JonesVector):
     def __init__(self):
-        """This is a subclass of JonesVector corresponding to right circular polarisation"""
+        """This is a subclass of JonesVector corresponding to right circular polarisation.
+        Every call returns the same frozen instance."""
 
-        super(CircularRight, self).__init__([1.0, -1.0j])
 
+class CircularLeft(_FixedJonesVector):
+    __slots__ = ()
+    _polarization = [1.0, 1.0j]
 
-class CircularLeft(JonesVector):
     def __init__(self):
-        """This is a subclass of JonesVector corresponding to left circular polarisation"""
+        """This is a subclass of JonesVector corresponding to left circular polarisation.
+        Every call returns the same frozen instance."""
+
+
+class JonesVectorArray(object):
+    __slots__ = ('polarization_vectors',)
+    eps = JonesVector.eps
+
+    def __init__(self, polarizations, normalize=True, normal_form=True, dtype=None):
+        """This represents many Jones vectors at once, stored as a single contiguous (N, 2) complex array.
+        All operations are vectorized over the first axis so no per-element Python code is executed.
+
+        :param polarizations: An (N, 2) array-like of complex numbers or an iterable of JonesVector instances
+        :param normalize: If True every vector is normalized to unit intensity. Vectors with zero intensity are
+                          left untouched.
+        :param normal_form: If True the global phase is removed from every vector such that Ex is real
+        :param dtype: Complex dtype of the storage, defaults to the precision policy of pyjones.precision
+        """
+        if not hasattr(polarizations, '__iter__'):
+            raise ValueError('Parameter must be an (N, 2) array or an iterable of JonesVector')
+        if dtype is not None and np.dtype(dtype).kind != 'c':
+            raise ValueError('Jones vectors require a complex dtype, not %s' % np.dtype(dtype))
+        if not isinstance(polarizations, np.ndarray):
+            polarizations = [p.polarization_vector[0] if isinstance(p, JonesVector) else p
+                             for p in polarizations]
+        vectors = np.array(polarizations, dtype=dtype or complex_dtype())
+        if vectors.ndim == 1 and vectors.size == 0:
+            vectors = vectors.reshape(0, 2)
+        if vectors.ndim != 2 or vectors.shape[1] != 2:
+            raise ValueError('Shape of array must be (N, 2)')
+        self.polarization_vectors = np.ascontiguousarray(vectors)
+        self._finalize(normalize, normal_form)
+
+    @classmethod
+    def _from_array(cls, vectors, normalize=False, normal_form=False, finalize=True):
+        """Trusted constructor for internal results which skips the input validation and keeps the dtype
+
+        :param vectors: A complex np.ndarray of shape (N, 2) which is taken over without copying
+        :param finalize: If False the vectors are taken over as they are, e.g. views of already finalized vectors
+                         which may be read-only
+        """
+        self = object.__new__(cls)
+        self.polarization_vectors = vectors
+        if finalize:
+            self._finalize(normalize, normal_form)
+        return self
+
+    def _finalize(self, normalize, normal_form):
+        if normalize:
+            self._normalize()
+        if normal_form:
+            self._make_normal_form()
+        #  truncation for small values
+        real = self.polarization_vectors.real
+        imag = self.polarization_vectors.imag
+        real[np.abs(real) < JonesVectorArray.eps] = 0.0
+        imag[np.abs(imag) < JonesVectorArray.eps] = 0.0
+
+    def plot(self, poincare_sphere_axis, color='r', size=10, **kwargs):
+        """Visualizes all polarizations on the Poincare sphere as a single collection, see plot_polarizations
+
+        """
+        return plot_polarizations(poincare_sphere_axis, self, color=color, size=size, **kwargs)
 
-        super(CircularLeft, self).__init__([1.0, 1.0j])
+    def __repr__(self):
+        return 'JonesVectorArray(%s)' % np.array2string(self.polarization_vectors, separator=', ')
+
+    def __len__(self):
+        return self.polarization_vectors.shape[0]
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, np.integer)):
+            return JonesVector._from_array(self.polarization_vectors[item].reshape(1, 2).copy())
+        elif isinstance(item, (slice, list, np.ndarray)):
+            return JonesVectorArray._from_array(self.polarization_vectors[item], finalize=False)
+        else:
+            raise TypeError('Index needs to be an integer, slice or index array')
+
+    def _normalize(self):
+        norm = np.sqrt(self.intensity)
+        norm[norm == 0.0] = 1.0
+        self.polarization_vectors /= norm[:, np.newaxis]
+
+    def _make_normal_form(self):
+        E_x_abs = np.abs(self.Ex)
+        E_y_abs = np.abs(self.Ey)
+        phi_y_rotated = np.angle(self.Ey) - np.angle(self.Ex)
+        self.polarization_vectors[:, 0] = E_x_abs
+        self.polarization_vectors[:, 1] = E_y_abs * np.exp(1j * phi_y_rotated)
+
+    @property
+    def intensity(self):
+        """Property which returns the intensities of all Jones vectors
+
+        :return: The intensities of the Jones vectors
+        :rtype: np.ndarray of shape (N,)
+        """
+        vectors = self.polarization_vectors
+        return np.sum(vectors.real ** 2 + vectors.imag ** 2, axis=1)
+
+    @property
+    def Ex(self):
+        """Property which returns the x components of the electric fields
+
+        :return: The x components of the electric fields
+        :rtype: np.ndarray of shape (N,)
+        """
+        return self.polarization_vectors[:, 0]
+
+    @property
+    def Ey(self):
+        """Property which returns the y components of the electric fields
+
+        :return: The y components of the electric fields
+        :rtype: np.ndarray of shape (N,)
+        """
+        return self.polarization_vectors[:, 1]
+
+    @property
+    def Stokes(self):
+        """Property which returns the Stokes parameter representation of all polarizations
+
+        :return: Stokes parameters, one row (S0, S1, S2, S3) per Jones vector
+        :rtype: np.ndarray of shape (N, 4)
+        """
+        Ex = self.Ex
+        Ey = self.Ey
+        abs_x = Ex.real ** 2 + Ex.imag ** 2
+        abs_y = Ey.real ** 2 + Ey.imag ** 2
+        cross = Ex * np.conjugate(Ey)
+        stokes = np.empty((len(self), 4), dtype=abs_x.dtype)
+        stokes[:, 0] = abs_x + abs_y
+        stokes[:, 1] = abs_x - abs_y
+        stokes[:, 2] = 2 * cross.real
+        stokes[:, 3] = -2 * cross.imag
+        return stokes
@@ -0,0 +1,75 @@
+"""This module controls the floating point precision in which pyjones stores Jones vectors and matrices. Two policies
+exist:
+
+* 'double' (default): complex128 for complex data and float64 for real valued elements
+* 'single': complex64 for complex data and float32 for real valued elements, which halves the memory
+
+Independent of the policy, elements whose Jones matrix is real (PolarizerHorizontal, PolarizerVertical, Polarizer,
+HalfWavePlate and Rotator) are stored as real arrays, which halves their memory again. Results are promoted by the
+usual NumPy rules only when needed, e.g. a real polarizer applied to a complex vector gives a complex vector of the
+same precision. Objects of different precision can be combined, the result then has the higher precision.
+
+Accuracy contract: in double precision every element and product is accurate to about 1e-15 relative to the largest
+matrix entry. In single precision the relative error of a single element is about 1e-7 and grows at most linearly
+with the number of multiplied elements, i.e. intensities and Stokes parameters after a train of n elements are
+accurate to about n * 1e-7. Single precision is therefore suited for large datasets, not for extinction ratios
+beyond 1e6 or trains of thousands of elements.
+
+"""
+
+from __future__ import print_function
+from contextlib import contextmanager
+import numpy as np
+
+_DTYPES = {'double': (np.dtype(np.complex128), np.dtype(np.float64)),
+           'single': (np.dtype(np.complex64), np.dtype(np.float32))}
+_precision = ['double']
+
+
+def set_precision(precision):
+    """Sets the precision of all Jones vectors and matrices created afterwards
+
+    :param precision: Either 'double' or 'single'
+    """
+    if precision not in _DTYPES:
+        raise ValueError("Precision must be either 'double' or 'single'")
+    _precision[0] = precision
+
+
+def get_precision():
+    """Returns the current precision policy
+
+    :return: Either 'double' or 'single'
+    :rtype: str
+    """
+    return _precision[0]
+
+
+@contextmanager
+def precision(name):
+    """Context manager which sets the precision policy inside a with block and restores the previous one afterwards
+
+    :param name: Either 'double' or 'single'
+    """
+    previous = get_precision()
+    set_precision(name)
+    try:
+        yield
+    finally:
+        set_precision(previous)
+
+
+def complex_dtype():
+    """Returns the complex dtype of the current precision policy
+
+    :rtype: np.dtype
+    """
+    return _DTYPES[_precision[0]][0]
+
+
+def real_dtype():
+    """Returns the real dtype of the current precision policy
+
+    :rtype: np.dtype
+    """
+    return _DTYPES[_precision[0]][1]
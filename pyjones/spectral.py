@@ -0,0 +1,177 @@
+"""This module provides wavelength dependent (dispersive) optical elements. A real waveplate has a fixed thickness and
+a birefringence which depends on the wavelength, so it is a quarter or half wave plate only at its design wavelength.
+The elements in this module are evaluated over a whole array of wavelengths at once and give a JonesMatrixArray
+with one (2, 2) matrix per wavelength. Predefined spectral elements are:
+
+* DispersiveRetarder(angle, thickness, birefringence)
+* TabulatedRetarder(angle, wavelengths, retardances)
+
+A SpectralTrain combines spectral and ordinary elements. Evaluated at a wavelength grid it gives an OpticalTrain
+whose system matrix is the (W, 2, 2) stack of all wavelengths, so a broadband source propagates in a single
+vectorized pass. All lengths, i.e. wavelengths and thicknesses, must be given in the same unit.
+
+Example::
+
+    qwp = DispersiveRetarder.from_design(20, 90, 633.0, birefringence=0.0092)
+    train = SpectralTrain([qwp, PolarizerVertical()])
+    intensities = train.at(np.linspace(400, 800, 2000)).evaluate(LinearHorizontal())
+
+"""
+
+from __future__ import print_function
+from abc import ABC, abstractmethod
+from pyjones.opticalelements import *
+from pyjones.opticaltrain import OpticalTrain
+
+
+def _as_wavelengths(wavelengths):
+    wavelengths = np.asarray(wavelengths, dtype=float)
+    if wavelengths.ndim != 1:
+        raise ValueError('Wavelengths must be a one dimensional array')
+    if np.any(wavelengths <= 0):
+        raise ValueError('Wavelengths must be positive')
+    return wavelengths
+
+
+class SpectralElement(ABC):
+    __slots__ = ('angle',)
+
+    def __init__(self, angle):
+        """This is the baseclass of retarders whose retardance depends on the wavelength. Subclasses implement
+        retardance(wavelengths).
+
+        :param angle: Angle of the fast axis with respect to horizontal plane in degree
+        """
+        self.angle = float(angle)
+
+    @abstractmethod
+    def retardance(self, wavelengths):
+        """Returns the phase retardance in degree for every wavelength
+
+        :param wavelengths: One dimensional array of wavelengths
+        :rtype: np.ndarray of shape (W,)
+        """
+
+    def at(self, wavelengths):
+        """Evaluates the element at all wavelengths at once
+
+        :param wavelengths: One dimensional array of W wavelengths
+        :return: One Jones matrix per wavelength
+        :rtype: JonesMatrixArray of shape (W, 2, 2)
+        """
+        wavelengths = _as_wavelengths(wavelengths)
+        return PhaseRetarder(self.angle, self.retardance(wavelengths))
+
+
+class DispersiveRetarder(SpectralElement):
+    __slots__ = ('thickness', 'birefringence')
+
+    def __init__(self, angle, thickness, birefringence):
+        """This is a subclass of SpectralElement corresponding to a birefringent plate of a given thickness. Its
+        retardance is 360 * birefringence(wavelength) * thickness / wavelength in degree.
+
+        :param angle: Angle of the fast axis with respect to horizontal plane in degree
+        :param thickness: Thickness of the plate in the unit of the wavelengths
+        :param birefringence: Difference of the refractive indices of the slow and the fast axis, either a constant,
+                              a function of the wavelength array, e.g. a Sellmeier fit, or a tuple
+                              (wavelengths, values) which is interpolated linearly
+        """
+        super(DispersiveRetarder, self).__init__(angle)
+        self.thickness = float(thickness)
+        self.birefringence = birefringence
+
+    @classmethod
+    def from_design(cls, angle, retardance, design_wavelength, birefringence):
+        """Creates the plate which has the given retardance at its design wavelength, e.g. a zero order quarter wave
+        plate with from_design(angle, 90, 633.0, birefringence)
+
+        :param angle: Angle of the fast axis with respect to horizontal plane in degree
+        :param retardance: Retardance at the design wavelength in degree, e.g. 90 + 360 for a first order plate
+        :param design_wavelength: The wavelength at which the plate has the given retardance
+        :param birefringence: Birefringence as for DispersiveRetarder
+        :return: DispersiveRetarder
+        """
+        plate = cls(angle, 1.0, birefringence)
+        plate.thickness = retardance / 360.0 * design_wavelength / plate.refractive_index_difference(
+            [design_wavelength])[0]
+        return plate
+
+    def refractive_index_difference(self, wavelengths):
+        """Returns the birefringence for every wavelength
+
+        :param wavelengths: One dimensional array of wavelengths
+        :rtype: np.ndarray of shape (W,)
+        """
+        wavelengths = _as_wavelengths(wavelengths)
+        if callable(self.birefringence):
+            values = self.birefringence(wavelengths)
+        elif isinstance(self.birefringence, tuple):
+            values = np.interp(wavelengths, *self.birefringence)
+        else:
+            values = self.birefringence
+        return np.broadcast_to(np.asarray(values, dtype=float), wavelengths.shape)
+
+    def retardance(self, wavelengths):
+        wavelengths = _as_wavelengths(wavelengths)
+        return 360.0 * self.refractive_index_difference(wavelengths) * self.thickness / wavelengths
+
+    def __repr__(self):
+        return 'DispersiveRetarder(%r, %r, %r)' % (self.angle, self.thickness, self.birefringence)
+
+
+class TabulatedRetarder(SpectralElement):
+    __slots__ = ('wavelengths', 'retardances')
+
+    def __init__(self, angle, wavelengths, retardances):
+        """This is a subclass of SpectralElement corresponding to a retarder with measured retardances, e.g. from the
+        data sheet of an achromatic waveplate. The table is interpolated linearly and held constant outside.
+
+        :param angle: Angle of the fast axis with respect to horizontal plane in degree
+        :param wavelengths: Increasing wavelengths of the table
+        :param retardances: Retardance in degree at each wavelength of the table
+        """
+        super(TabulatedRetarder, self).__init__(angle)
+        self.wavelengths = _as_wavelengths(wavelengths)
+        self.retardances = np.asarray(retardances, dtype=float)
+        if self.retardances.shape != self.wavelengths.shape:
+            raise ValueError('Wavelengths and retardances must have the same length')
+        if np.any(np.diff(self.wavelengths) <= 0):
+            raise ValueError('Wavelengths of the table must be increasing')
+
+    def retardance(self, wavelengths):
+        return np.interp(_as_wavelengths(wavelengths), self.wavelengths, self.retardances)
+
+    def __repr__(self):
+        return 'TabulatedRetarder(%r, %d entries)' % (self.angle, len(self.wavelengths))
+
+
+class SpectralTrain(object):
+    def __init__(self, elements=()):
+        """This represents a sequence of spectral and ordinary optical elements. Ordinary elements are the same for
+        all wavelengths.
+
+        :param elements: An iterable of SpectralElement, JonesMatrix or JonesMatrixArray instances in the order in
+                         which the light passes them. A JonesMatrixArray must hold one matrix per wavelength.
+        """
+        self.elements = list(elements)
+        for element in self.elements:
+            if not isinstance(element, (SpectralElement, JonesMatrix, JonesMatrixArray)):
+                raise TypeError('Elements must be SpectralElement, JonesMatrix or JonesMatrixArray')
+
+    def __repr__(self):
+        return 'SpectralTrain(%r)' % self.elements
+
+    def __len__(self):
+        return len(self.elements)
+
+    def at(self, wavelengths):
+        """Evaluates every spectral element at all wavelengths
+
+        :param wavelengths: One dimensional array of W wavelengths
+        :return: The train at these wavelengths, its system matrix has the shape (W, 2, 2). Multiplied with a
+                 JonesVector it gives a JonesVectorArray with one output polarization per wavelength.
+        :rtype: OpticalTrain
+        """
+        wavelengths = _as_wavelengths(wavelengths)
+        return OpticalTrain([element.at(wavelengths) if isinstance(element, SpectralElement) else element
+                             for element in self.elements])
@@ -0,0 +1,248 @@
+"""This module provides a binary container format for polarization datasets. A file consists of a short magic string,
+a JSON header holding the kind of data, the dtype and the shape of a single record, and the raw contiguous records.
+The data starts at an aligned offset, so it can be opened with np.memmap without deserializing anything: a dataset of
+millions of Jones vectors is available immediately and only the pages actually accessed are read from disk.
+
+Three kinds of data are stored:
+
+* 'vectors': JonesVector and JonesVectorArray, loaded as JonesVectorArray
+* 'matrices': JonesMatrix and JonesMatrixArray, loaded as JonesMatrixArray
+* 'train': OpticalTrain, e.g. a library of elements, loaded as OpticalTrain
+
+The number of records is not part of the header but follows from the file size. A DatasetWriter can therefore
+append records to an existing file while other processes read the records already written.
+
+Example::
+
+    with DatasetWriter('states.pyj', 'vectors') as writer:
+        for chunk in stream(system, acquisition()):
+            writer.write(chunk)
+    states = load('states.pyj')  # memory mapped JonesVectorArray
+
+"""
+
+from __future__ import print_function
+import json
+import os
+import struct
+from pyjones import opticalelements
+from pyjones.opticalelements import *
+from pyjones.opticaltrain import OpticalTrain
+from pyjones.precision import complex_dtype
+
+_MAGIC = b'PYJONES1'
+_ALIGNMENT = 64
+_RECORD_SHAPES = {'vectors': (2,), 'matrices': (2, 2), 'train': (2, 2)}
+
+
+def _write_header(handle, header):
+    text = json.dumps(header, sort_keys=True).encode('utf-8')
+    prefix = len(_MAGIC) + 8
+    text += b' ' * (-(prefix + len(text)) % _ALIGNMENT)
+    handle.write(_MAGIC)
+    handle.write(struct.pack('<Q', len(text)))
+    handle.write(text)
+
+
+def _read_header(handle):
+    if handle.read(len(_MAGIC)) != _MAGIC:
+        raise ValueError('Not a pyjones dataset')
+    length, = struct.unpack('<Q', handle.read(8))
+    header = json.loads(handle.read(length).decode('utf-8'))
+    header['offset'] = len(_MAGIC) + 8 + length
+    return header
+
+
+def read_header(path):
+    """Reads the header of a dataset without touching the data
+
+    :param path: Path of the dataset
+    :return: The header with the keys 'kind', 'dtype', 'shape' (including the number of records), 'offset' and
+             'metadata', for trains additionally 'elements'
+    :rtype: dict
+    """
+    with open(path, 'rb') as handle:
+        header = _read_header(handle)
+    record_shape = _RECORD_SHAPES[header['kind']]
+    record_size = np.dtype(header['dtype']).itemsize * int(np.prod(record_shape))
+    # an incomplete last record of an interrupted writer is ignored
+    count = (os.path.getsize(path) - header['offset']) // record_size
+    header['shape'] = (count,) + record_shape
+    return header
+
+
+def _records(obj, kind):
+    if kind == 'vectors':
+        if isinstance(obj, JonesVector):
+            return obj.polarization_vector
+        elif isinstance(obj, JonesVectorArray):
+            return obj.polarization_vectors
+    elif kind == 'matrices':
+        if isinstance(obj, JonesMatrix):
+            return obj.matrix[np.newaxis]
+        elif isinstance(obj, JonesMatrixArray):
+            return obj.matrices
+    record_shape = _RECORD_SHAPES[kind]
+    if isinstance(obj, np.ndarray) and obj.shape[-len(record_shape):] == record_shape:
+        return obj.reshape((-1,) + record_shape)
+    raise TypeError('Can not store %s as %s' % (type(obj).__name__, kind))
+
+
+def _describe(element):
+    if isinstance(element, JonesMatrixArray):
+        return {'type': 'JonesMatrixArray', 'count': len(element)}
+    name = type(element).__name__
+    if name in opticalelements.__dict__ and getattr(opticalelements, name) is type(element) and \
+            type(element) is not JonesMatrix:
+        parameters = list(element.__getnewargs__()) if isinstance(element, ParametrizedJonesMatrix) else []
+        return {'type': name, 'parameters': parameters, 'count': 1}
+    return {'type': 'JonesMatrix', 'count': 1}
+
+
+def _train_records(train):
+    matrices = [element.matrix[np.newaxis] if isinstance(element, JonesMatrix) else element.matrices
+                for element in train]
+    if not matrices:
+        return np.empty((0, 2, 2), dtype=complex_dtype())
+    return np.concatenate(matrices)
+
+
+def save(path, obj, metadata=None):
+    """Stores Jones vectors, Jones matrices or an optical train in a dataset, overwriting an existing file
+
+    :param path: Path of the dataset
+    :param obj: JonesVector, JonesVectorArray, JonesMatrix, JonesMatrixArray or OpticalTrain
+    :param metadata: Optional JSON serializable object stored in the header, e.g. a description of the acquisition
+    """
+    header = {'metadata': metadata}
+    if isinstance(obj, (JonesVector, JonesVectorArray)):
+        header['kind'] = 'vectors'
+        records = _records(obj, 'vectors')
+    elif isinstance(obj, (JonesMatrix, JonesMatrixArray)):
+        header['kind'] = 'matrices'
+        records = _records(obj, 'matrices')
+    elif isinstance(obj, OpticalTrain):
+        header['kind'] = 'train'
+        header['elements'] = [_describe(element) for element in obj]
+        records = _train_records(obj)
+    else:
+        raise TypeError('Can only store Jones vectors, Jones matrices or an OpticalTrain')
+    header['dtype'] = records.dtype.str
+    with open(path, 'wb') as handle:
+        _write_header(handle, header)
+        np.ascontiguousarray(records).tofile(handle)
+
+
+def _element(description, matrices):
+    if description['type'] == 'JonesMatrixArray':
+        return JonesMatrixArray._from_array(matrices)
+    if description['type'] == 'JonesMatrix':
+        return JonesMatrix._from_array(matrices[0])
+    cls = getattr(opticalelements, description['type'], None)
+    if not (isinstance(cls, type) and issubclass(cls, JonesMatrix)):
+        raise ValueError('Unknown element type %s' % description['type'])
+    return cls(*description['parameters'])
+
+
+def load(path, mmap_mode='r'):
+    """Opens a dataset. With memory mapping the data is not read but accessed directly from the file, which makes
+    opening independent of the size of the dataset and allows random access to single records.
+
+    :param path: Path of the dataset
+    :param mmap_mode: Mode of np.memmap, i.e. 'r' (read-only), 'r+' (writable) or 'c' (copy on write), or None to
+                      read the whole dataset into memory
+    :return: JonesVectorArray or JonesMatrixArray keeping the stored dtype, or OpticalTrain whose predefined
+             elements are reconstructed from their parameters
+    """
+    header = read_header(path)
+    dtype = np.dtype(header['dtype'])
+    if header['shape'][0] == 0:
+        data = np.empty(header['shape'], dtype=dtype)
+    elif mmap_mode is None:
+        with open(path, 'rb') as handle:
+            handle.seek(header['offset'])
+            data = np.fromfile(handle, dtype=dtype, count=int(np.prod(header['shape']))).reshape(header['shape'])
+    else:
+        data = np.memmap(path, dtype=dtype, mode=mmap_mode, offset=header['offset'],
+                         shape=header['shape']).view(np.ndarray)
+    if header['kind'] == 'vectors':
+        # the stored vectors are already finalized and a read-only memory map must not be written to
+        return JonesVectorArray._from_array(data, finalize=False)
+    elif header['kind'] == 'matrices':
+        return JonesMatrixArray._from_array(data)
+    elements = []
+    start = 0
+    for description in header['elements']:
+        elements.append(_element(description, data[start:start + description['count']]))
+        start += description['count']
+    return OpticalTrain(elements)
+
+
+class DatasetWriter(object):
+    def __init__(self, path, kind='vectors', dtype=None, append=False, metadata=None):
+        """This writes a dataset record by record, e.g. from a stream of measurements. Every write is appended to
+        the file directly, so the memory stays bounded. Records are buffered, readers see all records written up to
+        the last flush or close.
+
+        :param path: Path of the dataset
+        :param kind: Either 'vectors' or 'matrices'
+        :param dtype: Dtype of the records, defaults to the complex dtype of the precision policy of
+                      pyjones.precision. When appending it defaults to the dtype of the existing file. Vectors
+                      require a complex dtype.
+        :param append: If True and the file exists, new records are appended to it. Otherwise the file is created
+                       or overwritten.
+        :param metadata: Optional JSON serializable object stored in the header of a new file
+        """
+        if kind not in ('vectors', 'matrices'):
+            raise ValueError("Kind must be either 'vectors' or 'matrices'")
+        if kind == 'vectors' and dtype is not None and np.dtype(dtype).kind != 'c':
+            # a real dtype would silently drop the phases of the vectors
+            raise ValueError('Vectors require a complex dtype, not %s' % np.dtype(dtype))
+        self.path = path
+        self.kind = kind
+        if append and os.path.exists(path):
+            header = read_header(path)
+            if header['kind'] != kind:
+                raise ValueError('Can not append %s to a dataset of %s' % (kind, header['kind']))
+            if dtype is not None and np.dtype(dtype) != np.dtype(header['dtype']):
+                raise ValueError('Dtype %s does not match the dataset dtype %s' % (np.dtype(dtype), header['dtype']))
+            self.dtype = np.dtype(header['dtype'])
+            self._handle = open(path, 'r+b')
+            # drops an incomplete last record of an interrupted writer
+            self._handle.truncate(header['offset'] + header['shape'][0] * self._record_size())
+            self._handle.seek(0, os.SEEK_END)
+        else:
+            self.dtype = np.dtype(dtype or complex_dtype())
+            self._handle = open(path, 'wb')
+            _write_header(self._handle, {'kind': kind, 'dtype': self.dtype.str, 'metadata': metadata})
+
+    def _record_size(self):
+        return self.dtype.itemsize * int(np.prod(_RECORD_SHAPES[self.kind]))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, obj):
+        """Appends records to the dataset
+
+        :param obj: JonesVector or JonesVectorArray for vectors, JonesMatrix or JonesMatrixArray for matrices, or an
+                    array of shape (N, 2) or (N, 2, 2). Complex records can not be written to a real dataset.
+        """
+        records = _records(obj, self.kind)
+        if not np.can_cast(records.dtype, self.dtype, 'same_kind'):
+            # casting would silently drop the imaginary parts and corrupt the dataset
+            raise TypeError('Can not store records of dtype %s in a dataset of dtype %s' % (records.dtype, self.dtype))
+        records = np.ascontiguousarray(records, dtype=self.dtype)
+        records.tofile(self._handle)
+
+    def flush(self):
+        """Makes all records written so far visible to readers of the file"""
+        self._handle.flush()
+
+    def close(self):
+        """Flushes and closes the file"""
+        if not self._handle.closed:
+            self._handle.close()
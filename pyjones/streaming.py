@@ -0,0 +1,78 @@
+"""This module provides the propagation of unbounded streams of polarization samples through a fixed optical system.
+The samples are collected into chunks of a fixed size which are propagated with a single NumPy call each, so an
+endless stream is processed at vectorized speed while the memory stays bounded by the chunk size.
+
+Example::
+
+    for intensities in stream(OpticalTrain([QuarterWavePlate(20), PolarizerVertical()]), acquisition(),
+                              quantity='intensity', chunk_size=4096):
+        store(intensities)
+
+"""
+
+from __future__ import print_function
+from pyjones.opticalelements import *
+from pyjones.opticaltrain import OpticalTrain, _intensity, _stokes
+from pyjones.precision import complex_dtype
+
+
+def _sample_vectors(sample):
+    if isinstance(sample, JonesVector):
+        return sample.polarization_vector
+    elif isinstance(sample, JonesVectorArray):
+        return sample.polarization_vectors
+    vectors = np.asarray(sample, dtype=complex_dtype())
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    if vectors.ndim != 2 or vectors.shape[1] != 2:
+        raise ValueError('Samples must be Jones vectors or arrays of shape (2,) or (N, 2)')
+    return vectors
+
+
+def stream(system, samples, quantity='vector', chunk_size=4096):
+    """Propagates a stream of polarization samples through an optical system chunk by chunk
+
+    :param system: JonesMatrix or OpticalTrain, its system matrix is composed once when the stream starts
+    :param samples: An iterable of JonesVector, JonesVectorArray or arrays of shape (2,) or (N, 2). Arrays are taken
+                    as they are, i.e. not normalized.
+    :param quantity: Either 'vector' for JonesVectorArray outputs, 'intensity' or 'Stokes'
+    :param chunk_size: Number of samples propagated at once. Every chunk except the last one has exactly this size.
+    :return: A generator yielding one JonesVectorArray or array of shape (n,) or (n, 4) per chunk
+    """
+    if quantity not in ('vector', 'intensity', 'Stokes'):
+        raise ValueError("Quantity must be either 'vector', 'intensity' or 'Stokes'")
+    if chunk_size < 1:
+        raise ValueError('chunk_size must be positive')
+    if isinstance(system, OpticalTrain):
+        matrix = system.matrix
+    elif isinstance(system, JonesMatrix):
+        matrix = system.matrix
+    else:
+        raise TypeError('System must be JonesMatrix or OpticalTrain')
+    if matrix.shape != (2, 2):
+        raise ValueError('The system must consist of single elements, not of element arrays')
+    # the propagation is done as row vectors times the transposed matrix, which avoids a copy of every chunk
+    transposed = np.ascontiguousarray(matrix.T)
+
+    def propagate(vectors):
+        fields = np.dot(vectors, transposed)
+        if quantity == 'intensity':
+            return _intensity(fields)
+        elif quantity == 'Stokes':
+            return _stokes(fields)
+        return JonesVectorArray._from_array(fields, normal_form=True)
+
+    buffer = np.empty((chunk_size, 2), dtype=complex_dtype())
+    filled = 0
+    for sample in samples:
+        vectors = _sample_vectors(sample)
+        while len(vectors):
+            count = min(chunk_size - filled, len(vectors))
+            buffer[filled:filled + count] = vectors[:count]
+            vectors = vectors[count:]
+            filled += count
+            if filled == chunk_size:
+                yield propagate(buffer)
+                filled = 0
+    if filled:
+        yield propagate(buffer[:filled])
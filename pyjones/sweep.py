@@ -0,0 +1,156 @@
+"""This module provides parameter sweeps over multi-dimensional grids. An optical setup with named free parameters is
+evaluated for every point of the outer product of the parameter axes. The grid is split into chunks which are
+evaluated vectorized, optionally in a thread or process pool. The results of a process pool are written directly
+into a shared memory array, so no result data is pickled. The order of the results does not depend on the chunking
+or on the executor.
+
+Example::
+
+    template = Template([(QuarterWavePlate, 'qwp'), (HalfWavePlate, 'hwp'), (Polarizer, 0.0)])
+    intensities = sweep(template, {'qwp': np.linspace(0, 180, 200), 'hwp': np.linspace(0, 90, 100)},
+                        LinearHorizontal(), executor='process')
+    intensities.shape  # (200, 100)
+
+"""
+
+from __future__ import print_function
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import os
+from pyjones.opticalelements import *
+from pyjones.opticaltrain import OpticalTrain, _as_vectors, _intensity, _stokes, _system_matrices
+from pyjones.precision import complex_dtype, real_dtype
+
+
+class Template(object):
+    def __init__(self, elements):
+        """This describes an optical setup with named free parameters. It can be pickled, so unlike an arbitrary
+        function it can be used with a process pool.
+
+        :param elements: A list of tuples (element class, parameter, ...) in the order in which the light passes
+                         the elements. A string parameter is a free parameter of that name, any other value is kept
+                         fixed, e.g. [(QuarterWavePlate, 'a'), (PhaseRetarder, 'b', 45.0), (PolarizerVertical,)]
+        """
+        self.elements = [tuple(element) for element in elements]
+
+    def __repr__(self):
+        return 'Template(%r)' % self.elements
+
+    @property
+    def parameters(self):
+        """Property which returns the names of the free parameters in order of appearance
+
+        :rtype: list
+        """
+        names = []
+        for element in self.elements:
+            for parameter in element[1:]:
+                if isinstance(parameter, str) and parameter not in names:
+                    names.append(parameter)
+        return names
+
+    def __call__(self, **parameters):
+        """Builds the system for arrays of parameter values
+
+        :param parameters: One array per free parameter, all of the same length
+        :return: The system matrix for every set of parameters
+        :rtype: JonesMatrix or JonesMatrixArray
+        """
+        elements = []
+        for element in self.elements:
+            arguments = [parameters[argument] if isinstance(argument, str) else argument for argument in element[1:]]
+            elements.append(element[0](*arguments))
+        return OpticalTrain(elements).system
+
+
+def _evaluate_chunk(template, names, axes, vectors, quantity, start, stop):
+    indices = np.unravel_index(np.arange(start, stop), tuple(len(axis) for axis in axes))
+    parameters = dict((name, axis[index]) for name, axis, index in zip(names, axes, indices))
+    matrices = _system_matrices(template(**parameters), 'The result of the template')
+    matrices = np.broadcast_to(matrices, (stop - start, 2, 2))
+    if vectors.ndim == 2:
+        matrices = matrices[:, np.newaxis]
+    fields = np.matmul(matrices, vectors[..., np.newaxis])[..., 0]
+    if quantity == 'intensity':
+        return _intensity(fields)
+    elif quantity == 'Stokes':
+        return _stokes(fields)
+    else:
+        return fields
+
+
+def _evaluate_chunk_into(out, template, names, axes, vectors, quantity, start, stop):
+    out[start:stop] = _evaluate_chunk(template, names, axes, vectors, quantity, start, stop)
+
+
+def _evaluate_chunk_shared(memory_name, shape, dtype, template, names, axes, vectors, quantity, start, stop):
+    from multiprocessing import shared_memory
+    memory = shared_memory.SharedMemory(name=memory_name)
+    try:
+        out = np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+        _evaluate_chunk_into(out, template, names, axes, vectors, quantity, start, stop)
+        del out
+    finally:
+        memory.close()
+
+
+def sweep(template, grid, state, quantity='intensity', executor=None, max_workers=None, chunk_size=65536):
+    """Evaluates an optical setup on the outer product of parameter axes
+
+    :param template: A Template or a function which takes one keyword array per free parameter and returns a
+                     JonesMatrix, JonesMatrixArray or OpticalTrain. For a process pool the function must be
+                     picklable, i.e. defined at module level.
+    :param grid: Mapping of parameter names to one dimensional arrays of values. The order of the mapping defines
+                 the order of the axes of the result.
+    :param state: JonesVector or JonesVectorArray entering the setup. The states of a JonesVectorArray form an
+                  additional last axis of the grid.
+    :param quantity: Either 'intensity', 'Stokes' or 'vector' for the output Jones vectors
+    :param executor: None for a serial evaluation in the calling thread, 'thread' or 'process' (Python 3.8+)
+    :param max_workers: Number of workers of the pool, defaults to the number of CPUs
+    :param chunk_size: Number of grid points evaluated at once by one worker
+    :return: The results with shape (len(axis_1), ..., len(axis_n)[, N]) followed by (4,) for the Stokes
+             parameters or (2,) for the Jones vectors
+    :rtype: np.ndarray
+    """
+    if quantity not in ('intensity', 'Stokes', 'vector'):
+        raise ValueError("Quantity must be either 'intensity', 'Stokes' or 'vector'")
+    if executor not in (None, 'thread', 'process'):
+        raise ValueError("Executor must be either None, 'thread' or 'process'")
+    if chunk_size < 1:
+        raise ValueError('chunk_size must be positive')
+    grid = OrderedDict(grid)
+    names = list(grid.keys())
+    axes = [np.asarray(axis, dtype=float).ravel() for axis in grid.values()]
+    vectors = _as_vectors(state)
+    grid_shape = tuple(len(axis) for axis in axes)
+    size = int(np.prod(grid_shape))
+    trailing = vectors.shape[:-1] + {'intensity': (), 'Stokes': (4,), 'vector': (2,)}[quantity]
+    dtype = complex_dtype() if quantity == 'vector' else real_dtype()
+    shape = (size,) + trailing
+    chunks = [(start, min(start + chunk_size, size)) for start in range(0, size, chunk_size)]
+    max_workers = max_workers or os.cpu_count() or 1
+
+    if executor is None:
+        out = np.empty(shape, dtype=dtype)
+        for start, stop in chunks:
+            _evaluate_chunk_into(out, template, names, axes, vectors, quantity, start, stop)
+    elif executor == 'thread':
+        out = np.empty(shape, dtype=dtype)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for future in [pool.submit(_evaluate_chunk_into, out, template, names, axes, vectors, quantity, start,
+                                       stop) for start, stop in chunks]:
+                future.result()
+    else:
+        # shared memory requires Python 3.8, so it is only imported by the process executor
+        from multiprocessing import shared_memory
+        memory = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1))
+        try:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                for future in [pool.submit(_evaluate_chunk_shared, memory.name, shape, dtype, template, names, axes,
+                                           vectors, quantity, start, stop) for start, stop in chunks]:
+                    future.result()
+            out = np.ndarray(shape, dtype=dtype, buffer=memory.buf).copy()
+        finally:
+            memory.close()
+            memory.unlink()
+    return out.reshape(grid_shape + trailing)
@@ -0,0 +1,204 @@
+"""This module provides a Monte Carlo tolerance analysis of optical trains. The parameters of the elements, e.g. the
+angles of waveplates or their retardances, are perturbed by random errors and the output polarization is computed for
+every sample. All perturbations of a chunk of samples are drawn as arrays and propagated as one batch with
+pyjones.kernels.propagate, so no element is rebuilt per sample. The working memory is bounded by the chunk size,
+only the four output Stokes parameters are kept for every sample.
+
+The perturbable parameters of an element follow from its structure: polarizers and rotators have an 'angle',
+retarders, i.e. quarter and half wave plates and PhaseRetarder, have 'angle', 'eta' and 'phase'. A quarter wave plate
+with a retardance error is thus a PhaseRetarder(angle, 90 + error, 90). Other parametrized elements have their own
+parameters and generic JonesMatrix elements are not perturbed.
+
+Example::
+
+    train = OpticalTrain([Polarizer(0), QuarterWavePlate(45), HalfWavePlate(10), PolarizerVertical()])
+    result = tolerance_analysis(train, {'angle': Normal(0.2), 'eta': Normal(0.01, relative=True)},
+                                LinearHorizontal(), samples=100000, seed=1)
+    result.summary()['intensity']['percentiles']
+
+"""
+
+from __future__ import print_function
+from pyjones.opticalelements import *
+from pyjones.kernels import propagate
+from pyjones.precision import real_dtype
+
+_STRUCTURES = {'polarizer': (Polarizer, ('angle',)),
+               'rotator': (Rotator, ('angle',)),
+               'retarder': (PhaseRetarder, ('angle', 'eta', 'phase'))}
+
+
+class Normal(object):
+    def __init__(self, sigma, relative=False):
+        """This describes normally distributed errors of a parameter
+
+        :param sigma: Standard deviation of the error in degree, or as fraction of the nominal value if relative
+        :param relative: If True the error scales with the nominal value, e.g. Normal(0.01, relative=True) is 1%
+        """
+        self.sigma = float(sigma)
+        self.relative = relative
+
+    def __repr__(self):
+        return 'Normal(%r, relative=%r)' % (self.sigma, self.relative)
+
+    def draw(self, generator, nominal, size):
+        """Draws perturbed values of a parameter
+
+        :param generator: np.random.Generator
+        :param nominal: Nominal value of the parameter
+        :param size: Number of values
+        :rtype: np.ndarray of shape (size,)
+        """
+        scale = self.sigma * abs(nominal) if self.relative else self.sigma
+        return nominal + scale * generator.standard_normal(size)
+
+
+class Uniform(object):
+    def __init__(self, limit, relative=False):
+        """This describes uniformly distributed errors between -limit and limit, e.g. a mounting tolerance
+
+        :param limit: Largest error in degree, or as fraction of the nominal value if relative
+        :param relative: If True the error scales with the nominal value
+        """
+        self.limit = float(limit)
+        self.relative = relative
+
+    def __repr__(self):
+        return 'Uniform(%r, relative=%r)' % (self.limit, self.relative)
+
+    def draw(self, generator, nominal, size):
+        """Draws perturbed values of a parameter
+
+        :param generator: np.random.Generator
+        :param nominal: Nominal value of the parameter
+        :param size: Number of values
+        :rtype: np.ndarray of shape (size,)
+        """
+        scale = self.limit * abs(nominal) if self.relative else self.limit
+        return nominal + scale * generator.uniform(-1.0, 1.0, size)
+
+
+def _nominal(element):
+    """Returns the element class, the parameter names and the nominal values of an element or None if it is fixed"""
+    structure = element._structure() if isinstance(element, JonesMatrix) else None
+    if structure is not None:
+        cls, names = _STRUCTURES[structure[0]]
+        return cls, names, tuple(structure[1:])
+    elif isinstance(element, ParametrizedJonesMatrix):
+        return type(element), element.parameters, element.parameter_values
+    return None
+
+
+class ToleranceResult(object):
+    def __init__(self, stokes, parameters):
+        """This holds the output Stokes vectors of all samples of a tolerance analysis
+
+        :param stokes: Output Stokes vectors, array of shape (N, 4)
+        :param parameters: The perturbed parameters as (element index, parameter name) pairs
+        """
+        self.stokes = stokes
+        self.parameters = parameters
+
+    def __repr__(self):
+        return 'ToleranceResult(%d samples, %d perturbed parameters)' % (len(self.stokes), len(self.parameters))
+
+    def __len__(self):
+        return len(self.stokes)
+
+    @property
+    def intensity(self):
+        """Property which returns the output intensity of every sample
+
+        :rtype: np.ndarray of shape (N,)
+        """
+        return self.stokes[:, 0]
+
+    @property
+    def mean_stokes(self):
+        """Property which returns the mean Stokes vector, i.e. the incoherent sum of all samples divided by N
+
+        :rtype: np.ndarray of shape (4,)
+        """
+        return self.stokes.mean(axis=0)
+
+    @property
+    def degree_of_polarization(self):
+        """Property which returns the degree of polarization of the mean Stokes vector. It is below one if the errors
+        scatter the output polarization.
+
+        :rtype: float
+        """
+        mean = self.mean_stokes
+        return float(np.sqrt(np.sum(mean[1:] ** 2)) / mean[0]) if mean[0] > 0 else 0.0
+
+    def summary(self, percentiles=(5, 50, 95)):
+        """Returns mean, standard deviation and percentiles of the intensity and the Stokes parameters
+
+        :param percentiles: Percentiles between 0 and 100
+        :return: A dict with the keys 'intensity', 'S1', 'S2', 'S3' holding dicts with the keys 'mean', 'std' and
+                 'percentiles' (a dict from percentile to value), and 'degree_of_polarization'
+        :rtype: dict
+        """
+        values = np.percentile(self.stokes, percentiles, axis=0)
+        summary = {}
+        for column, name in enumerate(('intensity', 'S1', 'S2', 'S3')):
+            summary[name] = {'mean': float(self.stokes[:, column].mean()),
+                             'std': float(self.stokes[:, column].std()),
+                             'percentiles': dict((percentile, float(value))
+                                                 for percentile, value in zip(percentiles, values[:, column]))}
+        summary['degree_of_polarization'] = self.degree_of_polarization
+        return summary
+
+
+def tolerance_analysis(train, errors, state, samples=10000, seed=None, chunk_size=65536, backend=None):
+    """Propagates a polarization through randomly perturbed copies of an optical train
+
+    :param train: OpticalTrain or list of elements in the order in which the light passes them
+    :param errors: Mapping of parameters to error distributions like Normal or Uniform. A key is either a parameter
+                   name, which applies to all elements having that parameter, or an (element index, parameter name)
+                   pair, which takes precedence.
+    :param state: JonesVector entering the train
+    :param samples: Number of Monte Carlo samples
+    :param seed: Seed of the random numbers. Every perturbed parameter draws from its own random stream, so the
+                 result depends only on the seed and not on the chunk size.
+    :param chunk_size: Number of samples propagated at once
+    :param backend: Backend of pyjones.kernels.propagate, defaults to the fastest available
+    :return: The output Stokes vectors of all samples
+    :rtype: ToleranceResult
+    """
+    if not isinstance(state, JonesVector):
+        raise TypeError('State must be JonesVector')
+    if chunk_size < 1:
+        raise ValueError('chunk_size must be positive')
+    elements = list(train)
+    if not all(isinstance(element, JonesMatrix) for element in elements):
+        raise TypeError('Elements must be JonesMatrix instances, not arrays of elements')
+    nominals = [_nominal(element) for element in elements]
+    perturbed = []
+    for index, nominal in enumerate(nominals):
+        if nominal is None:
+            continue
+        for name, value in zip(nominal[1], nominal[2]):
+            distribution = errors.get((index, name), errors.get(name))
+            if distribution is not None:
+                perturbed.append((index, name, value, distribution))
+    used = set((index, name) for index, name, _, _ in perturbed) | set(name for _, name, _, _ in perturbed)
+    unknown = [key for key in errors if key not in used]
+    if unknown:
+        raise KeyError('No perturbable parameter %s' % (unknown,))
+    if any(nominal is not None and nominal[0] not in (Polarizer, Rotator, PhaseRetarder) for nominal in nominals):
+        # user defined elements are only supported by the NumPy backend
+        backend = 'numpy'
+    generators = [np.random.Generator(np.random.PCG64(sequence))
+                  for sequence in np.random.SeedSequence(seed).spawn(len(perturbed))]
+    stokes = np.empty((samples, 4), dtype=real_dtype())
+    for start in range(0, samples, chunk_size):
+        size = min(chunk_size, samples - start)
+        values = [list(nominal[2]) if nominal is not None else None for nominal in nominals]
+        for generator, (index, name, value, distribution) in zip(generators, perturbed):
+            values[index][nominals[index][1].index(name)] = distribution.draw(generator, value, size)
+        chunk = [element if nominal is None else (nominal[0],) + tuple(np.broadcast_to(value, (size,))
+                                                                       for value in parameters)
+                 for element, nominal, parameters in zip(elements, nominals, values)]
+        stokes[start:start + size] = propagate(chunk, state, 'Stokes', backend=backend)
+    return ToleranceResult(stokes, [(index, name) for index, name, _, _ in perturbed])
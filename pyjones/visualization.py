@@ -0,0 +1,129 @@
+"""This module provides the visualization of polarizations on the Poincare sphere. It is the only module of pyjones
+which depends on matplotlib and is therefore not imported by the numeric modules. The plotting shortcuts in
+pyjones.polarizations import it on first use.
+
+"""
+
+from __future__ import print_function
+
+from mpl_toolkits.mplot3d import Axes3D
+import matplotlib.pyplot as plt
+import numpy as np
+from pyjones.polarizations import JonesVector, JonesVectorArray
+
+
+def get_Poincare_sphere():
+    """Sets up a figure and a matplotlib axes instance with a Poincare sphere on which a polarization can be plotted
+
+    :return: matplotlib.ax
+    """
+    fig = plt.figure()
+    ax = fig.add_subplot(111, projection='3d')
+    u = np.linspace(-np.pi, np.pi, 50)
+    v = np.linspace(0, np.pi, 50)
+    x = np.outer(np.cos(u), np.sin(v))
+    y = np.outer(np.sin(u), np.sin(v))
+    z = np.outer(np.ones(np.size(u)), np.cos(v))
+    ax.plot_surface(x, y, z, rstride=5, cstride=5,
+                    color='#c0c0c0', alpha=0.1)
+    ax.plot_wireframe(x, y, z, rstride=5, cstride=5,
+                      color='grey',
+                      alpha=0.2)
+    ax.plot(np.cos(u), np.sin(u), zdir='z', lw=1, color='grey')
+    ax.plot(np.cos(u), np.sin(u), zdir='x', lw=1, color='grey')
+    ax.plot(np.cos(u), np.sin(u), zdir='y', lw=1, color='grey')
+    style = {'fontsize': 16,
+             'horizontalalignment': 'center',
+             'verticalalignment': 'center'}
+    ax.text(0, 1.1, 0, 'D', **style)
+    ax.text(0, -1.1, 0, 'A', **style)
+    ax.text(1.1, 0, 0, 'H', **style)
+    ax.text(-1.1, 0, 0, 'V', **style)
+    ax.text(0, 0, 1.1, 'L', **style)
+    ax.text(0, 0, -1.1, 'R', **style)
+    ax.set_axis_off()
+    if hasattr(ax, 'set_box_aspect'):
+        ax.set_box_aspect((1, 1, 1))
+    else:
+        ax.set_aspect(0.95)
+    return fig, ax
+
+
+def _poincare_points(states):
+    """Converts polarizations into normalized points (S1, S2, S3) / S0 on the Poincare sphere. Returns the points
+    and the mask of the given states which have a point, i.e. a positive intensity."""
+    if isinstance(states, JonesVectorArray):
+        stokes = states.Stokes
+    elif isinstance(states, np.ndarray):
+        stokes = states
+    else:
+        stokes = np.array([state.Stokes if isinstance(state, JonesVector) else state for state in states],
+                          dtype=float)
+    if stokes.ndim != 2 or stokes.shape[1] not in (3, 4):
+        raise ValueError('Stokes array must have shape (N, 4) or (N, 3)')
+    if stokes.shape[1] == 3:
+        return stokes, np.ones(len(stokes), dtype=bool)
+    valid = stokes[:, 0] > 0
+    return stokes[valid, 1:] / stokes[valid, :1], valid
+
+
+def _density_bins(points, bins):
+    """Bins points on the sphere into an azimuth/elevation grid and returns the occupied bin centers and counts"""
+    azimuth = np.arctan2(points[:, 1], points[:, 0])
+    elevation = np.arcsin(np.clip(points[:, 2], -1.0, 1.0))
+    counts, azimuth_edges, elevation_edges = np.histogram2d(azimuth, elevation, bins=(2 * bins, bins),
+                                                            range=[[-np.pi, np.pi], [-np.pi / 2, np.pi / 2]])
+    azimuth_index, elevation_index = np.nonzero(counts)
+    azimuth = (azimuth_edges[azimuth_index] + azimuth_edges[azimuth_index + 1]) / 2
+    elevation = (elevation_edges[elevation_index] + elevation_edges[elevation_index + 1]) / 2
+    centers = np.column_stack([np.cos(elevation) * np.cos(azimuth), np.cos(elevation) * np.sin(azimuth),
+                               np.sin(elevation)])
+    return centers, counts[azimuth_index, elevation_index]
+
+
+def plot_polarizations(poincare_sphere_axis, states, color='r', size=10, cmap=None, trajectory=False,
+                       max_points=10000, reduction='downsample', bins=60):
+    """Visualizes many polarizations on the Poincare sphere with a single scatter call
+
+    :param poincare_sphere_axis: The axis as returned by get_Poincare_sphere
+    :param states: A JonesVectorArray, an iterable of JonesVector or an array of Stokes parameters with shape
+                   (N, 4). An array of shape (N, 3) is taken as points on the sphere directly.
+    :param color: A single color or an array of N values which are mapped to colors with cmap. States with zero
+                  intensity are not plotted.
+    :param size: Size of the markers
+    :param cmap: Colormap used for per-point color values
+    :param trajectory: If True the points are additionally connected by a line in the given order
+    :param max_points: If more points are given they are reduced according to reduction
+    :param reduction: Either 'downsample', which plots every k-th point, or 'density', which bins the points on
+                      the sphere and plots one marker per occupied bin colored by the number of points in it
+    :param bins: Number of elevation bins used for the density reduction, twice as many are used in azimuth
+    :return: The created collection
+    """
+    if reduction not in ('downsample', 'density'):
+        raise ValueError("reduction must be either 'downsample' or 'density'")
+    points, valid = _poincare_points(states)
+    colors = color
+    if not isinstance(color, str) and np.ndim(color) > 0 and len(color) == len(valid):
+        # states without intensity have no point, so their colors are dropped as well
+        colors = np.asarray(color)[valid]
+    path = points
+    if len(points) > max_points and reduction == 'density':
+        points, colors = _density_bins(points, bins)
+        path = None
+    elif len(points) > max_points:
+        stride = int(np.ceil(len(points) / float(max_points)))
+        points = points[::stride]
+        if isinstance(colors, np.ndarray):
+            colors = colors[::stride]
+        path = points
+    if trajectory and path is not None:
+        poincare_sphere_axis.plot(path[:, 0], path[:, 1], path[:, 2], lw=1,
+                                  color=color if isinstance(colors, str) else 'grey')
+    return poincare_sphere_axis.scatter(points[:, 0], points[:, 1], points[:, 2], c=colors, s=size, cmap=cmap)
+
+
+def show_plots():
+    """Invokes the interactive plotting window
+
+    """
+    plt.show()
@@ -9,7 +9,9 @@ setup(
     author_email='nicolas.tolazzi@googlemail.com',
     license='MIT',
     packages=find_packages(exclude=('tests', 'docs')),
-    install_requires=['numpy', 'matplotlib'],
+    python_requires='>=3.8',
+    install_requires=['numpy'],
+    extras_require={'plotting': ['matplotlib'], 'numba': ['numba']},
     classifiers=[
         'Development Status :: 4 - Beta',
         'License :: OSI Approved :: MIT License',
@@ -0,0 +1,73 @@
+from pyjones.polarizations import *
+from pyjones.opticalelements import *
+import numpy as np
+import pytest
+
+
+def test_vector_array_matches_single_vectors():
+    raw = [[1.0, 2.0j], [0.3 - 1j, 0.5], [1.0, -1.0], [0.0, 1.0j]]
+    array = JonesVectorArray(raw)
+    singles = [JonesVector(p) for p in raw]
+    assert np.allclose(array.polarization_vectors, [s.polarization_vector[0] for s in singles])
+    assert np.allclose(array.intensity, [s.intensity for s in singles])
+    assert np.allclose(array.Stokes, [s.Stokes for s in singles])
+
+
+def test_vector_array_from_vectors():
+    array = JonesVectorArray([LinearHorizontal(), CircularRight(), Linear(30)])
+    assert len(array) == 3
+    assert array.Stokes.shape == (3, 4)
+    assert np.allclose(array.Stokes[1], CircularRight().Stokes)
+    assert isinstance(array[0], JonesVector)
+    assert isinstance(array[1:], JonesVectorArray)
+
+
+def test_vector_array_zero_intensity_not_normalized():
+    array = JonesVectorArray([[0.0, 0.0], [2.0, 0.0]])
+    assert np.allclose(array.intensity, [0.0, 1.0])
+
+
+def test_vector_array_wrong_shape():
+    with pytest.raises(ValueError):
+        JonesVectorArray([[1.0, 0.0, 0.0]])
+    with pytest.raises(ValueError):
+        JonesVectorArray(3)
+
+
+@pytest.mark.parametrize('element, args', [(Polarizer, (30.0,)), (QuarterWavePlate, (30.0,)),
+                                           (HalfWavePlate, (30.0,)), (PhaseRetarder, (30.0, 70.0))])
+def test_array_constructors_match_single_elements(element, args):
+    angles = np.linspace(0, 360, 7)
+    stack = element(angles, *args[1:])
+    assert isinstance(stack, JonesMatrixArray)
+    assert len(stack) == len(angles)
+    for angle, matrix in zip(angles, stack.matrices):
+        assert np.allclose(matrix, element(angle, *args[1:]).matrix)
+
+
+def test_phase_retarder_broadcasts_parameters():
+    stack = PhaseRetarder(45.0, np.array([0.0, 90.0, 180.0]))
+    assert len(stack) == 3
+    assert np.allclose(stack[1].matrix, PhaseRetarder(45.0, 90.0).matrix)
+
+
+def test_sweep_matches_loop():
+    angles = np.linspace(0, 360, 20)
+    intensities = (PolarizerVertical() * QuarterWavePlate(angles) * LinearHorizontal()).intensity
+    expected = [(PolarizerVertical() * QuarterWavePlate(angle) * LinearHorizontal()).intensity for angle in angles]
+    assert np.allclose(intensities, expected)
+
+
+def test_matrix_array_broadcasting():
+    stack = HalfWavePlate(np.linspace(0, 90, 5))
+    states = JonesVectorArray([LinearHorizontal(), LinearVertical(), LinearDiagonal(), CircularLeft(),
+                               CircularRight()])
+    result = (stack * stack) * states
+    assert np.allclose(result.intensity, 1.0)
+    assert np.allclose(result.Stokes, states.Stokes)
+    assert len(Polarizer(np.zeros(5)) * JonesMatrixArray([np.eye(2)])) == 5
+
+
+def test_matrix_array_wrong_operand():
+    with pytest.raises(TypeError):
+        Polarizer(np.zeros(3)) * 5
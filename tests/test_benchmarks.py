@@ -0,0 +1,28 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+import run  # noqa: E402
+
+
+@pytest.mark.parametrize('name, function', run.collect())
+def test_workloads_run(name, function):
+    function()
+
+
+def test_compare_detects_regression():
+    baseline = {'fast': 1.0, 'slow': 1.0}
+    assert run.compare({'fast': 1.1, 'slow': 1.5, 'new': 1.0}, baseline, threshold=0.25) == ['slow']
+
+
+def test_compare_references_detects_overhead():
+    results = {'plain': 1.0, 'after': 1.1, 'slow': 1.5}
+    assert run.compare_references(results, {'after': 'plain', 'slow': 'plain'}, threshold=0.25) == ['slow']
+
+
+def test_references_exist():
+    workloads = dict(run.collect())
+    for name, function in workloads.items():
+        if getattr(function, 'reference', None) is not None:
+            assert function.reference in workloads
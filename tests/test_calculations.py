@@ -1,5 +1,7 @@
 from pyjones.polarizations import *
 from pyjones.opticalelements import *
+import copy
+import pickle
 import numpy as np
 import pytest
 
@@ -69,3 +71,182 @@ def test_subclasses_vector():
     assert LinearAntidiagonal().intensity == pytest.approx(1.0)
     assert CircularRight().intensity == pytest.approx(1.0)
     assert CircularLeft().intensity == pytest.approx(1.0)
+
+
+def test_fast_path_matches_public_constructors():
+    vector = JonesVector([0.3 + 1j, -2j], normalize=False)
+    result = JonesMatrix([[1.0, 0.0], [0.0, 1.0]]) * vector
+    assert np.allclose(result.polarization_vector, vector.polarization_vector)
+    assert type(result) is JonesVector
+    product = QuarterWavePlate(20) * HalfWavePlate(10)
+    assert type(product) is JonesMatrix
+    assert np.array_equal(product.matrix, np.dot(QuarterWavePlate(20).matrix, HalfWavePlate(10).matrix))
+    assert not hasattr(product, '__dict__')
+    assert not hasattr(LinearHorizontal(), '__dict__')
+
+
+@pytest.fixture
+def matrix_cache():
+    enable_matrix_cache(maxsize=4)
+    yield
+    disable_matrix_cache()
+
+
+def test_matrix_cache_hits(matrix_cache):
+    first = QuarterWavePlate(30)
+    second = QuarterWavePlate(30)
+    assert second.matrix is first.matrix
+    assert not second.matrix.flags.writeable
+    assert HalfWavePlate(30).matrix is not first.matrix
+    info = matrix_cache_info()
+    assert (info.hits, info.misses, info.maxsize, info.currsize) == (1, 2, 4, 2)
+    assert np.allclose(PhaseRetarder(10, 20).matrix, PhaseRetarder(10, 20).matrix)
+
+
+def test_matrix_cache_resize_and_clear(matrix_cache):
+    for angle in range(10):
+        Polarizer(angle)
+    assert matrix_cache_info().currsize == 4
+    resize_matrix_cache(2)
+    assert matrix_cache_info().currsize == 2
+    clear_matrix_cache()
+    assert matrix_cache_info() == (0, 0, 2, 0)
+
+
+def test_matrix_cache_in_place_update(matrix_cache):
+    element = Polarizer(10)
+    element.angle = 20
+    assert np.allclose(element.matrix, Polarizer(20).matrix)
+    assert np.allclose(Polarizer(10).matrix, [[np.cos(np.radians(10)) ** 2, 0.17101007166283433],
+                                               [0.17101007166283433, np.sin(np.radians(10)) ** 2]])
+
+
+@pytest.mark.parametrize('later, earlier, expected_type', [
+    (Polarizer(30), Polarizer(210), Polarizer),
+    (PolarizerVertical(), Polarizer(0), JonesMatrix),
+    (HalfWavePlate(40), HalfWavePlate(10), Rotator),
+    (Rotator(40), Rotator(-15), Rotator),
+    (QuarterWavePlate(20), QuarterWavePlate(20), PhaseRetarder),
+    (QuarterWavePlate(20), PhaseRetarder(20, 90), HalfWavePlate),
+    (PhaseRetarder(35, 70), PhaseRetarder(215, 50), PhaseRetarder),
+    (PhaseRetarder(35, 70), PhaseRetarder(125, 50), PhaseRetarder),
+    (PhaseRetarder(35, 300), PhaseRetarder(35, 150, 20), PhaseRetarder),
+    (HalfWavePlate(10), PhaseRetarder(100, 180, 90), PhaseRetarder),
+    (PhaseRetarder(10, 540, 90), HalfWavePlate(30), Rotator),
+    (HalfWavePlate(30), PhaseRetarder(10, -180, 90), Rotator),
+])
+def test_closed_form_products(later, earlier, expected_type):
+    product = later * earlier
+    assert type(product) is expected_type
+    assert np.allclose(product.matrix, np.dot(later.matrix, earlier.matrix))
+
+
+def test_simplify():
+    elements = [HalfWavePlate(10), HalfWavePlate(40), Rotator(-60), QuarterWavePlate(5), Polarizer(20),
+                QuarterWavePlate(5), QuarterWavePlate(5), PhaseRetarder(5, 180)]
+    simplified = simplify(elements)
+    assert [type(element) for element in simplified] == [QuarterWavePlate, Polarizer]
+    expected = np.eye(2)
+    for element in elements:
+        expected = np.dot(element.matrix, expected)
+    result = np.eye(2)
+    for element in simplified:
+        result = np.dot(element.matrix, result)
+    assert np.allclose(result, expected)
+
+
+def test_fixed_classes_are_interned():
+    assert LinearHorizontal() is LinearHorizontal()
+    assert CircularRight() is CircularRight()
+    assert PolarizerVertical() is PolarizerVertical()
+    assert LinearHorizontal() is not LinearVertical()
+    assert isinstance(CircularLeft(), CircularLeft) and CircularLeft().frozen
+    assert not PolarizerHorizontal().matrix.flags.writeable
+    with pytest.raises(TypeError):
+        LinearHorizontal()[1] = 1.0
+    assert np.allclose(LinearDiagonal().polarization_vector, [[np.sqrt(0.5), np.sqrt(0.5)]])
+    assert np.allclose((PolarizerVertical() * LinearDiagonal()).polarization_vector, [[0.0, np.sqrt(0.5)]])
+
+
+def test_freeze():
+    vector = JonesVector([1.0, 1j])
+    frozen = vector.freeze()
+    assert frozen is not vector and frozen.freeze() is frozen
+    assert frozen.frozen and not vector.frozen
+    assert frozen == CircularLeft()
+    assert frozen == JonesVector([1.0, 1j + 1e-13]).freeze()
+    # equality rounds to a grid, close values on both sides of a rounding boundary differ
+    assert JonesVector([1.0, 0.5e-9 - 1e-17], normalize=False).freeze() != \
+        JonesVector([1.0, 0.5e-9 + 1e-17], normalize=False).freeze()
+    assert frozen != JonesVector([1.0, 1j]) and vector != JonesVector([1.0, 1j])
+    assert len(set([frozen, CircularLeft(), CircularRight()])) == 2
+    vector[0] = 0.0
+    assert frozen[0] != 0.0
+
+    element = QuarterWavePlate(30)
+    frozen_element = element.freeze()
+    assert type(frozen_element) is QuarterWavePlate and frozen_element.angle == 30
+    assert frozen_element == PhaseRetarder(30, 90, 90).freeze()
+    assert frozen_element != QuarterWavePlate(31).freeze()
+    assert PolarizerHorizontal() == Polarizer(0).freeze()
+    with pytest.raises(TypeError):
+        frozen_element.angle = 40
+    element.angle = 40
+    assert frozen_element.angle == 30
+    cache = {(PolarizerHorizontal(), frozen_element): 1}
+    assert cache[(Polarizer(180).freeze(), QuarterWavePlate(30).freeze())] == 1
+    assert len(set([element, element])) == 1
+
+
+def test_keyword_construction():
+    assert np.allclose(Polarizer(angle=30).matrix, Polarizer(30).matrix)
+    assert np.allclose(QuarterWavePlate(angle=30).matrix, QuarterWavePlate(30).matrix)
+    assert np.allclose(HalfWavePlate(angle=30).matrix, HalfWavePlate(30).matrix)
+    assert np.allclose(Rotator(angle=3).matrix, Rotator(3).matrix)
+    assert np.allclose(PhaseRetarder(10, eta=40, phase=5).matrix, PhaseRetarder(10, 40, 5).matrix)
+    assert isinstance(Polarizer(angle=[10, 20]), JonesMatrixArray)
+
+
+@pytest.mark.parametrize('element', [JonesMatrix([[1, 2j], [3, 4]]), PolarizerHorizontal(), PolarizerVertical(),
+                                     Polarizer(30), QuarterWavePlate(20), HalfWavePlate(10), PhaseRetarder(15, 40, 5),
+                                     Rotator(25)])
+def test_copy_and_pickle_elements(element):
+    for duplicate in (pickle.loads(pickle.dumps(element)), copy.copy(element), copy.deepcopy(element)):
+        assert type(duplicate) is type(element)
+        assert np.array_equal(duplicate.matrix, element.matrix)
+        assert getattr(duplicate, 'parameter_values', None) == getattr(element, 'parameter_values', None)
+
+
+@pytest.mark.parametrize('value', [LinearHorizontal(), CircularRight(), PolarizerVertical(), PolarizerHorizontal()])
+def test_copies_of_interned_values_are_the_singleton(value):
+    for duplicate in (pickle.loads(pickle.dumps(value)), copy.copy(value), copy.deepcopy(value)):
+        assert duplicate is value
+    array = value.polarization_vector if isinstance(value, JonesVector) else value.matrix
+    assert not array.flags.writeable
+    with pytest.raises(ValueError):
+        array[0, 0] = 7
+
+
+@pytest.mark.parametrize('value', [JonesVector([1.0, 2j]).freeze(), PhaseRetarder(15, 40, 5).freeze(),
+                                   JonesMatrix([[1, 2j], [3, 4]]).freeze()])
+def test_copies_of_frozen_values_stay_frozen(value):
+    for duplicate in (pickle.loads(pickle.dumps(value)), copy.copy(value), copy.deepcopy(value)):
+        assert duplicate.frozen and duplicate == value and hash(duplicate) == hash(value)
+        array = duplicate.polarization_vector if isinstance(duplicate, JonesVector) else duplicate.matrix
+        assert not array.flags.writeable
+    assert not copy.deepcopy(JonesVector([1.0, 2j])).frozen
+
+
+class LabeledVector(JonesVector):
+    pass
+
+
+class LabeledMatrix(JonesMatrix):
+    pass
+
+
+@pytest.mark.parametrize('value', [LabeledVector([1.0, 2j]), LabeledMatrix([[1, 2j], [3, 4]])])
+def test_copies_keep_attributes_of_subclasses_without_slots(value):
+    value.label = 'detector arm'
+    for duplicate in (pickle.loads(pickle.dumps(value)), copy.copy(value), copy.deepcopy(value)):
+        assert type(duplicate) is type(value) and duplicate.label == 'detector arm'
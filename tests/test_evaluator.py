@@ -0,0 +1,59 @@
+from pyjones.polarizations import *
+from pyjones.opticalelements import *
+from pyjones.opticaltrain import OpticalTrain
+from pyjones.evaluator import AsyncEvaluator
+import asyncio
+import numpy as np
+import pytest
+
+TRAIN = OpticalTrain([QuarterWavePlate(20), PhaseRetarder(10, 70), PolarizerVertical()])
+
+
+def test_evaluator_batches_requests():
+    states = [Linear(angle) for angle in range(0, 180, 10)]
+
+    async def run():
+        evaluator = AsyncEvaluator(max_batch_size=100, max_latency=0.01)
+        return await asyncio.gather(*[evaluator.evaluate(TRAIN, state, quantity) for state in states
+                                      for quantity in ('vector', 'intensity', 'Stokes')])
+
+    results = asyncio.run(run())
+    for index, state in enumerate(states):
+        expected = TRAIN * state
+        vector, intensity, stokes = results[3 * index:3 * index + 3]
+        assert np.allclose(vector.polarization_vector, expected.polarization_vector)
+        assert intensity == pytest.approx(expected.intensity)
+        assert np.allclose(stokes, expected.Stokes)
+
+
+def test_evaluator_flushes_full_batches():
+    async def run():
+        evaluator = AsyncEvaluator(max_batch_size=4, max_latency=60.0)
+        return await asyncio.wait_for(asyncio.gather(*[evaluator.evaluate(Polarizer(45), LinearHorizontal(),
+                                                                          'intensity') for _ in range(8)]), 5.0)
+
+    assert np.allclose(asyncio.run(run()), 0.5)
+
+
+def test_evaluator_outlives_its_loop():
+    evaluator = AsyncEvaluator(max_latency=0.01)
+
+    async def abandon():
+        # the request is queued and the loop ends before the timer fires
+        asyncio.ensure_future(evaluator.evaluate(Polarizer(45), LinearHorizontal(), 'intensity'))
+        await asyncio.sleep(0)
+
+    async def run():
+        return await asyncio.wait_for(evaluator.evaluate(Polarizer(45), LinearHorizontal(), 'intensity'), 5.0)
+
+    asyncio.run(abandon())
+    assert asyncio.run(run()) == pytest.approx(0.5)
+
+
+def test_evaluator_wrong_input():
+    async def run():
+        evaluator = AsyncEvaluator()
+        await evaluator.evaluate(TRAIN, LinearHorizontal(), 'phase')
+
+    with pytest.raises(ValueError):
+        asyncio.run(run())
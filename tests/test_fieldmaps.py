@@ -0,0 +1,64 @@
+from pyjones.polarizations import *
+from pyjones.opticalelements import *
+from pyjones.opticaltrain import OpticalTrain
+from pyjones.fieldmaps import *
+import numpy as np
+import pytest
+
+rng = np.random.RandomState(2)
+ANGLES = rng.uniform(0, 180, (13, 7))
+ETAS = rng.uniform(0, 180, (13, 7))
+
+
+def _field():
+    return FieldMap(rng.normal(size=(13, 7, 2)) + 1j * rng.normal(size=(13, 7, 2)))
+
+
+def test_element_map_matches_elements():
+    retarders = ElementMap(PhaseRetarder, ANGLES, ETAS)
+    assert retarders.shape == (13, 7)
+    assert retarders.matrix_images.shape == (13, 7, 2, 2)
+    assert np.allclose(retarders.matrix_images[4, 5], PhaseRetarder(ANGLES[4, 5], ETAS[4, 5]).matrix)
+    columns = ElementMap(Polarizer, ANGLES[:1])
+    assert np.allclose(columns.tile(5, 9)[0, 3], Polarizer(ANGLES[0, 3]).matrix)
+    field = FieldMap.uniform(Linear(40), (13, 7))
+    assert np.allclose(field.propagate(columns, 'intensity')[8], np.cos(np.radians(ANGLES[0] - 40)) ** 2)
+    assert np.allclose(ElementMap(QuarterWavePlate, 30).tile(0, 5), QuarterWavePlate(30).matrix)
+    with pytest.raises(TypeError):
+        ElementMap(PolarizerVertical, ANGLES)
+
+
+@pytest.mark.parametrize('tile_rows', [1, 4, 100])
+def test_propagation_matches_per_pixel(tile_rows):
+    field = _field()
+    elements = [ElementMap(PhaseRetarder, ANGLES, ETAS), QuarterWavePlate(20),
+                ElementMap.from_matrices(HalfWavePlate(ETAS.ravel()).matrices.reshape(13, 7, 2, 2)),
+                OpticalTrain([Polarizer(10), Rotator(5)])]
+    output = field.propagate(elements, tile_rows=tile_rows)
+    for row, column in [(0, 0), (6, 3), (12, 6)]:
+        state = JonesVector(field.fields[row, column], normalize=False, normal_form=False)
+        expected = (Rotator(5) * Polarizer(10) * HalfWavePlate(ETAS[row, column]) * QuarterWavePlate(20) *
+                    PhaseRetarder(ANGLES[row, column], ETAS[row, column]) * state)
+        assert np.allclose(output.Stokes[row, column], expected.Stokes)
+    assert np.allclose(field.propagate(elements, 'intensity', tile_rows), output.intensity)
+    assert np.allclose(field.propagate(elements, 'Stokes', tile_rows), output.Stokes)
+    field.apply(elements, tile_rows)
+    assert np.allclose(field.fields, output.fields)
+
+
+def test_single_row_of_matrices_broadcasts():
+    field = FieldMap.uniform(Linear(40), (13, 7))
+    columns = ElementMap.from_matrices(Polarizer(ANGLES[0]).matrices[np.newaxis])
+    assert columns.tile(5, 9).shape == (4, 7, 2, 2)
+    intensity = field.propagate(columns, 'intensity', tile_rows=4)
+    assert np.allclose(intensity, np.cos(np.radians(ANGLES[0] - 40)) ** 2)
+
+
+def test_uniform_field_and_shape_checks():
+    field = FieldMap.uniform(LinearHorizontal(), (13, 7))
+    assert np.allclose(field.intensity, 1)
+    assert np.allclose(field.propagate(PolarizerVertical(), 'intensity'), 0)
+    with pytest.raises(ValueError):
+        field.propagate(ElementMap(Polarizer, ANGLES.T))
+    with pytest.raises(ValueError):
+        FieldMap(np.zeros((3, 2)))
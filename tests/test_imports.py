@@ -0,0 +1,31 @@
+import os
+import subprocess
+import sys
+
+IMPORT_BUDGET = float(os.environ.get('PYJONES_IMPORT_BUDGET', '0.5'))
+
+SCRIPT = '''
+import sys, time
+start = time.perf_counter()
+import pyjones.opticalelements
+elapsed = time.perf_counter() - start
+print(elapsed)
+print(any(name.split('.')[0] in ('matplotlib', 'mpl_toolkits') for name in sys.modules))
+'''
+
+
+def _import_core():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.check_output([sys.executable, '-c', SCRIPT], cwd=root, universal_newlines=True)
+    elapsed, matplotlib_imported = output.split()
+    return float(elapsed), matplotlib_imported == 'True'
+
+
+def test_core_import_does_not_need_matplotlib():
+    _, matplotlib_imported = _import_core()
+    assert not matplotlib_imported
+
+
+def test_core_import_time_budget():
+    elapsed = min(_import_core()[0] for _ in range(3))
+    assert elapsed < IMPORT_BUDGET, 'Importing pyjones took %.3f s, budget is %.3f s' % (elapsed, IMPORT_BUDGET)
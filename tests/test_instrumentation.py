@@ -0,0 +1,82 @@
+from pyjones.polarizations import *
+from pyjones.opticalelements import *
+from pyjones.opticaltrain import OpticalTrain
+from pyjones.instrumentation import *
+import pyjones.instrumentation as instrumentation
+import json
+import numpy as np
+
+
+def test_profile_counts_operations():
+    states = JonesVectorArray([Linear(angle) for angle in np.linspace(0, 180, 50)])
+    with profile() as stats:
+        train = OpticalTrain([QuarterWavePlate(20), Polarizer(30), PolarizerVertical()])
+        output = train * states
+        output.Stokes
+        QuarterWavePlate(np.linspace(0, 90, 10)) * LinearHorizontal()
+    assert stats['create element']['calls'] == 2
+    assert stats['create JonesMatrix']['calls'] >= 1
+    assert stats['OpticalTrain multiplication']['items'] == 50
+    assert stats['Stokes']['max_batch'] == 50
+    assert stats['create JonesMatrixArray']['calls'] >= 1
+    assert stats['JonesMatrixArray multiplication']['max_batch'] == 10
+    assert all(entry['time'] >= 0 for entry in stats.operations.values())
+    assert not is_enabled()
+    exported = json.loads(stats.to_json())
+    assert exported == stats.as_dict()
+    assert 'OpticalTrain multiplication' in stats.report()
+
+
+def test_cache_statistics():
+    enable_matrix_cache()
+    try:
+        clear_matrix_cache()
+        with profile() as stats:
+            for _ in range(3):
+                Polarizer(12.5)
+        assert stats.cache == {'hits': 2, 'misses': 1}
+    finally:
+        disable_matrix_cache()
+
+
+def test_disabled_instrumentation_restores_methods():
+    originals = [(cls, name, cls.__dict__[name]) for cls, name, _, _ in instrumentation._HOT_PATHS]
+    enable()
+    enable()
+    assert is_enabled()
+    assert JonesMatrix.__dict__['__mul__'] is not dict((cls, original) for cls, name, original in originals
+                                                       if name == '__mul__')[JonesMatrix]
+    disable()
+    assert is_enabled()
+    disable()
+    disable()
+    assert not is_enabled()
+    assert all(cls.__dict__[name] is original for cls, name, original in originals)
+    reset()
+    LinearHorizontal()
+    assert snapshot().operations == {}
+
+
+def test_nested_profiles():
+    with profile() as outer:
+        for angle in range(5):
+            Polarizer(angle)
+        with profile() as inner:
+            Rotator(3)
+    assert outer['create element']['calls'] == 6
+    assert inner['create element']['calls'] == 1
+    assert not is_enabled() and instrumentation._recorder.sinks == []
+
+
+def test_batch_sizes():
+    states = JonesVectorArray([Linear(angle) for angle in np.linspace(0, 180, 1000)])
+    train = OpticalTrain([QuarterWavePlate(20), Rotator(10), Polarizer(30)])
+    with profile() as stats:
+        train.evaluate(states)
+        train.gradient(state=states)
+        states._normalize()
+        Polarizer(45)
+    assert stats['OpticalTrain evaluate']['items'] == 1000
+    assert stats['OpticalTrain gradient']['items'] == 1000
+    assert stats['normalize']['items'] == 1000
+    assert stats['evaluate element matrix']['items'] == stats['evaluate element matrix']['calls']
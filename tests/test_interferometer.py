@@ -0,0 +1,78 @@
+from pyjones.polarizations import *
+from pyjones.opticalelements import *
+from pyjones.interferometer import *
+import numpy as np
+import pytest
+
+PHASES = np.linspace(0, 360, 25)
+
+
+def _mach_zehnder(upper=(), lower=()):
+    network = Interferometer()
+    network.add_arm('upper 1', 'in', 'upper', amplitude=np.sqrt(0.5))
+    network.add_arm('upper 2', 'upper', 'out', upper, amplitude=np.sqrt(0.5))
+    network.add_arm('lower 1', 'in', 'lower', amplitude=1j * np.sqrt(0.5))
+    network.add_arm('lower 2', 'lower', 'out', lower, amplitude=1j * np.sqrt(0.5))
+    return network
+
+
+def test_mach_zehnder_fringes():
+    network = _mach_zehnder()
+    assert network.paths == [('upper 1', 'upper 2'), ('lower 1', 'lower 2')]
+    network['upper 2'].phase = PHASES
+    intensity = network.evaluate(LinearHorizontal())
+    assert intensity.shape == PHASES.shape
+    assert np.allclose(intensity, np.sin(np.radians(PHASES) / 2) ** 2)
+    states = JonesVectorArray([LinearHorizontal(), LinearVertical(), CircularLeft()])
+    assert network.evaluate(states).shape == (25, 3)
+    assert network.evaluate(states, 'Stokes').shape == (25, 3, 4)
+    assert network.evaluate(states, 'field').shape == (25, 3, 2)
+    network['upper 1'].set_path_length(0.25, 1.0)
+    assert np.allclose(network.evaluate(LinearHorizontal()), np.sin(np.radians(PHASES + 90) / 2) ** 2)
+
+
+def test_orthogonal_arms_do_not_interfere():
+    network = _mach_zehnder(upper=[HalfWavePlate(45)])
+    network['lower 2'].phase = PHASES
+    assert np.allclose(network.evaluate(LinearHorizontal()), 0.5)
+    assert np.allclose(network.evaluate(LinearHorizontal(), 'Stokes')[:, 2], -np.cos(np.radians(PHASES)) / 2)
+
+
+def test_matches_sum_over_paths():
+    elements = [QuarterWavePlate(15), Polarizer(60), PhaseRetarder(20, 50)]
+    sagnac = Interferometer('bs', 'bs out')
+    sagnac.add_arm('clockwise', 'bs', 'bs out', elements, phase=30, amplitude=0.5)
+    sagnac.add_arm('counterclockwise', 'bs', 'bs out', elements[::-1], amplitude=-0.5)
+    expected = (0.5 * np.exp(1j * np.radians(30)) * np.dot(elements[2].matrix, np.dot(elements[1].matrix,
+                                                                                      elements[0].matrix)) -
+                0.5 * np.dot(elements[0].matrix, np.dot(elements[1].matrix, elements[2].matrix)))
+    assert np.allclose(sagnac.matrix, expected)
+    assert np.allclose((sagnac * Linear(10)).polarization_vector,
+                       (JonesMatrix(expected) * Linear(10)).polarization_vector)
+
+
+def test_cached_path_products():
+    network = _mach_zehnder(upper=[QuarterWavePlate(10)], lower=[Rotator(20)])
+    products = network._path_products()
+    network['upper 1'].phase = 40
+    assert network._path_products() is products
+    network['lower 2'].train[0].angle = 30
+    updated = network._path_products()
+    assert updated is not products
+    assert np.allclose(updated[1], Rotator(30).matrix)
+    reference = _mach_zehnder(upper=[QuarterWavePlate(10)], lower=[Rotator(30)])
+    reference['upper 1'].phase = 40
+    assert np.allclose(network.matrix, reference.matrix)
+
+
+def test_invalid_networks():
+    network = _mach_zehnder()
+    with pytest.raises(ValueError):
+        network.add_arm('upper 1', 'in', 'out')
+    network.add_arm('feedback', 'upper', 'in')
+    with pytest.raises(ValueError):
+        network.matrix
+    network.remove_arm('feedback')
+    assert len(network.paths) == 2
+    with pytest.raises(ValueError):
+        Interferometer().matrix
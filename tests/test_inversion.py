@@ -0,0 +1,52 @@
+from pyjones.polarizations import *
+from pyjones.opticalelements import *
+from pyjones.mueller import StokesVector
+from pyjones.inversion import *
+import numpy as np
+import pytest
+
+rng = np.random.RandomState(1)
+POLARIZERS = Polarizer(np.linspace(0, 180, 24, endpoint=False))
+ANALYZERS = PolarizerVertical() * QuarterWavePlate(np.linspace(0, 180, 12, endpoint=False))
+
+
+def test_stokes_from_intensities():
+    angles = np.linspace(0, 180, 12, endpoint=False)
+    analyzers = PolarizerVertical() * QuarterWavePlate(angles)
+    states = JonesVectorArray(rng.normal(size=(50, 2)) + 1j * rng.normal(size=(50, 2)), normalize=False)
+    intensities = np.array([(analyzers * state).intensity for state in states])
+    stokes = stokes_from_intensities(analyzers, intensities)
+    assert isinstance(stokes, StokesVector)
+    assert np.allclose(stokes.stokes, states.Stokes)
+    assert np.allclose(stokes_from_intensities(analyzers, intensities[3]).stokes, states[3].Stokes)
+    linear = stokes_from_intensities(POLARIZERS, (POLARIZERS * states[0]).intensity)
+    assert np.allclose(linear.stokes[:3], states[0].Stokes[:3])
+    assert linear.stokes[3] == pytest.approx(0)
+    with pytest.raises(ValueError):
+        stokes_from_intensities(analyzers, intensities[:, :5])
+
+
+def test_fit_retarder_parameters():
+    angles = rng.uniform(0, 90, 100)
+    etas = rng.uniform(60, 120, 100)
+    # with circular input and a complete analyzer the retarder is identifiable for all angles
+    state = CircularRight()
+    intensities = np.array([(ANALYZERS * Rotator(15) * PhaseRetarder(angle, eta) * state).intensity
+                            for angle, eta in zip(angles, etas)])
+    result = fit_parameters([(PhaseRetarder, 'angle', 'eta'), (Rotator, 15)], ANALYZERS,
+                            intensities, {'angle': angles + rng.normal(0, 3, 100), 'eta': 90.0}, state=state)
+    assert np.all(result.converged)
+    assert np.allclose(result.parameters['angle'], angles, atol=1e-5)
+    assert np.allclose(result.parameters['eta'], etas, atol=1e-5)
+    assert np.all(result.cost < 1e-12)
+    assert result.state is None
+
+
+def test_fit_input_state():
+    states = JonesVectorArray(rng.normal(size=(40, 2)) + 1j * rng.normal(size=(40, 2)), normalize=False)
+    intensities = np.array([(ANALYZERS * Rotator(20) * state).intensity for state in states])
+    result = fit_parameters([(Rotator, 20.0)], ANALYZERS, intensities, {}, state=LinearDiagonal(), fit_state=True)
+    assert np.all(result.converged)
+    assert np.allclose(result.state.Stokes, states.Stokes, atol=1e-6)
+    with pytest.raises(ValueError):
+        fit_parameters([(QuarterWavePlate, 'qwp')], ANALYZERS, intensities, {})
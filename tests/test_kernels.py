@@ -0,0 +1,55 @@
+from pyjones.polarizations import *
+from pyjones.opticalelements import *
+from pyjones.kernels import *
+from pyjones.kernels import _prepare, _propagate_kernel
+import numpy as np
+import pytest
+
+rng = np.random.RandomState(0)
+NOISE = rng.normal(0, 2.0, 200)
+ELEMENTS = [(QuarterWavePlate, 20 + NOISE), (PhaseRetarder, 10, 70 + NOISE), (HalfWavePlate, 5.0),
+            (Polarizer, 30 + NOISE), JonesMatrix([[1, 0.5j], [0.2, 0.8]]), (Rotator, NOISE),
+            (PhaseRetarder, 40, 30, 15), (PolarizerHorizontal,), (PolarizerVertical,)]
+STATES = JonesVectorArray(rng.normal(size=(200, 2)) + 1j * rng.normal(size=(200, 2)))
+
+
+def _python_kernel(elements, state, quantity):
+    kinds, matrices, values, offsets, lengths, vectors, count = _prepare(elements, state)
+    out = np.empty((count, 4 if quantity == 'Stokes' else 1))
+    _propagate_kernel(kinds, matrices, values, offsets, lengths, vectors, out, quantity == 'Stokes')
+    return out if quantity == 'Stokes' else out[:, 0]
+
+
+@pytest.mark.parametrize('quantity', ['intensity', 'Stokes'])
+def test_fused_kernel_matches_numpy(quantity):
+    elements = ELEMENTS[:-1]
+    expected = propagate(elements, STATES, quantity, backend='numpy')
+    assert np.allclose(_python_kernel(elements, STATES, quantity), expected)
+    assert np.allclose(_python_kernel(elements, LinearDiagonal(), quantity),
+                       propagate(elements, LinearDiagonal(), quantity, backend='numpy'))
+
+
+@pytest.mark.parametrize('quantity', ['intensity', 'Stokes'])
+def test_numba_matches_numpy(quantity):
+    pytest.importorskip('numba')
+    for elements, state in [(ELEMENTS, STATES), (ELEMENTS[:-1], CircularLeft()), (ELEMENTS[2:3], Linear(10))]:
+        expected = propagate(elements, state, quantity, backend='numpy')
+        result = propagate(elements, state, quantity, backend='numba')
+        assert result.shape == expected.shape
+        assert np.allclose(result, expected)
+
+
+def test_backend_selection():
+    assert 'numpy' in available_backends()
+    assert get_backend() == available_backends()[0]
+    set_backend('numpy')
+    try:
+        assert get_backend() == 'numpy'
+    finally:
+        set_backend('auto')
+    with pytest.raises(ValueError):
+        set_backend('cuda')
+    with pytest.raises(TypeError):
+        _prepare([(JonesVector, 1.0)], STATES)
+    with pytest.raises(ValueError):
+        _prepare([(Polarizer, NOISE[:10])], STATES)
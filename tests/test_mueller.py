@@ -0,0 +1,48 @@
+from pyjones.polarizations import *
+from pyjones.opticalelements import *
+from pyjones.opticaltrain import OpticalTrain
+from pyjones.mueller import *
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize('element', [Polarizer(30), QuarterWavePlate(20), HalfWavePlate(10), PhaseRetarder(40, 70),
+                                     PolarizerVertical()])
+def test_mueller_matches_jones(element):
+    for state in [LinearHorizontal(), CircularRight(), Linear(60), JonesVector([0.3 + 1j, -2j])]:
+        stokes = MuellerMatrix.from_jones(element) * StokesVector.from_jones(state)
+        assert np.allclose(stokes.stokes, (element * state).Stokes)
+
+
+def test_mueller_batched():
+    angles = np.linspace(0, 180, 50)
+    states = JonesVectorArray([Linear(angle) for angle in angles])
+    elements = QuarterWavePlate(angles)
+    stokes = MuellerMatrix.from_jones(elements) * states
+    assert stokes.stokes.shape == (50, 4)
+    assert np.allclose(stokes.stokes, (elements * states).Stokes)
+    train = OpticalTrain([QuarterWavePlate(10), Polarizer(20)])
+    assert np.allclose(MuellerMatrix.from_jones(train).matrix,
+                       (MuellerMatrix.from_jones(Polarizer(20)) * MuellerMatrix.from_jones(QuarterWavePlate(10))).matrix)
+    assert np.allclose((Depolarizer(0.5) * train).matrix, (Depolarizer(0.5) * MuellerMatrix.from_jones(train)).matrix)
+
+
+def test_depolarization():
+    stokes = Depolarizer(0.5) * LinearHorizontal()
+    assert stokes.degree_of_polarization == pytest.approx(0.5)
+    assert stokes.intensity == pytest.approx(1.0)
+    partial = StokesVector.from_jones(CircularLeft(), degree_of_polarization=0.2)
+    assert partial.degree_of_polarization == pytest.approx(0.2)
+    assert np.allclose((PartialDepolarizer(1.0, 1.0, 0.0) * CircularLeft()).stokes, [1.0, 0.0, 0.0, 0.0])
+    transmitted = MuellerMatrix.from_jones(PolarizerHorizontal()) * Unpolarized(2.0)
+    assert transmitted.intensity == pytest.approx(1.0)
+    assert transmitted.degree_of_polarization == pytest.approx(1.0)
+
+
+def test_wrong_input():
+    with pytest.raises(ValueError):
+        MuellerMatrix([[1, 0], [0, 1]])
+    with pytest.raises(ValueError):
+        StokesVector([1, 0, 0])
+    with pytest.raises(TypeError):
+        Depolarizer(0.5) * 3
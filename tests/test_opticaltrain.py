@@ -0,0 +1,176 @@
+from pyjones.polarizations import *
+from pyjones.opticalelements import *
+from pyjones.opticaltrain import OpticalTrain
+from functools import reduce
+import copy
+import numpy as np
+import pytest
+
+
+def _direct_product(elements):
+    return reduce(lambda total, element: element * total, elements[1:], elements[0]).matrix
+
+
+def _random_elements(count, seed=0):
+    rng = np.random.RandomState(seed)
+    return [PhaseRetarder(angle, eta) for angle, eta in rng.uniform(0, 180, (count, 2))]
+
+
+def test_train_matches_direct_product():
+    elements = _random_elements(13)
+    train = OpticalTrain(elements)
+    assert np.allclose(train.matrix, _direct_product(elements))
+
+
+def test_train_replace_element():
+    elements = _random_elements(200)
+    train = OpticalTrain(elements)
+    for index in [0, 57, 199]:
+        elements[index] = QuarterWavePlate(index)
+        train[index] = elements[index]
+        assert np.allclose(train.matrix, _direct_product(elements))
+
+
+@pytest.mark.parametrize('count', [0, 1, 5])
+def test_train_matrix_is_read_only(count):
+    elements = _random_elements(count)
+    train = OpticalTrain(elements)
+    expected = train.matrix.copy()
+    with pytest.raises(ValueError):
+        train.matrix[0, 0] = 7
+    assert all(element.matrix.flags.writeable for element in elements)
+    assert np.array_equal(train.product(), expected)
+
+
+def test_train_partial_products():
+    elements = _random_elements(11)
+    train = OpticalTrain(elements)
+    for start, stop in [(0, 11), (3, 8), (4, 5), (10, 11)]:
+        assert np.allclose(train.product(start, stop), _direct_product(elements[start:stop]))
+    assert np.allclose(train.product(5, 5), np.eye(2))
+
+
+def test_train_append_insert_delete():
+    elements = _random_elements(5)
+    train = OpticalTrain()
+    assert np.allclose(train.matrix, np.eye(2))
+    for element in elements:
+        train.append(element)
+    assert np.allclose(train.matrix, _direct_product(elements))
+    train.insert(2, Polarizer(10))
+    elements.insert(2, Polarizer(10))
+    del train[0]
+    del elements[0]
+    assert np.allclose(train.matrix, _direct_product(elements))
+
+
+def test_train_propagation():
+    train = OpticalTrain([Polarizer(45), PolarizerVertical()])
+    assert (train * LinearHorizontal()).intensity == pytest.approx(0.25)
+    sweep = OpticalTrain([QuarterWavePlate(np.linspace(0, 360, 20)), PolarizerVertical()])
+    expected = [(PolarizerVertical() * QuarterWavePlate(angle) * LinearHorizontal()).intensity
+                for angle in np.linspace(0, 360, 20)]
+    assert np.allclose((sweep * LinearHorizontal()).intensity, expected)
+
+
+def test_train_wrong_element():
+    with pytest.raises(TypeError):
+        OpticalTrain([Polarizer(0), 5])
+
+
+def test_parameter_in_place_update():
+    element = QuarterWavePlate(10)
+    element.angle = 35
+    assert element.angle == 35
+    assert np.allclose(element.matrix, QuarterWavePlate(35).matrix)
+    retarder = PhaseRetarder(10, 20)
+    retarder.set_parameters(angle=30, eta=60)
+    assert np.allclose(retarder.matrix, PhaseRetarder(30, 60).matrix)
+
+
+def test_train_sees_in_place_update():
+    elements = _random_elements(9)
+    train = OpticalTrain(elements)
+    train[4].eta = 33.0
+    assert np.allclose(train.matrix, _direct_product(elements))
+    train.parameter_values = train.parameter_values + 1.0
+    assert np.allclose(train.matrix, _direct_product(elements))
+
+
+@pytest.mark.parametrize('element', [Polarizer(20), QuarterWavePlate(20), HalfWavePlate(20), PhaseRetarder(20, 50, 10),
+                                     Rotator(20)])
+def test_element_derivatives(element):
+    step = 1e-6
+    for name in element.parameters:
+        value = getattr(element, name)
+        setattr(element, name, value + step)
+        upper = np.asarray(element.matrix)
+        setattr(element, name, value - step)
+        lower = np.asarray(element.matrix)
+        setattr(element, name, value)
+        assert np.allclose(element.derivative(name), (upper - lower) / (2 * step), atol=1e-8)
+
+
+@pytest.mark.parametrize('quantity', ['intensity', 'Stokes'])
+def test_train_gradient(quantity):
+    train = OpticalTrain([QuarterWavePlate(15), PhaseRetarder(40, 70), Polarizer(10), HalfWavePlate(5)])
+    states = JonesVectorArray([LinearHorizontal(), CircularLeft(), Linear(30)])
+    gradient = train.gradient(states, quantity)
+    values = train.parameter_values
+    step = 1e-6
+    for idx in range(len(values)):
+        shifted = values.copy()
+        shifted[idx] += step
+        train.parameter_values = shifted
+        upper = train.evaluate(states, quantity)
+        shifted[idx] -= 2 * step
+        train.parameter_values = shifted
+        lower = train.evaluate(states, quantity)
+        assert np.allclose(gradient[idx], (upper - lower) / (2 * step), atol=1e-8)
+    train.parameter_values = values
+    assert gradient.shape[0] == len(train.parameters) == 5
+
+
+def test_train_simplified():
+    elements = [HalfWavePlate(angle) for angle in np.linspace(0, 90, 100)] + [Polarizer(10), Polarizer(190)]
+    train = OpticalTrain(elements)
+    simplified = train.simplified()
+    assert len(simplified) == 2
+    assert np.allclose(simplified.matrix, _direct_product(elements))
+
+
+def test_global_phase_is_no_free_parameter():
+    retarder = PhaseRetarder(20, 50, 10)
+    assert retarder.parameters == ('angle', 'eta') and retarder.parameter_values == (20.0, 50.0)
+    retarder.phase = 30
+    assert np.allclose(retarder.matrix, PhaseRetarder(20, 50, 30).matrix)
+    train = OpticalTrain([retarder, Polarizer(10)])
+    assert train.parameters == [(0, 'angle'), (0, 'eta'), (1, 'angle')]
+    gradient = train.gradient(JonesVectorArray([LinearHorizontal(), CircularLeft()]))
+    assert gradient.shape == (3, 2) and np.all(np.any(gradient != 0, axis=1))
+
+
+def test_refresh_visits_only_changed_elements():
+    elements = _random_elements(9)
+    train = OpticalTrain(elements + [elements[2]])
+    other = OpticalTrain(elements[:3])
+    train.matrix
+    assert not train._changed
+    elements[2].set_parameters(angle=17)
+    assert train._changed == set([id(elements[2])]) and other._changed == set([id(elements[2])])
+    assert np.allclose(train.matrix, _direct_product(elements + [elements[2]]))
+    assert np.allclose(other.matrix, _direct_product(elements[:3]))
+    removed = train[5]
+    train[5] = Polarizer(3)
+    removed.set_parameters(**dict(zip(removed.parameters, removed.parameter_values)))
+    elements[5] = train[5]
+    assert np.allclose(train.matrix, _direct_product(elements + [elements[2]]))
+    values = train.parameter_values
+    values[train.parameters.index((7, 'eta'))] += 10
+    train.parameter_values = values
+    assert train._changed == set([id(elements[7])])
+    assert np.allclose(train.matrix, _direct_product(elements + [elements[2]]))
+    copied = copy.deepcopy(train)
+    copied[0].set_parameters(angle=5)
+    assert np.allclose(copied.matrix, _direct_product(list(copied)))
+    assert np.allclose(train.matrix, _direct_product(elements + [elements[2]]))
@@ -0,0 +1,45 @@
+import matplotlib
+matplotlib.use('Agg')
+from pyjones.polarizations import *
+from pyjones.opticalelements import *
+from pyjones.visualization import get_Poincare_sphere, plot_polarizations
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def sphere():
+    fig, ax = get_Poincare_sphere()
+    yield ax
+    matplotlib.pyplot.close(fig)
+
+
+def test_plot_single_collection(sphere):
+    states = QuarterWavePlate(np.linspace(0, 360, 500)) * LinearHorizontal()
+    collections = len(sphere.collections)
+    states.plot(sphere, color=np.linspace(0, 1, 500), cmap='viridis', trajectory=True)
+    assert len(sphere.collections) == collections + 1
+    assert len(sphere.collections[-1].get_offsets()) == 500
+
+
+def test_plot_downsample(sphere):
+    stokes = (HalfWavePlate(np.linspace(0, 180, 100000)) * Linear(10)).Stokes
+    collection = plot_polarizations(sphere, stokes, max_points=1000)
+    assert len(collection.get_offsets()) <= 1000
+
+
+def test_plot_density(sphere):
+    states = PhaseRetarder(np.linspace(0, 180, 50000), 45.0) * LinearHorizontal()
+    collection = plot_polarizations(sphere, states, max_points=100, reduction='density', bins=10)
+    assert len(collection.get_offsets()) <= 200
+    with pytest.raises(ValueError):
+        plot_polarizations(sphere, states, reduction='unknown')
+
+
+def test_plot_colors_skip_dark_states(sphere):
+    angles = np.linspace(0, 180, 50)
+    states = PolarizerVertical() * Polarizer(angles) * LinearHorizontal()
+    lines = len(sphere.lines)
+    collection = plot_polarizations(sphere, states, color=angles, trajectory=True)
+    assert len(collection.get_offsets()) == len(collection.get_array()) == 48
+    assert len(sphere.lines) == lines + 1
@@ -0,0 +1,61 @@
+from pyjones.polarizations import *
+from pyjones.opticalelements import *
+from pyjones.opticaltrain import OpticalTrain
+from pyjones.precision import *
+import numpy as np
+import pytest
+
+
+def _train():
+    elements = []
+    for index in range(20):
+        elements.append(QuarterWavePlate(7.0 * index))
+        elements.append(Polarizer(11.0 * index) if index % 5 == 0 else HalfWavePlate(3.0 * index))
+    return OpticalTrain(elements)
+
+
+def test_precision_context_restores_policy():
+    assert get_precision() == 'double'
+    with precision('single'):
+        assert get_precision() == 'single'
+        assert complex_dtype() == np.complex64
+        assert real_dtype() == np.float32
+    assert get_precision() == 'double'
+    with pytest.raises(ValueError):
+        set_precision('half')
+
+
+def test_real_elements_are_stored_real():
+    for element in [Polarizer(30), HalfWavePlate(20), Rotator(10), PolarizerHorizontal(), PolarizerVertical()]:
+        assert element.matrix.dtype == np.float64
+    assert QuarterWavePlate(20).matrix.dtype == np.complex128
+    assert HalfWavePlate(np.linspace(0, 90, 5)).matrices.dtype == np.float64
+    with precision('single'):
+        assert Polarizer(30).matrix.dtype == np.float32
+        assert QuarterWavePlate(20).matrix.dtype == np.complex64
+
+
+def test_single_precision_stays_single():
+    with precision('single'):
+        states = JonesVectorArray([Linear(angle) for angle in np.linspace(0, 180, 10)])
+        elements = QuarterWavePlate(np.linspace(0, 90, 10))
+        train = _train()
+        assert states.polarization_vectors.dtype == np.complex64
+        assert (elements * states).polarization_vectors.dtype == np.complex64
+        assert train.matrix.dtype == np.complex64
+        assert (train * states).polarization_vectors.dtype == np.complex64
+
+
+def test_vector_array_rejects_real_dtype():
+    with pytest.raises(ValueError):
+        JonesVectorArray(np.ones((3, 2)), dtype=np.float64)
+    assert JonesVectorArray(np.ones((3, 2)), dtype=np.complex64).polarization_vectors.dtype == np.complex64
+
+
+def test_single_precision_accuracy():
+    state = JonesVector([0.3 + 1j, -2j])
+    double = _train()
+    with precision('single'):
+        single = _train()
+    assert np.allclose(single.matrix, double.matrix, atol=40 * 1e-6)
+    assert np.allclose((single * state).Stokes, (double * state).Stokes, atol=40 * 1e-6)
@@ -0,0 +1,59 @@
+from pyjones.polarizations import *
+from pyjones.opticalelements import *
+from pyjones.spectral import *
+import numpy as np
+import pytest
+
+WAVELENGTHS = np.linspace(400.0, 800.0, 101)
+
+
+def _sellmeier(wavelengths):
+    return 0.0092 + 2.0 / wavelengths
+
+
+def test_design_wavelength_gives_quarter_wave_plate():
+    plate = DispersiveRetarder.from_design(20, 90, 600.0, _sellmeier)
+    matrices = plate.at(WAVELENGTHS)
+    assert isinstance(matrices, JonesMatrixArray)
+    assert matrices.matrices.shape == (101, 2, 2)
+    assert np.allclose(matrices.matrices[50], PhaseRetarder(20, 90).matrix)
+    assert np.allclose(plate.retardance([600.0]), 90)
+    assert np.all(np.diff(plate.retardance(WAVELENGTHS)) < 0)
+
+
+def test_birefringence_variants():
+    constant = DispersiveRetarder(0, 1000.0, 0.01)
+    table = DispersiveRetarder(0, 1000.0, (np.array([300.0, 900.0]), np.array([0.01, 0.01])))
+    assert np.allclose(constant.retardance(WAVELENGTHS), 3600.0 / WAVELENGTHS)
+    assert np.allclose(table.retardance(WAVELENGTHS), constant.retardance(WAVELENGTHS))
+
+
+def test_tabulated_retarder():
+    plate = TabulatedRetarder(45, [400.0, 600.0, 800.0], [80.0, 90.0, 100.0])
+    assert np.allclose(plate.retardance([500.0, 700.0, 900.0]), [85.0, 95.0, 100.0])
+    with pytest.raises(ValueError):
+        TabulatedRetarder(45, [600.0, 400.0], [80.0, 90.0])
+    with pytest.raises(ValueError):
+        plate.at([[500.0]])
+
+
+def test_spectral_train_matches_per_wavelength_loop():
+    qwp = DispersiveRetarder.from_design(20, 90, 633.0, _sellmeier)
+    hwp = TabulatedRetarder(10, [400.0, 800.0], [200.0, 160.0])
+    train = SpectralTrain([qwp, Polarizer(30), hwp, PolarizerVertical()])
+    state = LinearHorizontal()
+    intensities = train.at(WAVELENGTHS).evaluate(state)
+    expected = []
+    for wavelength in WAVELENGTHS:
+        system = (PolarizerVertical() * PhaseRetarder(10, hwp.retardance([wavelength])[0]) * Polarizer(30) *
+                  PhaseRetarder(20, qwp.retardance([wavelength])[0]))
+        expected.append((system * state).intensity)
+    assert intensities.shape == (101,)
+    assert np.allclose(intensities, expected)
+    with pytest.raises(TypeError):
+        SpectralTrain([qwp, 'element'])
+
+
+def test_spectral_element_is_abstract():
+    with pytest.raises(TypeError):
+        SpectralElement(10)
@@ -0,0 +1,103 @@
+from pyjones.polarizations import *
+from pyjones.opticalelements import *
+from pyjones.opticaltrain import OpticalTrain
+from pyjones.storage import *
+import numpy as np
+import pytest
+
+
+def _states(count):
+    angles = np.linspace(0, 180, count)
+    return JonesVectorArray(np.column_stack([np.cos(np.radians(angles)), 1j * np.sin(np.radians(angles))]))
+
+
+def test_vectors_round_trip(tmp_path):
+    path = str(tmp_path / 'states.pyj')
+    states = _states(1000)
+    save(path, states, metadata={'source': 'test'})
+    header = read_header(path)
+    assert header['kind'] == 'vectors'
+    assert header['shape'] == (1000, 2)
+    assert header['offset'] % 64 == 0
+    assert header['metadata'] == {'source': 'test'}
+    loaded = load(path)
+    assert isinstance(loaded, JonesVectorArray)
+    assert np.array_equal(loaded.polarization_vectors, states.polarization_vectors)
+    assert isinstance(loaded.polarization_vectors.base, np.memmap)
+    assert not loaded.polarization_vectors.flags.writeable
+    assert np.allclose(loaded[500].Stokes, states[500].Stokes)
+    assert np.array_equal(load(path, mmap_mode=None).polarization_vectors, states.polarization_vectors)
+
+
+def test_matrices_round_trip(tmp_path):
+    path = str(tmp_path / 'matrices.pyj')
+    matrices = HalfWavePlate(np.linspace(0, 90, 20))
+    save(path, matrices)
+    loaded = load(path)
+    assert loaded.matrices.dtype == matrices.matrices.dtype
+    assert np.array_equal(loaded.matrices, matrices.matrices)
+    save(path, QuarterWavePlate(20))
+    assert np.array_equal(load(path).matrices[0], QuarterWavePlate(20).matrix)
+
+
+def test_train_round_trip(tmp_path):
+    path = str(tmp_path / 'train.pyj')
+    train = OpticalTrain([QuarterWavePlate(20), PhaseRetarder(10, 70, 5), JonesMatrix([[1, 1j], [0, 0.5]]),
+                          Polarizer(np.linspace(0, 90, 5)), PolarizerVertical()])
+    save(path, train)
+    loaded = load(path)
+    assert [type(element) for element in loaded] == [QuarterWavePlate, PhaseRetarder, JonesMatrix, JonesMatrixArray,
+                                                     PolarizerVertical]
+    assert loaded[1].parameter_values == (10.0, 70.0) and loaded[1].phase == 5.0
+    assert np.allclose(loaded.matrix, train.matrix)
+
+
+def test_writer_append(tmp_path):
+    path = str(tmp_path / 'stream.pyj')
+    states = _states(100)
+    with DatasetWriter(path, 'vectors') as writer:
+        writer.write(states[:30])
+        writer.write(states[30])
+        writer.flush()
+        assert len(load(path)) == 31
+    with open(path, 'ab') as handle:
+        handle.write(b'\0' * 5)
+    assert read_header(path)['shape'] == (31, 2)
+    with DatasetWriter(path, 'vectors', append=True) as writer:
+        writer.write(states.polarization_vectors[31:])
+    assert np.array_equal(load(path).polarization_vectors, states.polarization_vectors)
+    with pytest.raises(ValueError):
+        DatasetWriter(path, 'matrices', append=True)
+    with pytest.raises(ValueError):
+        DatasetWriter(path, 'vectors', dtype=np.complex64, append=True)
+
+
+def test_invalid_file(tmp_path):
+    path = str(tmp_path / 'invalid.pyj')
+    with open(path, 'wb') as handle:
+        handle.write(b'not a dataset')
+    with pytest.raises(ValueError):
+        load(path)
+    with pytest.raises(TypeError):
+        save(path, [1, 2])
+
+
+def test_slice_loaded_vectors(tmp_path):
+    path = str(tmp_path / 'states.pyj')
+    states = _states(100)
+    save(path, states)
+    loaded = load(path)
+    assert np.array_equal(loaded[0:2].polarization_vectors, states.polarization_vectors[0:2])
+    assert np.array_equal(loaded[[3, 7]].Stokes, states[[3, 7]].Stokes)
+    assert np.allclose((QuarterWavePlate(30) * loaded[10:20]).polarization_vectors,
+                       (QuarterWavePlate(30) * states[10:20]).polarization_vectors)
+
+
+def test_writer_rejects_real_vector_dtype(tmp_path):
+    with pytest.raises(ValueError):
+        DatasetWriter(str(tmp_path / 'states.pyj'), 'vectors', dtype=float)
+    with DatasetWriter(str(tmp_path / 'matrices.pyj'), 'matrices', dtype=float) as writer:
+        writer.write(Polarizer(np.linspace(0, 90, 3)))
+        with pytest.raises(TypeError):
+            writer.write(QuarterWavePlate(30))
+    assert len(load(str(tmp_path / 'matrices.pyj'))) == 3
@@ -0,0 +1,46 @@
+from pyjones.polarizations import *
+from pyjones.opticalelements import *
+from pyjones.opticaltrain import OpticalTrain
+from pyjones.streaming import stream
+import itertools
+import numpy as np
+import pytest
+
+SYSTEM = OpticalTrain([QuarterWavePlate(20), PhaseRetarder(10, 70), PolarizerVertical()])
+
+
+def _samples(count):
+    angles = np.linspace(0, 180, count)
+    return JonesVectorArray(np.column_stack([np.cos(np.radians(angles)), 1j * np.sin(np.radians(angles))]))
+
+
+def test_stream_mixed_samples():
+    states = _samples(25)
+    samples = [states[0], states[1:10], states.polarization_vectors[10], states.polarization_vectors[11:25]]
+    chunks = list(stream(SYSTEM, samples, quantity='Stokes', chunk_size=7))
+    assert [len(chunk) for chunk in chunks] == [7, 7, 7, 4]
+    assert np.allclose(np.concatenate(chunks), (SYSTEM * states).Stokes)
+
+
+def test_stream_vectors_and_intensity():
+    states = _samples(10)
+    vectors = list(stream(SYSTEM.system, iter(states), chunk_size=4))
+    assert all(isinstance(chunk, JonesVectorArray) for chunk in vectors)
+    assert np.allclose(np.concatenate([chunk.Stokes for chunk in vectors]), (SYSTEM * states).Stokes)
+    intensities = np.concatenate(list(stream(SYSTEM, states, quantity='intensity', chunk_size=3)))
+    assert np.allclose(intensities, (SYSTEM * states).intensity)
+
+
+def test_stream_unbounded():
+    endless = itertools.cycle([LinearHorizontal(), CircularLeft()])
+    chunks = stream(SYSTEM, endless, quantity='intensity', chunk_size=100)
+    first, second = next(chunks), next(chunks)
+    assert len(first) == len(second) == 100
+    assert np.allclose(first, second)
+
+
+def test_stream_wrong_input():
+    with pytest.raises(ValueError):
+        list(stream(SYSTEM, [[1.0, 0.0, 0.0]]))
+    with pytest.raises(TypeError):
+        list(stream(LinearHorizontal(), [LinearHorizontal()]))
@@ -0,0 +1,40 @@
+from pyjones.polarizations import *
+from pyjones.opticalelements import *
+from pyjones.sweep import Template, sweep
+import numpy as np
+import pytest
+
+TEMPLATE = Template([(QuarterWavePlate, 'qwp'), (PhaseRetarder, 'angle', 45.0), (PolarizerVertical,)])
+GRID = {'qwp': np.linspace(0, 180, 7), 'angle': np.linspace(0, 90, 5)}
+
+
+def _expected(state):
+    return np.array([[(PolarizerVertical() * PhaseRetarder(angle, 45.0) * QuarterWavePlate(qwp) * state).Stokes
+                      for angle in GRID['angle']] for qwp in GRID['qwp']])
+
+
+def test_template_parameters():
+    assert TEMPLATE.parameters == ['qwp', 'angle']
+
+
+@pytest.mark.parametrize('executor', [None, 'thread', 'process'])
+def test_sweep_executors(executor):
+    result = sweep(TEMPLATE, GRID, Linear(20), quantity='Stokes', executor=executor, max_workers=2, chunk_size=4)
+    assert result.shape == (7, 5, 4)
+    assert np.allclose(result, _expected(Linear(20)))
+
+
+def test_sweep_state_axis_and_function_template():
+    states = JonesVectorArray([LinearHorizontal(), CircularRight(), Linear(20)])
+    result = sweep(lambda qwp, angle: PolarizerVertical() * PhaseRetarder(angle, 45.0) * QuarterWavePlate(qwp),
+                   GRID, states, executor='thread', chunk_size=3)
+    assert result.shape == (7, 5, 3)
+    assert np.allclose(result[..., 2], _expected(Linear(20))[..., 0])
+    assert np.allclose(result[..., 1], _expected(CircularRight())[..., 0])
+
+
+def test_sweep_wrong_arguments():
+    with pytest.raises(ValueError):
+        sweep(TEMPLATE, GRID, LinearHorizontal(), quantity='phase')
+    with pytest.raises(ValueError):
+        sweep(TEMPLATE, GRID, LinearHorizontal(), executor='cluster')
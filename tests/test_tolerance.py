@@ -0,0 +1,48 @@
+from pyjones.polarizations import *
+from pyjones.opticalelements import *
+from pyjones.opticaltrain import OpticalTrain
+from pyjones.tolerance import *
+import numpy as np
+import pytest
+
+TRAIN = OpticalTrain([PolarizerHorizontal(), QuarterWavePlate(45), HalfWavePlate(10), JonesMatrix([[1, 0], [0, 0.9]]),
+                      PolarizerVertical()])
+
+
+def test_reproducible_and_independent_of_chunking():
+    errors = {'angle': Normal(0.2), 'eta': Normal(0.01, relative=True), (4, 'angle'): Uniform(0.5)}
+    first = tolerance_analysis(TRAIN, errors, LinearHorizontal(), samples=1000, seed=3, chunk_size=1000)
+    second = tolerance_analysis(TRAIN, errors, LinearHorizontal(), samples=1000, seed=3, chunk_size=77)
+    third = tolerance_analysis(TRAIN, errors, LinearHorizontal(), samples=1000, seed=3, chunk_size=100,
+                               backend='numpy')
+    assert np.allclose(first.stokes, second.stokes, rtol=0, atol=1e-12)
+    assert np.allclose(first.stokes, third.stokes)
+    other = tolerance_analysis(TRAIN, errors, LinearHorizontal(), samples=1000, seed=4)
+    assert not np.allclose(first.stokes, other.stokes)
+    assert first.parameters == [(0, 'angle'), (1, 'angle'), (1, 'eta'), (2, 'angle'), (2, 'eta'), (4, 'angle')]
+
+
+def test_matches_rebuilt_elements():
+    result = tolerance_analysis(TRAIN, {(1, 'eta'): Normal(2.0), (2, 'angle'): Normal(1.0)}, CircularRight(),
+                                samples=20, seed=0)
+    generators = [np.random.Generator(np.random.PCG64(sequence)) for sequence in np.random.SeedSequence(0).spawn(2)]
+    etas = 90 + 2.0 * generators[0].standard_normal(20)
+    angles = 10 + 1.0 * generators[1].standard_normal(20)
+    for sample in range(20):
+        train = OpticalTrain([TRAIN[0], PhaseRetarder(45, etas[sample], 90), HalfWavePlate(angles[sample]), TRAIN[3],
+                              TRAIN[4]])
+        assert np.allclose(result.stokes[sample], (train * CircularRight()).Stokes)
+
+
+def test_summary_statistics():
+    result = tolerance_analysis(OpticalTrain([Polarizer(0), Polarizer(90)]), {'angle': Normal(1.0)},
+                                LinearHorizontal(), samples=5000, seed=1)
+    summary = result.summary(percentiles=(50, 99))
+    assert len(result) == 5000
+    assert summary['intensity']['mean'] == pytest.approx(result.intensity.mean())
+    assert 0 < summary['intensity']['percentiles'][50] < summary['intensity']['percentiles'][99] < 0.01
+    assert summary['degree_of_polarization'] == pytest.approx(result.degree_of_polarization)
+    nominal = tolerance_analysis(OpticalTrain([Polarizer(0), Polarizer(90)]), {}, LinearHorizontal(), samples=10)
+    assert np.allclose(nominal.intensity, 0)
+    with pytest.raises(KeyError):
+        tolerance_analysis(TRAIN, {'angel': Normal(1.0)}, LinearHorizontal())